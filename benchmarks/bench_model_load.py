@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: native embedding format vs. Word2Vec.load
+
+Each load path runs in a fresh subprocess so import and cold-start costs
+are measured the same way the application experiences them.
+
+Usage:
+    python benchmarks/bench_model_load.py [--model embeddings_8] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add src directory to path for imports
+src_path = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from utils.app_dirs import AppDirs
+
+def run_child(path: str, model_path: str):
+    """Load the model one way and print timings as JSON"""
+    start = time.perf_counter()
+    if path == 'native':
+        from models.native_vectors import NativeVectors
+        imported = time.perf_counter()
+        vectors = NativeVectors.load(model_path)
+    else:
+        from gensim.models import Word2Vec
+        imported = time.perf_counter()
+        vectors = Word2Vec.load(model_path).wv
+    loaded = time.perf_counter()
+    
+    # First query pages in the vectors, which mmap defers
+    probe = vectors.index_to_key[0]
+    vectors.most_similar(probe, topn=20)
+    queried = time.perf_counter()
+    
+    print(json.dumps({
+        'import_s': imported - start,
+        'load_s': loaded - imported,
+        'first_query_s': queried - loaded,
+        'total_s': queried - start,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--embeddings-dir', default=AppDirs().embeddings_dir)
+    parser.add_argument('--model', default='embeddings_8')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', choices=['native', 'gensim'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    model_path = os.path.join(args.embeddings_dir, args.model)
+    
+    if args.child:
+        run_child(args.child, model_path)
+        return
+    
+    from models.native_vectors import convert_model, is_native_current
+    
+    if not os.path.exists(model_path):
+        sys.exit(f"Model not found: {model_path}")
+    if not is_native_current(model_path):
+        print(f"Converting {args.model} to native format...")
+        if not convert_model(model_path):
+            sys.exit("Conversion failed")
+    
+    print(f"{'path':<8} {'import':>9} {'load':>9} {'query':>9} {'total':>9}")
+    for path in ('gensim', 'native'):
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, __file__, '--embeddings-dir', args.embeddings_dir,
+                 '--model', args.model, '--child', path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            timing = json.loads(output.strip().splitlines()[-1])
+            print(f"{path:<8} {timing['import_s']:>8.3f}s {timing['load_s']:>8.3f}s "
+                  f"{timing['first_query_s']:>8.3f}s {timing['total_s']:>8.3f}s")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the analysis and embedding hot paths
+
+Times text processing and embedding lookups on a synthetic filing-like
+corpus and synthetic Word2Vec models, so it runs offline, and writes the
+results as JSON. Compare against a stored baseline to catch regressions.
+
+Usage:
+    python benchmarks/bench_suite.py --out results.json
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json [--threshold 0.25]
+    python benchmarks/bench_suite.py --compare results.json --baseline benchmarks/baseline.json
+
+Exits with status 1 if a benchmark is slower than the baseline by more
+than the threshold (a fraction of the baseline time).
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Add src directory to path for imports
+src_path = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(src_path))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+
+from synthetic import build_model, generate_corpus, generate_lexicon
+
+RESULTS_VERSION = 1
+
+DEFAULT_SIZES = "1000,10000,50000"
+DEFAULT_VOCAB_SIZES = "10000,100000"
+DEFAULT_THRESHOLD = 0.25
+
+# Similarity queries per most_similar benchmark
+QUERIES = 100
+
+TEXT_BENCHMARKS = ['tokenize_sentences', 'clean_text', 'generate_ngrams', 'analyze_text']
+EMBEDDING_BENCHMARKS = ['model_load_gensim', 'model_load_native', 'most_similar', 'most_similar_batch']
+BENCHMARKS = TEXT_BENCHMARKS + EMBEDDING_BENCHMARKS
+
+def measure(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Time a function after one warm-up run"""
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {'min_s': min(times), 'median_s': statistics.median(times), 'max_s': max(times)}
+
+class Suite:
+    """Runs the selected benchmarks and collects their results"""
+    
+    def __init__(self, repeat: int, only: Optional[List[str]] = None):
+        self.repeat = repeat
+        self.only = only
+        self.results: Dict[str, Dict] = {}
+    
+    def wanted(self, name: str) -> bool:
+        """Check if a benchmark was selected"""
+        return not self.only or name in self.only
+    
+    def run(self, name: str, parameter: str, size: int, unit: str, items: int, function: Callable[[], object]):
+        """Time one benchmark at one size"""
+        if not self.wanted(name):
+            return
+        key = f"{name}[{parameter}={size}]"
+        timing = measure(function, self.repeat)
+        self.results[key] = {
+            'name': name,
+            parameter: size,
+            'items': items,
+            'unit': unit,
+            **timing,
+            'items_per_s': items / timing['min_s'] if timing['min_s'] else None,
+        }
+        print(f"{key:<45} {timing['min_s'] * 1000:>10.2f} ms  {self.results[key]['items_per_s'] or 0:>12,.0f} {unit}/s")
+
+def run_text_benchmarks(suite: Suite, sizes: List[int], seed: int):
+    """Time sentence splitting, cleaning, n-grams and full analysis"""
+    if not any(suite.wanted(name) for name in TEXT_BENCHMARKS):
+        return
+    from models.text_processor import TextProcessor
+    
+    text_processor = TextProcessor()
+    lexicon = generate_lexicon()
+    for size in sizes:
+        text = generate_corpus(size, seed)
+        sentences = text_processor.tokenize_sentences(text)
+        cleaned = text_processor.clean_text(sentences)
+        
+        suite.run('tokenize_sentences', 'sentences', size, 'sentences', len(sentences),
+                  lambda: text_processor.tokenize_sentences(text))
+        suite.run('clean_text', 'sentences', size, 'sentences', len(sentences),
+                  lambda: text_processor.clean_text(sentences))
+        suite.run('generate_ngrams', 'sentences', size, 'sentences', len(cleaned),
+                  lambda: [text_processor.generate_ngrams(cleaned, n) for n in (2, 3)])
+        suite.run('analyze_text', 'sentences', size, 'sentences', len(sentences),
+                  lambda: text_processor.analyze_text(text, lexicon))
+
+def run_embedding_benchmarks(suite: Suite, vocab_sizes: List[int], vector_size: int, seed: int, work_dir: str):
+    """Time model loading and similarity queries"""
+    if not any(suite.wanted(name) for name in EMBEDDING_BENCHMARKS):
+        return
+    from gensim.models import Word2Vec
+    from models.native_vectors import NativeVectors, convert_model
+    
+    for vocab_size in vocab_sizes:
+        model_path = build_model(os.path.join(work_dir, f"model_{vocab_size}"), vocab_size, vector_size, seed)
+        convert_model(model_path)
+        
+        suite.run('model_load_gensim', 'vocab', vocab_size, 'models', 1, lambda: Word2Vec.load(model_path))
+        # Memory-mapped loads are lazy; touching every page makes the comparison fair
+        suite.run('model_load_native', 'vocab', vocab_size, 'models', 1,
+                  lambda: NativeVectors.load(model_path).vectors.sum())
+        
+        vectors = NativeVectors.load(model_path)
+        rng = np.random.default_rng(seed)
+        keys = [vectors.index_to_key[i] for i in rng.integers(0, len(vectors), QUERIES)]
+        suite.run('most_similar', 'vocab', vocab_size, 'queries', len(keys),
+                  lambda: [vectors.most_similar(key, topn=20) for key in keys])
+        suite.run('most_similar_batch', 'vocab', vocab_size, 'queries', len(keys),
+                  lambda: vectors.most_similar_batch(keys, topn=20))
+
+def environment(seed: int, repeat: int, vector_size: int) -> Dict:
+    """Describe where and how the results were produced"""
+    import nltk
+    
+    try:
+        nltk.data.find('tokenizers/punkt_tab')
+        punkt = True
+    except LookupError:
+        punkt = False
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        # Without punkt, sentence splitting falls back to a regex and times differ
+        'nltk_punkt': punkt,
+        'seed': seed,
+        'repeat': repeat,
+        'vector_size': vector_size,
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> int:
+    """Print current against baseline minimum times; returns the number of regressions"""
+    regressions = 0
+    print(f"\n{'benchmark':<45} {'baseline':>11} {'current':>11} {'change':>8}")
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            print(f"{key:<45} {'-':>11} {result['min_s'] * 1000:>9.2f}ms {'new':>8}")
+            continue
+        change = result['min_s'] / base['min_s'] - 1 if base['min_s'] else 0.0
+        status = ""
+        if change > threshold:
+            status = "  REGRESSION"
+            regressions += 1
+        print(f"{key:<45} {base['min_s'] * 1000:>9.2f}ms {result['min_s'] * 1000:>9.2f}ms "
+              f"{change:>+7.1%}{status}")
+    
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        print(f"Not run this time: {', '.join(missing)}")
+    if baseline.get('meta', {}).get('nltk_punkt') != current.get('meta', {}).get('nltk_punkt'):
+        print("Warning: NLTK punkt availability differs from the baseline; text timings are not comparable")
+    print(f"\n{regressions} regression(s) over {threshold:.0%}")
+    return regressions
+
+def read_results(path: str) -> Dict:
+    """Read a results file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    if results.get('version') != RESULTS_VERSION:
+        sys.exit(f"{path} has unsupported results version {results.get('version')}")
+    return results
+
+def write_results(results: Dict, path: str):
+    """Write a results file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {path}")
+
+def parse_sizes(text: str) -> List[int]:
+    """Parse a comma-separated list of sizes"""
+    return [int(size) for size in text.split(',') if size.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="corpus sizes in sentences")
+    parser.add_argument('--vocab-sizes', default=DEFAULT_VOCAB_SIZES, help="synthetic model vocabulary sizes")
+    parser.add_argument('--vector-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help=f"comma-separated benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--work-dir', help="directory for the synthetic models (default: a temporary one)")
+    parser.add_argument('--out', help="write results JSON here")
+    parser.add_argument('--save-baseline', help="write results JSON here as the new baseline")
+    parser.add_argument('--baseline', help="compare results against this baseline JSON")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"slowdown counted as a regression (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--compare', help="compare this results JSON against --baseline without running")
+    args = parser.parse_args()
+    
+    if args.compare:
+        if not args.baseline:
+            sys.exit("--compare needs --baseline")
+        sys.exit(1 if compare(read_results(args.compare), read_results(args.baseline), args.threshold) else 0)
+    
+    only = [name.strip() for name in args.only.split(',')] if args.only else None
+    unknown = sorted(set(only or []) - set(BENCHMARKS))
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {', '.join(unknown)}")
+    
+    suite = Suite(args.repeat, only)
+    run_text_benchmarks(suite, parse_sizes(args.sizes), args.seed)
+    if args.work_dir:
+        run_embedding_benchmarks(suite, parse_sizes(args.vocab_sizes), args.vector_size, args.seed, args.work_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="marklex-bench-") as work_dir:
+            run_embedding_benchmarks(suite, parse_sizes(args.vocab_sizes), args.vector_size, args.seed, work_dir)
+    
+    results = {
+        'version': RESULTS_VERSION,
+        'meta': environment(args.seed, args.repeat, args.vector_size),
+        'results': suite.results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            write_results(results, path)
+    
+    if args.baseline:
+        sys.exit(1 if compare(results, read_results(args.baseline), args.threshold) else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
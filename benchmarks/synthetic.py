@@ -0,0 +1,110 @@
+"""
+Deterministic synthetic inputs for the benchmarks
+
+Filing-like text, a lexicon that matches it and small Word2Vec models,
+all generated from a seed so benchmarks run offline and compare like
+with like across runs.
+"""
+
+import os
+import random
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# Words sentences are built from; lexicon keywords are drawn from the same lists
+SUBJECTS = [
+    "The Company", "Our management", "The Board of Directors", "Our customers", "The Audit Committee",
+    "Our subsidiaries", "Our employees", "The registrant", "Our suppliers", "Our marketing team",
+]
+VERBS = [
+    "expects", "recognized", "reported", "may experience", "continues to invest in", "depends on",
+    "evaluates", "cannot guarantee", "announced", "is exposed to", "increased", "reduced",
+]
+OBJECTS = [
+    "revenue growth", "market share", "brand awareness", "customer satisfaction", "cyber risk",
+    "supply chain disruptions", "climate change", "employee engagement", "data privacy", "operating margin",
+    "product innovation", "share repurchases", "diversity and inclusion", "artificial intelligence",
+    "interest rate risk", "foreign currency exposure", "goodwill impairment", "digital advertising",
+    "research and development", "greenhouse gas emissions", "talent retention", "dividend payments",
+]
+QUALIFIERS = [
+    "in fiscal {year}", "compared to the prior year", "in the U.S. and internationally",
+    "as described in Item 1A", "under the credit agreement", "across all reportable segments",
+    "by approximately {pct}%", "to ${amount} million", "during the fourth quarter",
+    "pursuant to Rule 10b5-1", "net of tax", "subject to regulatory approval",
+]
+HEADINGS = [
+    "Item 1. Business.", "Item 1A. Risk Factors.", "Item 7. Management's Discussion and Analysis.",
+    "Item 7A. Quantitative and Qualitative Disclosures About Market Risk.", "Item 8. Financial Statements.",
+]
+
+LEXICON_ENTITIES = {
+    'Marketing': ["market share", "brand awareness", "digital advertising", "customer satisfaction", "brand"],
+    'Risk & Security': ["cyber risk", "data privacy", "interest rate risk", "foreign currency exposure"],
+    'ESG': ["climate change", "greenhouse gas emissions", "sustainability"],
+    'Employee': ["employee engagement", "talent retention", "employees"],
+    'Innovation': ["product innovation", "research and development", "artificial intelligence"],
+    'Investor Focus': ["share repurchases", "dividend payments", "operating margin", "revenue growth"],
+}
+
+def generate_sentence(rng: random.Random) -> str:
+    """Make one filing-like sentence"""
+    words = [rng.choice(SUBJECTS), rng.choice(VERBS), rng.choice(OBJECTS)]
+    for _ in range(rng.randint(0, 2)):
+        words.append(rng.choice(QUALIFIERS).format(year=rng.randint(2015, 2024), pct=rng.randint(1, 40),
+                                                   amount=rng.randint(5, 900)))
+    if rng.random() < 0.3:
+        words += ["and", rng.choice(OBJECTS)]
+    return " ".join(words) + "."
+
+def generate_corpus(sentences: int, seed: int = 0) -> str:
+    """Make filing-like text with about the given number of sentences"""
+    rng = random.Random(seed)
+    paragraphs = []
+    written = 0
+    while written < sentences:
+        count = min(rng.randint(3, 8), sentences - written)
+        paragraph = " ".join(generate_sentence(rng) for _ in range(count))
+        if rng.random() < 0.1:
+            paragraph = rng.choice(HEADINGS) + "\n\n" + paragraph
+        paragraphs.append(paragraph)
+        written += count
+    return "\n\n".join(paragraphs) + "\n"
+
+def generate_lexicon() -> pd.DataFrame:
+    """Make a lexicon whose keywords occur in the synthetic corpus"""
+    rows = [{'Entity': entity, 'Keyword': keyword}
+            for entity, keywords in LEXICON_ENTITIES.items() for keyword in keywords]
+    return pd.DataFrame(rows)
+
+def corpus_words() -> List[str]:
+    """Get the distinct lowercase words of the corpus templates"""
+    text = " ".join(SUBJECTS + VERBS + OBJECTS + QUALIFIERS + HEADINGS).lower()
+    words = [word.strip(".,'%$()") for word in text.split()]
+    return sorted({word for word in words if word.isalpha()})
+
+def generate_vocabulary(size: int) -> List[str]:
+    """Make a vocabulary of the corpus words padded with made-up ones"""
+    vocabulary = corpus_words()[:size]
+    vocabulary += [f"term{index:07d}" for index in range(size - len(vocabulary))]
+    return vocabulary
+
+def build_model(path: str, vocab_size: int, vector_size: int = 100, seed: int = 0) -> str:
+    """Save a Word2Vec model with random vectors, shaped like the real ones
+
+    Training is skipped: load and similarity timings depend only on the
+    vocabulary size and vector size, not on what the vectors mean.
+    """
+    from gensim.models import Word2Vec
+    
+    vocabulary = generate_vocabulary(vocab_size)
+    model = Word2Vec(vector_size=vector_size, min_count=1, workers=1, seed=seed)
+    # Descending counts keep the vocabulary in generation order
+    model.build_vocab_from_freq({word: len(vocabulary) - i for i, word in enumerate(vocabulary)})
+    model.wv.vectors[:] = np.random.default_rng(seed).standard_normal(model.wv.vectors.shape).astype(np.float32)
+    
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    model.save(path)
+    return path
\ No newline at end of file
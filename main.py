@@ -2,31 +2,47 @@
 """
 MarkLex Desktop - Marketing Lexicon Creation Tool
 Main application entry point
+
+Run with --profile-startup to write import and startup timings to
+startup_profile.log in the user cache directory. Stage timings of every
+analysis and lexicon run are appended to stage_timings.jsonl there; run
+with --profile-jobs to also write a cProfile profile per run to profiles/,
+and with --profile-memory (or --profile-memory=python) to log the peak and
+retained memory of each run; see Tools > Diagnostics.
 """
 
 import sys
 import os
+import multiprocessing
 from pathlib import Path
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QDir
-from PyQt6.QtGui import QIcon
 
 # Add src directory to path for imports
 src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
-from src.main_window import MainWindow
-from src.utils.app_dirs import AppDirs
+from src.utils.startup_profiler import StartupProfiler, profiling_requested
 
 def setup_app_directories():
     """Create necessary application directories"""
+    from src.utils.app_dirs import AppDirs
+    
     app_dirs = AppDirs()
     os.makedirs(app_dirs.user_data_dir, exist_ok=True)
     os.makedirs(app_dirs.user_cache_dir, exist_ok=True)
     os.makedirs(app_dirs.embeddings_dir, exist_ok=True)
+    return app_dirs
 
 def main():
     """Main application entry point"""
+    profiler = None
+    if profiling_requested():
+        profiler = StartupProfiler()
+        profiler.install()
+    
+    # Qt and the window are imported here, not at module level, so the
+    # profiler sees them and spawned worker processes never load them
+    from PyQt6.QtWidgets import QApplication
+    
     app = QApplication(sys.argv)
     
     # Set application properties
@@ -37,14 +53,34 @@ def main():
     app.setOrganizationDomain("marklex.app")
     
     # Setup application directories
-    setup_app_directories()
+    app_dirs = setup_app_directories()
+    if profiler:
+        profiler.mark("QApplication created")
+    
+    from src.main_window import MainWindow
+    if profiler:
+        profiler.mark("Main window imported")
     
     # Create and show main window
     window = MainWindow()
+    if profiler:
+        profiler.mark("Main window created")
+        profiler.watch_first_paint(window)
+        
+        def on_tabs_created():
+            profiler.mark("All tabs created")
+            profiler.uninstall()
+            log_path = profiler.write_log(app_dirs.user_cache_dir)
+            if log_path:
+                print(f"Startup profile written to {log_path}")
+        
+        window.tabs_created.connect(on_tabs_created)
     window.show()
     
     # Run application
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Required for the analysis worker process in frozen builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+MarkLex command line - lexicon analysis and expansion without the GUI
+
+    python marklex.py analyze report.txt --lexicon lexicon.xlsx --out results.csv
+    python marklex.py expand marketing --topn 20
+
+Run with --help for all options.
+"""
+
+import sys
+import multiprocessing
+from pathlib import Path
+
+# Add src directory to path for imports
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+if __name__ == "__main__":
+    # Required for the parallel analysis workers in frozen builds
+    multiprocessing.freeze_support()
+    
+    from cli import main
+    sys.exit(main())
\ No newline at end of file
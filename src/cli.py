@@ -0,0 +1,545 @@
+"""
+Headless command-line interface
+
+    python marklex.py analyze report.txt filings/*.txt --out results.csv --workers 4
+    cat report.txt | python marklex.py analyze > results.csv
+    python marklex.py analyze filings/*.txt --index corpus.idx --out results.csv
+    python marklex.py rescore --index corpus.idx --lexicon new_lexicon.xlsx --out results.csv
+    python marklex.py expand marketing "profit margin" --topn 20
+    python marklex.py serve --port 8765
+
+Nothing here imports PyQt6, so MarkLex can run on servers without a
+display. Results stream to stdout (CSV or JSON lines) or are written to a
+file in any export format; --timings writes machine-readable timing
+records as JSON lines.
+"""
+
+import argparse
+import asyncio
+import codecs
+import collections
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import pandas as pd
+
+from core.analyzer import DEFAULT_BATCH_SIZE, Analyzer, init_worker_analyzer, read_lexicon_file, worker_analyzer
+from core.lexicon_expander import DEFAULT_TOP_N, LexiconExpander, init_worker_expander, worker_expander
+from models.corpus_index import MANIFEST_NAME, CorpusIndex
+from models.lexicon_manager import LexiconManager
+from models.edgar_reader import is_edgar_submission
+from models.result_cache import RESULT_CACHE_DIR, ResultCache, hash_file
+from models.result_exporter import EXPORT_FORMATS, ResultExporter, format_from_filename
+from models.token_store import TOKEN_STORE_DIR, TokenStore
+from service import DEFAULT_HOST, DEFAULT_PORT, run_service
+from utils.app_dirs import AppDirs
+from utils.stage_timer import StageTimer
+
+# Path meaning standard input or output
+STDIO = '-'
+
+# Bytes read from standard input at a time
+STDIN_CHUNK_BYTES = 64 * 1024
+
+# Formats that can be streamed row batch by row batch
+STREAM_FORMATS = ('csv', 'jsonl')
+
+# Terms sent to an expand worker process at a time
+EXPAND_CHUNK_TERMS = 64
+
+class TimingLog:
+    """Timing records written as JSON lines as they happen"""
+    
+    def __init__(self, target: Optional[str]):
+        self._file = None
+        self._owned = False
+        if target == STDIO:
+            self._file = sys.stderr
+        elif target:
+            self._file = open(target, 'w', encoding='utf-8')
+            self._owned = True
+    
+    def record(self, event: str, **fields):
+        """Write one record"""
+        if self._file is not None:
+            self._file.write(json.dumps({'event': event, **fields}) + '\n')
+            self._file.flush()
+    
+    def close(self):
+        """Close the timing file"""
+        if self._owned:
+            self._file.close()
+        self._file = None
+
+def output_format(out: str, fmt: Optional[str]) -> str:
+    """Get the output format from --format or the output file name"""
+    if fmt:
+        return fmt
+    if out.lower().endswith('.jsonl'):
+        return 'jsonl'
+    return 'csv' if out == STDIO else format_from_filename(out)
+
+def write_results(chunks: Iterable[pd.DataFrame], out: str, fmt: str, stdout: TextIO) -> int:
+    """Write result chunks and return the number of rows written"""
+    if fmt in STREAM_FORMATS:
+        if out == STDIO:
+            return _write_stream(chunks, stdout, fmt)
+        with open(out, 'w', encoding='utf-8', newline='') as f:
+            return _write_stream(chunks, f, fmt)
+    if out == STDIO:
+        raise ValueError(f"{fmt} output must be written to a file, use --out")
+    return ResultExporter(out, fmt).export(chunks)
+
+def _write_stream(chunks: Iterable[pd.DataFrame], f: TextIO, fmt: str) -> int:
+    """Write chunks as CSV or JSON lines, flushing after each one"""
+    rows = 0
+    header = True
+    for chunk in chunks:
+        if fmt == 'csv':
+            chunk.to_csv(f, header=header, index=False)
+            header = False
+        elif len(chunk):
+            text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+            f.write(text if text.endswith('\n') else text + '\n')
+        f.flush()
+        rows += len(chunk)
+    return rows
+
+def result_columns(sources: List[str], analyzer: Analyzer) -> List[str]:
+    """Get the output columns, so every source's rows line up"""
+    columns = ['Source']
+    if any(source != STDIO and os.path.isfile(source) and is_edgar_submission(source) for source in sources):
+        columns += ['Document', 'Sequence']
+    return columns + ['Text'] + analyzer.entities
+
+def iter_stdin_text(encoding: Optional[str]) -> Iterator[str]:
+    """Read standard input as text chunks, replacing undecodable bytes"""
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    for data in iter(lambda: sys.stdin.buffer.read(STDIN_CHUNK_BYTES), b''):
+        yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+def iter_source_batches(analyzer: Analyzer, source: str, encoding: Optional[str], batch_size: int,
+                        timer: Optional[StageTimer] = None,
+                        document_hash: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Analyze standard input, a text file or an EDGAR submission in batches"""
+    if source == STDIO:
+        return analyzer.iter_analyze_chunks(iter_stdin_text(encoding), batch_size, timer)
+    return analyzer.iter_analyze_file(source, encoding, batch_size, timer, document_hash)
+
+def _label_batch(batch: pd.DataFrame, source: str, columns: List[str]) -> pd.DataFrame:
+    """Add the source column and align a batch to the output columns; batch is left as is"""
+    return batch.assign(Source='stdin' if source == STDIO else source).reindex(columns=columns, fill_value='')
+
+def _analyze_in_worker(source: str, encoding: Optional[str], batch_size: int,
+                       document_hash: Optional[str] = None) -> Tuple[List[pd.DataFrame], float, dict, Optional[str]]:
+    """Analyze one file in a worker process; returns batches, seconds, stage timings and error"""
+    start = time.perf_counter()
+    timer = StageTimer()
+    batches = []
+    try:
+        for batch in iter_source_batches(worker_analyzer(), source, encoding, batch_size, timer, document_hash):
+            batches.append(batch)
+        return batches, time.perf_counter() - start, timer.state(), None
+    except Exception as e:
+        return batches, time.perf_counter() - start, timer.state(), str(e)
+
+def command_analyze(args, stdout: TextIO) -> int:
+    """Analyze files or standard input against a lexicon"""
+    started = time.perf_counter()
+    timings = TimingLog(args.timings)
+    try:
+        fmt = output_format(args.out, args.format)
+        analyzer = Analyzer.from_file(args.lexicon) if args.lexicon else Analyzer.from_app_lexicon()
+        sources = args.paths or [STDIO]
+        columns = result_columns(sources, analyzer)
+        workers = args.workers or os.cpu_count() or 1
+        cache = None if args.no_cache else ResultCache(os.path.join(AppDirs().user_cache_dir, RESULT_CACHE_DIR))
+        token_dir = None if args.no_cache else os.path.join(AppDirs().user_cache_dir, TOKEN_STORE_DIR)
+        analyzer.token_store = TokenStore(token_dir) if token_dir else None
+        index = CorpusIndex(args.index, analyzer.text_processor) if args.index else None
+        timings.record('setup', seconds=time.perf_counter() - started, workers=workers)
+        
+        failed = []
+        totals = {'sentences': 0}
+        
+        def finish_source(source: str, sentences: int, seconds: float, stages: dict, error: Optional[str],
+                          cached: bool = False):
+            totals['sentences'] += sentences
+            if error is not None:
+                failed.append(source)
+                print(f"Error analyzing {source}: {error}", file=sys.stderr)
+            timings.record('input', source=source, sentences=sentences, seconds=seconds,
+                           bytes=os.path.getsize(source) if source != STDIO and os.path.exists(source) else None,
+                           stages=stages['seconds'], error=error, cached=cached)
+        
+        def document_hash(source: str) -> Optional[str]:
+            # Standard input can't be hashed before it is read
+            if (cache is None and index is None) or source == STDIO:
+                return None
+            try:
+                return hash_file(source)
+            except OSError:
+                return None
+        
+        def cached_result(content_hash: Optional[str]) -> Optional[tuple]:
+            # Shaped like the result of _analyze_in_worker
+            if cache is None or content_hash is None:
+                return None
+            start = time.perf_counter()
+            timer = StageTimer()
+            with timer.stage('cache_read'):
+                df = cache.get(ResultCache.key(content_hash, analyzer.lexicon_version,
+                                               analyzer.text_processor.fingerprint, args.encoding))
+            if df is None:
+                return None
+            return [df], time.perf_counter() - start, timer.state(), None
+        
+        def store_result(source: str, content_hash: Optional[str], batches: List[pd.DataFrame], cached: bool):
+            if content_hash is None or not batches:
+                return
+            df = pd.concat(batches, ignore_index=True)
+            if cache is not None and not cached:
+                cache.put(ResultCache.key(content_hash, analyzer.lexicon_version,
+                                          analyzer.text_processor.fingerprint, args.encoding), df)
+            if index is not None:
+                index.add(source, content_hash, df)
+        
+        def analyze_inline(source: str) -> Iterator[pd.DataFrame]:
+            content_hash = document_hash(source)
+            cached = cached_result(content_hash)
+            if cached is not None:
+                yield from collect(source, cached, content_hash)
+                return
+            
+            start = time.perf_counter()
+            # Writing the output happens between batches and is not part of any stage
+            timer = StageTimer()
+            sentences = 0
+            error = None
+            batches = []
+            try:
+                for batch in iter_source_batches(analyzer, source, args.encoding, args.batch_size, timer,
+                                                 content_hash):
+                    sentences += len(batch)
+                    if content_hash is not None:
+                        batches.append(batch)
+                    yield _label_batch(batch, source, columns)
+            except Exception as e:
+                error = str(e)
+            if error is None:
+                store_result(source, content_hash, batches, False)
+            finish_source(source, sentences, time.perf_counter() - start, timer.state(), error)
+        
+        def analyze_parallel() -> Iterator[pd.DataFrame]:
+            # Keep a bounded window of files in flight and emit results in input order
+            with ProcessPoolExecutor(workers, initializer=init_worker_analyzer,
+                                     initargs=(analyzer.lexicon, token_dir)) as executor:
+                pending = collections.deque()
+                queued = iter(sources)
+                for source in queued:
+                    if source == STDIO:
+                        # Standard input can only be read here; drain earlier files first
+                        while pending:
+                            yield from collect(*pending.popleft())
+                        yield from analyze_inline(source)
+                        continue
+                    content_hash = document_hash(source)
+                    cached = cached_result(content_hash)
+                    if cached is not None:
+                        pending.append((source, cached, content_hash))
+                        continue
+                    pending.append((source, executor.submit(_analyze_in_worker, source, args.encoding, args.batch_size,
+                                                            content_hash),
+                                    content_hash))
+                    if len(pending) >= 2 * workers:
+                        yield from collect(*pending.popleft())
+                while pending:
+                    yield from collect(*pending.popleft())
+        
+        def collect(source: str, result, content_hash: Optional[str]) -> Iterator[pd.DataFrame]:
+            # A future of a worker result, or a result read from the cache
+            cached = not isinstance(result, Future)
+            batches, seconds, stages, error = result if cached else result.result()
+            if error is None:
+                store_result(source, content_hash, batches, cached)
+            for batch in batches:
+                yield _label_batch(batch, source, columns)
+            finish_source(source, sum(len(batch) for batch in batches), seconds, stages, error, cached)
+        
+        def all_batches() -> Iterator[pd.DataFrame]:
+            wrote = False
+            if workers > 1 and len(sources) > 1:
+                batches = analyze_parallel()
+            else:
+                batches = (batch for source in sources for batch in analyze_inline(source))
+            for batch in batches:
+                wrote = True
+                yield batch
+            if not wrote:
+                # Still write the header
+                yield pd.DataFrame(columns=columns)
+        
+        rows = write_results(all_batches(), args.out, fmt, stdout)
+        if index is not None:
+            index.flush()
+        seconds = time.perf_counter() - started
+        timings.record('total', inputs=len(sources), failed=len(failed), rows=rows,
+                       sentences=totals['sentences'], seconds=seconds,
+                       sentences_per_second=totals['sentences'] / seconds if seconds else None)
+        return 1 if failed else 0
+    finally:
+        timings.close()
+
+def command_rescore(args, stdout: TextIO) -> int:
+    """Match the sentences of an index built by analyze --index against a lexicon"""
+    started = time.perf_counter()
+    timings = TimingLog(args.timings)
+    try:
+        fmt = output_format(args.out, args.format)
+        if not os.path.exists(os.path.join(args.index, MANIFEST_NAME)):
+            raise ValueError(f"No index in {args.index}; build one with analyze --index")
+        lexicon = read_lexicon_file(args.lexicon) if args.lexicon else LexiconManager(AppDirs()).load_lexicon()
+        index = CorpusIndex(args.index)
+        tables = list(index.rescore(lexicon))
+        if not tables:
+            # Still write the header
+            tables = [pd.DataFrame(columns=['Source'] + index.label_columns() + ['Text'])]
+        rows = write_results(tables, args.out, fmt, stdout)
+        timings.record('total', documents=len(index.documents()), rows=rows, seconds=time.perf_counter() - started)
+        return 0
+    finally:
+        timings.close()
+
+def iter_terms(terms: List[str]) -> Iterator[str]:
+    """Get the terms from the command line, or one per line from standard input"""
+    if terms and terms != [STDIO]:
+        yield from terms
+        return
+    for line in sys.stdin:
+        if line.strip():
+            yield line.strip()
+
+# Seconds a worker process took to attach to the shared models
+_worker_attach_seconds = None
+
+def _init_expand_worker(shared: dict):
+    """Attach a worker process to the shared models, timing it"""
+    global _worker_attach_seconds
+    start = time.perf_counter()
+    init_worker_expander(shared)
+    _worker_attach_seconds = time.perf_counter() - start
+
+def _expand_in_worker(terms: List[str], topn: int) -> Tuple[list, float, int, float]:
+    """Expand a chunk of terms in a worker process; returns results, seconds, pid and attach seconds"""
+    start = time.perf_counter()
+    results = worker_expander().expand_batch(terms, topn)
+    return results, time.perf_counter() - start, os.getpid(), _worker_attach_seconds
+
+def command_expand(args, stdout: TextIO) -> int:
+    """Find the words most similar to each term"""
+    started = time.perf_counter()
+    timings = TimingLog(args.timings)
+    try:
+        fmt = output_format(args.out, args.format)
+        expander = LexiconExpander(collection=args.collection)
+        workers = args.workers or os.cpu_count() or 1
+        loaded = set()
+        failed = []
+        
+        def valid_terms() -> Iterator[str]:
+            for term in iter_terms(args.terms):
+                if len(term.split()) > 2:
+                    failed.append(term)
+                    print(f"Skipping \"{term}\": terms have at most 2 words", file=sys.stderr)
+                    continue
+                yield term
+        
+        def term_result(term: str, result) -> Optional[pd.DataFrame]:
+            if isinstance(result, ValueError):
+                failed.append(term)
+                print(f"Error expanding \"{term}\": {result}", file=sys.stderr)
+                return None
+            result.insert(0, 'Term', term)
+            return result
+        
+        def expansions_parallel() -> Iterator[pd.DataFrame]:
+            # Load the models once here; workers map the shared copy instead of loading their own
+            for model_type in ('uni', 'bi'):
+                start = time.perf_counter()
+                ok = expander.preload(model_type)
+                timings.record('model_load', model_type=model_type, collection=args.collection,
+                               seconds=time.perf_counter() - start, loaded=ok)
+            start = time.perf_counter()
+            shared = expander.share()
+            timings.record('share', models=sorted(shared), seconds=time.perf_counter() - start)
+            
+            ready = set()
+            
+            def collect(chunk: List[str], future) -> Iterator[pd.DataFrame]:
+                results, seconds, pid, attach_seconds = future.result()
+                if pid not in ready:
+                    ready.add(pid)
+                    timings.record('worker_ready', pid=pid, attach_seconds=attach_seconds)
+                frames = [term_result(term, result) for term, result in zip(chunk, results)]
+                timings.record('batch', terms=len(chunk), failed=sum(frame is None for frame in frames),
+                               seconds=seconds)
+                yield from (frame for frame in frames if frame is not None)
+            
+            try:
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_expand_worker,
+                                         initargs=({model_type: vectors.info
+                                                    for model_type, vectors in shared.items()},)) as executor:
+                    pending = collections.deque()
+                    terms = valid_terms()
+                    while True:
+                        chunk = list(itertools.islice(terms, EXPAND_CHUNK_TERMS))
+                        if not chunk:
+                            break
+                        pending.append((chunk, executor.submit(_expand_in_worker, chunk, args.topn)))
+                        if len(pending) >= 2 * workers:
+                            yield from collect(*pending.popleft())
+                    while pending:
+                        yield from collect(*pending.popleft())
+            finally:
+                for vectors in shared.values():
+                    vectors.close()
+        
+        def expansions() -> Iterator[pd.DataFrame]:
+            for term in valid_terms():
+                # Hold each model for the whole run and time its load separately
+                model_type = expander.model_type(term)
+                if model_type not in loaded:
+                    loaded.add(model_type)
+                    start = time.perf_counter()
+                    ok = expander.preload(model_type)
+                    timings.record('model_load', model_type=model_type, collection=args.collection,
+                                   seconds=time.perf_counter() - start, loaded=ok)
+                
+                start = time.perf_counter()
+                try:
+                    result = expander.expand(term, args.topn)
+                except ValueError as e:
+                    result = e
+                error = str(result) if isinstance(result, ValueError) else None
+                timings.record('term', term=term, seconds=time.perf_counter() - start,
+                               words=0 if error else len(result), error=error)
+                df = term_result(term, result)
+                if df is not None:
+                    yield df
+        
+        with expander:
+            rows = write_results(expansions_parallel() if workers > 1 else expansions(), args.out, fmt, stdout)
+        timings.record('total', rows=rows, failed=len(failed), seconds=time.perf_counter() - started)
+        return 1 if failed else 0
+    finally:
+        timings.close()
+
+def command_serve(args, stdout: TextIO) -> int:
+    """Serve analyze and expand over HTTP until interrupted"""
+    analyzer = Analyzer.from_file(args.lexicon) if args.lexicon else Analyzer.from_app_lexicon()
+    expander = LexiconExpander(collection=args.collection)
+    for model_type in ('uni', 'bi'):
+        if not expander.preload(model_type):
+            print(f"{model_type.title()}gram model not available; expand requests for it will fail",
+                  file=sys.stderr)
+    workers = args.workers or os.cpu_count() or 1
+    if args.root and not os.path.isdir(args.root):
+        raise ValueError(f"--root {args.root} is not a directory")
+    
+    def on_ready(address):
+        # Machine-readable, so callers can use --port 0 and read the port
+        stdout.write(json.dumps({'event': 'listening', 'host': address[0], 'port': address[1]}) + '\n')
+        stdout.flush()
+    
+    asyncio.run(run_service(analyzer, expander, args.host, args.port, workers, on_ready,
+                            args.root, args.allow_host))
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(prog='marklex', description="MarkLex lexicon creation and text analysis")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    formats = list(EXPORT_FORMATS) + ['jsonl']
+    
+    analyze = subparsers.add_parser('analyze', help="analyze text files against a lexicon")
+    analyze.add_argument('paths', nargs='*', help="text files or EDGAR submissions; - or none reads standard input")
+    analyze.add_argument('--lexicon', help="lexicon xlsx or csv with Entity and Keyword columns "
+                                           "(default: the app's lexicon)")
+    analyze.add_argument('--out', default=STDIO, help="output file, - for standard output (default)")
+    analyze.add_argument('--format', choices=formats, help="output format (default: from --out, else csv)")
+    analyze.add_argument('--workers', type=int, default=1, help="parallel worker processes across files "
+                                                               "(0: one per CPU)")
+    analyze.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="sentences per result batch")
+    analyze.add_argument('--encoding', help="text encoding (default: detected for files, UTF-8 for standard input)")
+    analyze.add_argument('--timings', help="write timing records as JSON lines to this file, - for standard error")
+    analyze.add_argument('--no-cache', action='store_true', help="always analyze, without reading or storing "
+                         "results in the result cache or tokens in the token store")
+    analyze.add_argument('--index', help="add the analyzed files to the corpus index in this directory, "
+                                         "for rescore")
+    analyze.set_defaults(handler=command_analyze)
+    
+    rescore = subparsers.add_parser('rescore', help="match a corpus indexed by analyze --index against a lexicon "
+                                                    "without re-analyzing it")
+    rescore.add_argument('--index', required=True, help="corpus index directory")
+    rescore.add_argument('--lexicon', help="lexicon xlsx or csv with Entity and Keyword columns "
+                                           "(default: the app's lexicon)")
+    rescore.add_argument('--out', default=STDIO, help="output file, - for standard output (default)")
+    rescore.add_argument('--format', choices=formats, help="output format (default: from --out, else csv)")
+    rescore.add_argument('--timings', help="write timing records as JSON lines to this file, - for standard error")
+    rescore.set_defaults(handler=command_rescore)
+    
+    expand = subparsers.add_parser('expand', help="find words similar to terms with the embedding models")
+    expand.add_argument('terms', nargs='*', help="unigram or bigram terms; - or none reads one per line "
+                                                 "from standard input")
+    expand.add_argument('--topn', type=int, default=DEFAULT_TOP_N, help=f"similar words per term (default: {DEFAULT_TOP_N})")
+    expand.add_argument('--collection', help="model collection from the model registry (default: its default)")
+    expand.add_argument('--out', default=STDIO, help="output file, - for standard output (default)")
+    expand.add_argument('--format', choices=formats, help="output format (default: from --out, else csv)")
+    expand.add_argument('--workers', type=int, default=1, help="worker processes sharing one copy of the models "
+                                                              "(0: one per CPU)")
+    expand.add_argument('--timings', help="write timing records as JSON lines to this file, - for standard error")
+    expand.set_defaults(handler=command_expand)
+    
+    serve = subparsers.add_parser('serve', help="serve analyze and expand as a local HTTP/JSON service")
+    serve.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT}, 0: any free port)")
+    serve.add_argument('--lexicon', help="lexicon xlsx or csv with Entity and Keyword columns "
+                                         "(default: the app's lexicon)")
+    serve.add_argument('--workers', type=int, default=1, help="analysis worker processes (0: one per CPU)")
+    serve.add_argument('--collection', help="model collection to load and serve by default")
+    serve.add_argument('--root', help="directory whose files /analyze may read by path "
+                                      "(default: only text is accepted)")
+    serve.add_argument('--allow-host', action='append', default=[], metavar='NAME',
+                       help="also accept requests for this Host name, e.g. when serving with --host 0.0.0.0; "
+                            "repeatable")
+    serve.set_defaults(handler=command_serve)
+    
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line; returns the exit code"""
+    args = build_parser().parse_args(argv)
+    
+    # Results own standard output; messages printed by the models go to standard error
+    stdout = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            return args.handler(args, stdout)
+    except BrokenPipeError:
+        # Output closed early, e.g. piped into head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), stdout.fileno())
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"marklex: {e}", file=sys.stderr)
+        return 2
\ No newline at end of file
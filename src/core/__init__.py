@@ -0,0 +1,25 @@
+"""
+Qt-free MarkLex core for scripts, services and pipelines
+
+    from core import Analyzer, LexiconExpander
+
+    analyzer = Analyzer.from_file("lexicon.xlsx")
+    results = analyzer.analyze_file("report.txt")
+
+    with LexiconExpander() as expander:
+        similar = expander.expand("marketing", n_words=20)
+
+Importing the package is cheap: pandas, NLTK and the embedding code are
+imported when Analyzer or LexiconExpander is first used.
+"""
+
+__all__ = ['Analyzer', 'LexiconExpander']
+
+def __getattr__(name: str):
+    if name == 'Analyzer':
+        from core.analyzer import Analyzer
+        return Analyzer
+    if name == 'LexiconExpander':
+        from core.lexicon_expander import LexiconExpander
+        return LexiconExpander
+    raise AttributeError(f"module 'core' has no attribute '{name}'")
\ No newline at end of file
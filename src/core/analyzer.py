@@ -0,0 +1,137 @@
+"""
+Lexicon analysis of text, text files and EDGAR submissions
+"""
+
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from utils.app_dirs import AppDirs
+from models.analysis_worker import AnalysisUpdate, iter_analysis
+from models.lexicon_manager import LexiconManager, lexicon_hash
+from models.text_processor import CompiledLexicon, TextProcessor
+from models.token_store import TokenStore
+from utils.stage_timer import StageTimer
+
+DEFAULT_BATCH_SIZE = 1000
+
+_text_processor = None
+_text_processor_lock = threading.Lock()
+
+def shared_text_processor() -> TextProcessor:
+    """Get the process-wide TextProcessor, creating it on first use
+
+    Setting one up checks (and may download) the NLTK data, so it is
+    done once per process.
+    """
+    global _text_processor
+    with _text_processor_lock:
+        if _text_processor is None:
+            _text_processor = TextProcessor()
+        return _text_processor
+
+def read_lexicon_file(path: str) -> pd.DataFrame:
+    """Read a lexicon with Entity and Keyword columns from an xlsx or csv file"""
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+class Analyzer:
+    """Matches text against a lexicon compiled once
+
+    The compiled lexicon is never modified after construction, so one
+    Analyzer can be reused for any number of documents and shared between
+    threads. Build a new Analyzer when the lexicon changes. The iterating
+    methods take an optional StageTimer to time each stage of a run.
+    lexicon_version is a content hash of the lexicon, e.g. for ResultCache keys.
+    With a token_store, files and text are matched from their stored tokens
+    when tokenized before.
+    """
+    
+    def __init__(self, lexicon: pd.DataFrame, text_processor: Optional[TextProcessor] = None,
+                 token_store: Optional[TokenStore] = None):
+        self.lexicon = lexicon
+        self.text_processor = text_processor or shared_text_processor()
+        self.token_store = token_store
+        self.compiled: CompiledLexicon = self.text_processor.compile_lexicon(lexicon)
+        self.lexicon_version = lexicon_hash(lexicon)
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'Analyzer':
+        """Create an analyzer for a lexicon xlsx or csv file"""
+        return cls(read_lexicon_file(path))
+    
+    @classmethod
+    def from_app_lexicon(cls, app_dirs: Optional[AppDirs] = None) -> 'Analyzer':
+        """Create an analyzer for the lexicon edited in the desktop app"""
+        return cls(LexiconManager(app_dirs or AppDirs()).load_lexicon())
+    
+    @property
+    def entities(self) -> List[str]:
+        """Get the entity columns of the results"""
+        return list(self.compiled.entities)
+    
+    def analyze_sentences(self, sentences: List[str]) -> pd.DataFrame:
+        """Match a batch of sentences"""
+        return self.text_processor.analyze_sentences(sentences, self.compiled)
+    
+    def iter_analyze(self, sentences: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                     timer: Optional[StageTimer] = None) -> Iterator[pd.DataFrame]:
+        """Analyze a sentence stream, yielding result batches"""
+        return self.text_processor.iter_analyze(sentences, self.compiled, batch_size, timer)
+    
+    def iter_analyze_chunks(self, chunks: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                            timer: Optional[StageTimer] = None) -> Iterator[pd.DataFrame]:
+        """Analyze a stream of text chunks with bounded memory, yielding result batches"""
+        return self.iter_analyze(self.text_processor.iter_sentences(chunks, timer), batch_size, timer)
+    
+    def iter_updates(self, text: str = "", file_path: Optional[str] = None, encoding: Optional[str] = None,
+                     batch_size: int = DEFAULT_BATCH_SIZE, timer: Optional[StageTimer] = None,
+                     document_hash: Optional[str] = None) -> Iterator[AnalysisUpdate]:
+        """Analyze text, a text file or an EDGAR submission, yielding batches with progress
+
+        document_hash, if already computed, saves hashing the document again for the token store.
+        """
+        return iter_analysis(self.text_processor, self.compiled, text, file_path, encoding, batch_size, timer,
+                             self.token_store, document_hash)
+    
+    def iter_analyze_file(self, path: str, encoding: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                          timer: Optional[StageTimer] = None,
+                          document_hash: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Analyze a text file or EDGAR submission, yielding result batches
+
+        Batches of EDGAR submissions start with Document and Sequence columns.
+        """
+        return (batch for batch, _, _, _ in self.iter_updates(file_path=path, encoding=encoding,
+                                                               batch_size=batch_size, timer=timer,
+                                                               document_hash=document_hash))
+    
+    def analyze_file(self, path: str, encoding: Optional[str] = None) -> pd.DataFrame:
+        """Analyze a text file or EDGAR submission"""
+        return self._concat(self.iter_analyze_file(path, encoding))
+    
+    def analyze_text(self, text: str) -> pd.DataFrame:
+        """Analyze a string"""
+        return self._concat(batch for batch, _, _, _ in self.iter_updates(text))
+    
+    def _concat(self, batches: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """Join result batches; no sentences gives an empty table with the result columns"""
+        batches = list(batches)
+        if not batches:
+            return pd.DataFrame(columns=['Text'] + self.entities)
+        return pd.concat(batches, ignore_index=True)
+
+# Analyzer of a process pool worker, set up by init_worker_analyzer
+_worker_analyzer: Optional[Analyzer] = None
+
+def init_worker_analyzer(lexicon: pd.DataFrame, token_dir: Optional[str] = None):
+    """Process pool initializer: compile the lexicon once per worker process"""
+    global _worker_analyzer
+    _worker_analyzer = Analyzer(lexicon, token_store=TokenStore(token_dir) if token_dir else None)
+
+def worker_analyzer() -> Analyzer:
+    """Get the analyzer set up by init_worker_analyzer in this process"""
+    if _worker_analyzer is None:
+        raise RuntimeError("Worker analyzer is not initialized")
+    return _worker_analyzer
\ No newline at end of file
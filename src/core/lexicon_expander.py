@@ -0,0 +1,228 @@
+"""
+Lexicon expansion: words similar to a term in the embedding models
+"""
+
+import contextlib
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from utils.app_dirs import AppDirs
+from models.embedding_manager import EmbeddingManager, KeyedVectorsLike, ModelHandle
+from models.shared_vectors import SharedVectors, attach_vectors
+from utils.stage_timer import StageTimer, timed
+
+DEFAULT_TOP_N = 20
+
+class LexiconExpander:
+    """Finds the words most similar to unigram and bigram terms
+
+    Models are loaded once by the EmbeddingManager and shared, so one
+    expander can serve any number of terms from several threads. Used as
+    a context manager (or after preload) it keeps its models loaded until
+    closed. Given vectors (per ngram type), it uses those instead of
+    loading models, for example vectors attached in a worker process.
+    """
+    
+    def __init__(self, embedding_manager: Optional[EmbeddingManager] = None,
+                 collection: Optional[str] = None, app_dirs: Optional[AppDirs] = None,
+                 vectors: Optional[Dict[str, KeyedVectorsLike]] = None):
+        self._vectors = dict(vectors) if vectors is not None else None
+        if embedding_manager is None and vectors is None:
+            # A standalone expander has no idle timer: the caller decides when models are released
+            embedding_manager = EmbeddingManager(app_dirs or AppDirs(), idle_timeout=None)
+        self.embedding_manager = embedding_manager
+        self.collection = collection
+        self._handles: Dict[tuple, ModelHandle] = {}
+        self._lock = threading.Lock()
+    
+    def __enter__(self) -> 'LexiconExpander':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    @staticmethod
+    def model_type(term: str) -> str:
+        """Get the model a term is looked up in"""
+        return 'uni' if len(term.split()) == 1 else 'bi'
+    
+    def _acquire(self, model_type: str, collection: Optional[str], timer: Optional[StageTimer] = None):
+        """Get a model as a context manager giving its vectors, or None if it is unavailable"""
+        if self._vectors is not None:
+            vectors = self._vectors.get(model_type)
+            return contextlib.nullcontext(vectors) if vectors is not None else None
+        return self.embedding_manager.acquire_model(model_type, collection or self.collection, timer)
+    
+    def preload(self, model_type: str, collection: Optional[str] = None) -> bool:
+        """Load a model and keep it loaded until close; returns False if it failed to load"""
+        if self._vectors is not None:
+            return model_type in self._vectors
+        collection = collection or self.collection
+        with self._lock:
+            if (model_type, collection) in self._handles:
+                return True
+        handle = self.embedding_manager.acquire_model(model_type, collection)
+        if handle is None:
+            return False
+        with self._lock:
+            if (model_type, collection) in self._handles:
+                handle.release()
+            else:
+                self._handles[(model_type, collection)] = handle
+        return True
+    
+    def close(self):
+        """Release the models held by preload"""
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles = {}
+        for handle in handles:
+            handle.release()
+    
+    def expand(self, term: str, n_words: int = DEFAULT_TOP_N, collection: Optional[str] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None,
+               timer: Optional[StageTimer] = None) -> Optional[pd.DataFrame]:
+        """Find the words most similar to a unigram or bigram term
+
+        Returns a table of Word Number, Similar Word and Similarity Score,
+        or None if is_cancelled returned True once the model was loaded.
+        Raises ValueError with a user-facing message if the model is
+        missing or the term is not in its vocabulary. With a timer, model
+        loading, the similarity search and building the table are timed.
+        """
+        model_type = self.model_type(term)
+        handle = self._acquire(model_type, collection, timer)
+        if handle is None:
+            raise ValueError(f"{model_type.title()}gram model not found or failed to load")
+        
+        # The handle keeps the model loaded even if the cache is cleared meanwhile
+        with handle as vectors:
+            if is_cancelled is not None and is_cancelled():
+                return None
+            
+            term_formatted = self.vocabulary_key(term)
+            if term_formatted not in vectors.key_to_index:
+                raise ValueError(f'Word "{term}" not found in vocabulary')
+            
+            with timed(timer, 'similar'):
+                similar_words = vectors.most_similar(term_formatted, topn=n_words)
+        
+        with timed(timer, 'table'):
+            return self._similar_frame(similar_words)
+    
+    def expand_batch(self, terms: List[str], n_words: Union[int, Sequence[int]] = DEFAULT_TOP_N,
+                     collection: Optional[str] = None) -> List[Union[pd.DataFrame, ValueError]]:
+        """Expand several terms at once, scoring each model's terms together
+
+        n_words is one count for all terms or a count per term. Returns,
+        per term, a table like expand or the ValueError explaining why it
+        could not be expanded.
+        """
+        counts = [n_words] * len(terms) if isinstance(n_words, int) else list(n_words)
+        results: List[Union[pd.DataFrame, ValueError, None]] = [None] * len(terms)
+        by_model: Dict[str, List[int]] = {}
+        for i, term in enumerate(terms):
+            by_model.setdefault(self.model_type(term), []).append(i)
+        
+        for model_type, indices in by_model.items():
+            handle = self._acquire(model_type, collection)
+            if handle is None:
+                for i in indices:
+                    results[i] = ValueError(f"{model_type.title()}gram model not found or failed to load")
+                continue
+            
+            with handle as vectors:
+                found = []
+                for i in indices:
+                    if self.vocabulary_key(terms[i]) in vectors.key_to_index:
+                        found.append(i)
+                    else:
+                        results[i] = ValueError(f'Word "{terms[i]}" not found in vocabulary')
+                if not found:
+                    continue
+                
+                keys = [self.vocabulary_key(terms[i]) for i in found]
+                topn = max(counts[i] for i in found)
+                if hasattr(vectors, 'most_similar_batch'):
+                    similar = vectors.most_similar_batch(keys, topn)
+                else:
+                    # gensim models score one key at a time
+                    similar = [vectors.most_similar(key, topn=topn) for key in keys]
+            
+            for i, similar_words in zip(found, similar):
+                results[i] = self._similar_frame(similar_words[:counts[i]])
+        return results
+    
+    def share(self, model_types: Sequence[str] = ('uni', 'bi'),
+              collection: Optional[str] = None) -> Dict[str, SharedVectors]:
+        """Write the available models for worker processes to attach to
+
+        Pass {model_type: shared.info} to init_worker_expander and close the
+        SharedVectors when the workers are done.
+        """
+        shared = {}
+        try:
+            for model_type in model_types:
+                handle = self._acquire(model_type, collection)
+                if handle is None:
+                    continue
+                with handle as vectors:
+                    shared[model_type] = SharedVectors(vectors)
+        except Exception:
+            for vectors in shared.values():
+                vectors.close()
+            raise
+        return shared
+    
+    @staticmethod
+    def vocabulary_key(term: str) -> str:
+        """Get the model vocabulary key of a term"""
+        return term.lower().replace(' ', '_')
+    
+    @staticmethod
+    def _similar_frame(similar_words: List[tuple]) -> pd.DataFrame:
+        """Build the result table from (word, score) pairs"""
+        df = pd.DataFrame(similar_words, columns=['Similar Word', 'Similarity Score'])
+        df['Similarity Score'] = df['Similarity Score'].round(3)
+        df.insert(0, 'Word Number', range(1, len(df) + 1))
+        
+        # Clean up word formatting (replace underscores with spaces)
+        df['Similar Word'] = df['Similar Word'].str.replace('_', ' ')
+        return df
+    
+    def expand_all(self, terms: Iterable[str], n_words: int = DEFAULT_TOP_N, collection: Optional[str] = None,
+                   on_skip: Optional[Callable[[str, str], None]] = None) -> pd.DataFrame:
+        """Expand several terms into one table with a Term column
+
+        Terms that can't be expanded are skipped; on_skip is called with
+        each skipped term and the reason, for the caller to report.
+        """
+        terms = list(terms)
+        frames = []
+        for term, result in zip(terms, self.expand_batch(terms, n_words, collection)):
+            if isinstance(result, ValueError):
+                if on_skip is not None:
+                    on_skip(term, str(result))
+                continue
+            result.insert(0, 'Term', term)
+            frames.append(result)
+        if not frames:
+            return pd.DataFrame(columns=['Term', 'Word Number', 'Similar Word', 'Similarity Score'])
+        return pd.concat(frames, ignore_index=True)
+
+# Expander of a process pool worker, set up by init_worker_expander
+_worker_expander: Optional[LexiconExpander] = None
+
+def init_worker_expander(shared: Dict[str, Dict[str, str]]):
+    """Process pool initializer: attach to models shared by LexiconExpander.share"""
+    global _worker_expander
+    _worker_expander = LexiconExpander(vectors={model_type: attach_vectors(info)
+                                                for model_type, info in shared.items()})
+
+def worker_expander() -> LexiconExpander:
+    """Get the expander set up by init_worker_expander in this process"""
+    if _worker_expander is None:
+        raise RuntimeError("Worker expander is not initialized")
+    return _worker_expander
\ No newline at end of file
@@ -4,27 +4,37 @@ Main application window with tabbed interface
 
 import sys
 import os
-from PyQt6.QtWidgets import (QMainWindow, QTabWidget, QVBoxLayout, 
+from PyQt6.QtWidgets import (QMainWindow, QTabWidget, QVBoxLayout,
                             QWidget, QMenuBar, QStatusBar, QMessageBox,
-                            QApplication)
+                            QApplication, QLabel)
 from PyQt6.QtCore import QTimer, pyqtSignal
 from PyQt6.QtGui import QAction, QFont
 
 from widgets.welcome_widget import WelcomeWidget
-from widgets.lexicon_widget import LexiconWidget
-from widgets.analysis_widget import AnalysisWidget
-from widgets.setup_widget import SetupWidget
 from utils.app_dirs import AppDirs
-from models.embedding_manager import EmbeddingManager
+from utils.job_scheduler import JobScheduler
+from utils.memory_sampler import memory_mode_requested, set_memory_mode
 from styles.modern_style import get_modern_stylesheet
 
+# Tabs whose modules import pandas, nltk and the embedding code; each is
+# built the first time it is selected
+DEFERRED_TABS = [(1, "Setup"), (2, "Lexicon"), (3, "Text Analysis")]
+
 class MainWindow(QMainWindow):
     """Main application window"""
     
+    tab_created = pyqtSignal(int)
+    
     def __init__(self):
         super().__init__()
         self.app_dirs = AppDirs()
-        self.embedding_manager = EmbeddingManager(self.app_dirs)
+        self.embedding_manager = None
+        # Jobs log their stage timings (and profiles, if requested) to the cache directory
+        self.job_scheduler = JobScheduler(parent=self, log_dir=self.app_dirs.user_cache_dir)
+        set_memory_mode(memory_mode_requested())
+        self.setup_tab = None
+        self.lexicon_tab = None
+        self.analysis_tab = None
         
         self.setup_ui()
         self.setup_menus()
@@ -51,25 +61,64 @@ class MainWindow(QMainWindow):
         self.tab_widget = QTabWidget()
         layout.addWidget(self.tab_widget)
         
-        # Create tabs
+        # Create tabs; the others are placeholders until create_tab builds them
         self.welcome_tab = WelcomeWidget()
-        self.setup_tab = SetupWidget(self.embedding_manager)
-        self.lexicon_tab = LexiconWidget(self.embedding_manager)
-        self.analysis_tab = AnalysisWidget(self.embedding_manager)
-        
-        # Add tabs to tab widget
         self.tab_widget.addTab(self.welcome_tab, "Welcome")
-        self.tab_widget.addTab(self.setup_tab, "Setup")
-        self.tab_widget.addTab(self.lexicon_tab, "Lexicon")
-        self.tab_widget.addTab(self.analysis_tab, "Text Analysis")
-        
-        # Connect setup completion signal
-        self.setup_tab.setup_completed.connect(self.on_setup_completed)
+        for index, title in DEFERRED_TABS:
+            self.tab_widget.addTab(QLabel("Loading..."), title)
         
         # Initially disable lexicon and analysis tabs
         self.tab_widget.setTabEnabled(2, False)  # Lexicon tab
         self.tab_widget.setTabEnabled(3, False)  # Analysis tab
     
+        self.tab_widget.currentChanged.connect(self.create_tab)
+    
+    def get_embedding_manager(self):
+        """Create the embedding manager on first use, with the saved memory limits"""
+        if self.embedding_manager is None:
+            from models.embedding_manager import EmbeddingManager
+            from utils.model_memory_settings import load_memory_limits
+            
+            self.embedding_manager = EmbeddingManager(self.app_dirs, **load_memory_limits())
+        return self.embedding_manager
+    
+    def create_tab(self, index: int):
+        """Import the modules of a deferred tab and swap it in for its placeholder"""
+        if index == 1 and self.setup_tab is None:
+            from widgets.setup_widget import SetupWidget
+            
+            self.setup_tab = SetupWidget(self.get_embedding_manager())
+            self.setup_tab.setup_completed.connect(self.on_setup_completed)
+            widget = self.setup_tab
+        elif index == 2 and self.lexicon_tab is None:
+            from widgets.lexicon_widget import LexiconWidget
+            
+            self.lexicon_tab = LexiconWidget(self.get_embedding_manager(), self.job_scheduler)
+            self.lexicon_tab.status_message.connect(self.status_bar.showMessage)
+            widget = self.lexicon_tab
+        elif index == 3 and self.analysis_tab is None:
+            from widgets.analysis_widget import AnalysisWidget
+            
+            self.analysis_tab = AnalysisWidget(self.get_embedding_manager(), self.job_scheduler)
+            self.analysis_tab.status_message.connect(self.status_bar.showMessage)
+            widget = self.analysis_tab
+        else:
+            return
+        
+        # Swap the placeholder, keeping the current tab and enabled state
+        current_index = self.tab_widget.currentIndex()
+        enabled = self.tab_widget.isTabEnabled(index)
+        placeholder = self.tab_widget.widget(index)
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, widget, dict(DEFERRED_TABS)[index])
+        self.tab_widget.setTabEnabled(index, enabled)
+        self.tab_widget.setCurrentIndex(current_index)
+        self.tab_widget.blockSignals(False)
+        placeholder.deleteLater()
+        
+        self.tab_created.emit(index)
+    
     def setup_menus(self):
         """Setup application menus"""
         menubar = self.menuBar()
@@ -99,6 +148,11 @@ class MainWindow(QMainWindow):
         redownload_action.triggered.connect(self.redownload_embeddings)
         tools_menu.addAction(redownload_action)
         
+        # Diagnostics action
+        diagnostics_action = QAction("&Diagnostics...", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        tools_menu.addAction(diagnostics_action)
+        
         # Help menu
         help_menu = menubar.addMenu("&Help")
         
@@ -112,10 +166,19 @@ class MainWindow(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready")
+        
+        # Background job summary
+        self.jobs_label = QLabel()
+        self.status_bar.addPermanentWidget(self.jobs_label)
+        self.job_scheduler.status_changed.connect(self.update_job_status)
+    
+    def update_job_status(self):
+        """Show running and queued background jobs"""
+        self.jobs_label.setText(self.job_scheduler.status_text())
     
     def check_embeddings_on_startup(self):
         """Check if embeddings are available on startup"""
-        if not self.embedding_manager.are_embeddings_available():
+        if not self.get_embedding_manager().are_embeddings_available():
             # Show setup tab if embeddings are not available
             self.tab_widget.setCurrentIndex(1)  # Setup tab
             self.status_bar.showMessage("Embeddings not found. Please download them in the Setup tab.")
@@ -143,8 +206,15 @@ class MainWindow(QMainWindow):
     def redownload_embeddings(self):
         """Handle re-download embeddings action"""
         self.tab_widget.setCurrentIndex(1)  # Switch to setup tab
+        self.create_tab(1)
         self.setup_tab.start_download(force=True)
     
+    def show_diagnostics(self):
+        """Show memory use and the stage timings of recent runs"""
+        from widgets.diagnostics_widget import DiagnosticsDialog
+        
+        DiagnosticsDialog(self.job_scheduler, self.get_embedding_manager(), self).exec()
+    
     def show_about(self):
         """Show about dialog"""
         QMessageBox.about(
@@ -175,6 +245,11 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            # Let running jobs stop at their next checkpoint
+            self.job_scheduler.cancel_all()
+            self.job_scheduler.wait_for_done(5000)
+            if self.analysis_tab is not None:
+                self.analysis_tab.shutdown()
             event.accept()
         else:
             event.ignore()
\ No newline at end of file
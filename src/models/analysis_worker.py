@@ -0,0 +1,294 @@
+"""
+Out-of-process analysis engine
+
+Tokenizing and matching are pure Python and hold the GIL, so running them
+on a QThread still makes the UI stutter. AnalysisWorker runs them in a
+long-lived subprocess that keeps the compiled lexicon warm and streams
+result batches back over a pipe; the calling thread only waits on the
+pipe, which releases the GIL.
+"""
+
+import itertools
+import multiprocessing
+import threading
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+import pandas as pd
+
+from models.text_processor import CompiledLexicon, TextProcessor
+from models.edgar_reader import is_edgar_submission
+from models.result_cache import hash_file, hash_text
+from models.token_store import TokenStore
+from utils.stage_timer import StageTimer, profiled, timed
+from utils.memory_sampler import measured, memory_mode, set_memory_mode
+
+# How often a waiting client checks for cancellation and worker exit, in seconds
+POLL_INTERVAL = 0.05
+
+# Seconds to wait for the worker to exit before terminating it
+STOP_TIMEOUT = 2.0
+
+# (result batch, sentences done, sentences total or 0 if unknown, percent)
+AnalysisUpdate = Tuple[pd.DataFrame, int, int, int]
+
+def iter_analysis(text_processor: TextProcessor, lexicon: Union[pd.DataFrame, CompiledLexicon],
+                  text: str = "", file_path: Optional[str] = None, encoding: Optional[str] = None,
+                  batch_size: int = 1000, timer: Optional[StageTimer] = None,
+                  token_store: Optional[TokenStore] = None,
+                  document_hash: Optional[str] = None) -> Iterator[AnalysisUpdate]:
+    """Analyze text, a text file or an EDGAR submission, yielding batches with progress
+
+    With a timer, each stage of the analysis is timed. With a token store,
+    a document tokenized before is matched from its stored word ids, and a
+    new one is stored once analyzed completely; pass document_hash if the
+    caller has already hashed the document.
+    """
+    token_key = None
+    if token_store is not None:
+        with timed(timer, 'token_read'):
+            if document_hash is None:
+                document_hash = hash_file(file_path) if file_path else hash_text(text)
+            token_key = TokenStore.key(document_hash, text_processor.splitter_fingerprint, encoding if file_path else None)
+            document = token_store.get(token_key)
+        if document is not None:
+            total = document.sentence_count()
+            done = 0
+            for batch in text_processor.iter_analyze_tokens(document, lexicon, batch_size, timer):
+                done += len(batch)
+                yield batch, done, total, int(done * 100 / total)
+            return
+    
+    bytes_percent = [0]
+    
+    def on_bytes_read(bytes_read: int, total_bytes: int):
+        bytes_percent[0] = int(bytes_read * 100 / total_bytes) if total_bytes else 0
+    
+    total = 0
+    if file_path and is_edgar_submission(file_path):
+        batches = text_processor.iter_analyze_submission(
+            file_path, lexicon, batch_size=batch_size, progress_callback=on_bytes_read, timer=timer
+        )
+    elif file_path:
+        batches = text_processor.iter_analyze_file(
+            file_path, lexicon, encoding, batch_size=batch_size, progress_callback=on_bytes_read, timer=timer
+        )
+    else:
+        if timer is not None:
+            timer.add_size('characters', len(text))
+        with timed(timer, 'tokenize'):
+            sentences = text_processor.tokenize_sentences(text)
+        total = len(sentences)
+        batches = text_processor.iter_analyze(sentences, lexicon, batch_size, timer)
+    
+    # The document is stored batch by batch, and only once analyzed completely
+    writer = token_store.writer(token_key) if token_key is not None else None
+    done = 0
+    try:
+        for batch in batches:
+            if writer is not None:
+                with timed(timer, 'token_write'):
+                    sentences = batch['Text'].tolist()
+                    writer.add(sentences, [text_processor.tokenize_words(s) for s in sentences], _batch_labels(batch))
+            done += len(batch)
+            percent = int(done * 100 / total) if total else bytes_percent[0]
+            yield batch, done, total, percent
+    
+        if writer is not None:
+            with timed(timer, 'token_write'):
+                writer.commit()
+    finally:
+        if writer is not None:
+            writer.discard()
+
+def _batch_labels(batch: pd.DataFrame) -> Dict:
+    """Get the Document and Sequence of a result batch of an EDGAR submission"""
+    labels = {column: batch[column].iloc[0] for column in ('Document', 'Sequence') if column in batch.columns}
+    return {column: value.item() if hasattr(value, 'item') else value for column, value in labels.items()}
+
+def _worker_main(conn):
+    """Worker process loop: keep the lexicon compiled and serve analysis requests"""
+    text_processor = TextProcessor()
+    compiled = text_processor.compile_lexicon(pd.DataFrame())
+    
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        
+        command = message[0]
+        if command == 'stop':
+            return
+        if command == 'lexicon':
+            compiled = text_processor.compile_lexicon(message[2])
+        elif command == 'analyze':
+            if not _serve_request(conn, text_processor, compiled, message[1], message[2]):
+                return
+        # A cancel arriving after its request finished needs no action
+
+def _serve_request(conn, text_processor: TextProcessor, compiled: CompiledLexicon,
+                   request_id: int, request: dict) -> bool:
+    """Stream the results of one request; returns False if the worker should exit
+
+    The done message carries the stage timings of the request, including
+    the memory used by this process if the client sampled memory.
+    """
+    timer = StageTimer()
+    profile_path = request.pop('profile_path', None)
+    set_memory_mode(request.pop('memory_mode', None))
+    token_dir = request.pop('token_dir', None)
+    token_store = TokenStore(token_dir) if token_dir else None
+    keep_running = True
+    try:
+        with profiled(profile_path), measured(timer, 'worker'):
+            for update in iter_analysis(text_processor, compiled, timer=timer, token_store=token_store, **request):
+                # Check for cancel or stop between batches
+                stopped = False
+                while conn.poll():
+                    message = conn.recv()
+                    if message[0] == 'stop':
+                        keep_running = False
+                        stopped = True
+                        break
+                    if message[0] == 'cancel' and message[1] == request_id:
+                        stopped = True
+                        break
+                if stopped:
+                    break
+                conn.send(('batch', request_id, update))
+        conn.send(('done', request_id, timer.state()))
+        return keep_running
+    except (EOFError, OSError):
+        return False
+    except Exception as e:
+        conn.send(('error', request_id, str(e)))
+    return True
+
+class AnalysisWorker:
+    """Client for a long-lived analysis subprocess
+
+    The process is started on first use and serves one request at a time;
+    concurrent callers queue on a lock.
+    """
+    
+    def __init__(self):
+        self._process = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._lexicon_version = None
+        self._request_ids = itertools.count(1)
+    
+    def is_running(self) -> bool:
+        """Check if the worker process is alive"""
+        return self._process is not None and self._process.is_alive()
+    
+    def start(self):
+        """Start the worker process ahead of use; does nothing while a request is in flight"""
+        if self._lock.acquire(blocking=False):
+            try:
+                self._start()
+            finally:
+                self._lock.release()
+    
+    def _start(self):
+        """Start the worker process if it is not running; the caller holds the lock"""
+        if self.is_running():
+            return
+        self._close()
+        
+        # Spawn rather than fork: the parent runs Qt threads
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_worker_main, args=(child_conn,),
+                                        name="MarkLex analysis worker", daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._lexicon_version = None
+    
+    def stop(self):
+        """Stop the worker process"""
+        with self._lock:
+            if self.is_running():
+                try:
+                    self._conn.send(('stop',))
+                except OSError:
+                    pass
+                self._process.join(STOP_TIMEOUT)
+                if self._process.is_alive():
+                    self._process.terminate()
+                    self._process.join()
+            self._close()
+    
+    def _close(self):
+        """Release the pipe and process handles"""
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._process = None
+        self._lexicon_version = None
+    
+    def iter_analysis(self, lexicon: pd.DataFrame, lexicon_version: str, text: str = "",
+                      file_path: Optional[str] = None, encoding: Optional[str] = None,
+                      batch_size: int = 1000,
+                      is_cancelled: Optional[Callable[[], bool]] = None,
+                      timer: Optional[StageTimer] = None,
+                      profile_path: Optional[str] = None,
+                      token_dir: Optional[str] = None,
+                      document_hash: Optional[str] = None) -> Iterator[AnalysisUpdate]:
+        """Analyze in the worker process, yielding batches with progress like iter_analysis
+
+        The lexicon is only sent when lexicon_version differs from the one
+        the worker already holds. Once is_cancelled returns True the worker
+        stops at its next batch and the iterator ends. The worker's stage
+        timings are added to timer, and with a profile_path the worker
+        writes a cProfile profile of the request there. With a token_dir the
+        worker keeps tokenized documents in a TokenStore there, keyed by
+        document_hash if given so the worker doesn't hash the document again.
+        """
+        with self._lock:
+            self._start()
+            finished = False
+            request_id = next(self._request_ids)
+            try:
+                if self._lexicon_version != lexicon_version:
+                    with timed(timer, 'send_lexicon'):
+                        self._conn.send(('lexicon', lexicon_version, lexicon))
+                    self._lexicon_version = lexicon_version
+                request = {'text': text, 'file_path': file_path, 'encoding': encoding, 'batch_size': batch_size,
+                           'profile_path': profile_path, 'memory_mode': memory_mode(), 'token_dir': token_dir,
+                           'document_hash': document_hash}
+                self._conn.send(('analyze', request_id, request))
+                
+                cancel_sent = False
+                while True:
+                    if not cancel_sent and is_cancelled is not None and is_cancelled():
+                        self._conn.send(('cancel', request_id))
+                        cancel_sent = True
+                    if not self._conn.poll(POLL_INTERVAL):
+                        if not self._process.is_alive():
+                            raise RuntimeError("Analysis worker exited unexpectedly")
+                        continue
+                    
+                    kind, reply_id, payload = self._conn.recv()
+                    if reply_id != request_id:
+                        continue
+                    if kind == 'done':
+                        finished = True
+                        if timer is not None and payload:
+                            timer.merge(payload)
+                        return
+                    if kind == 'error':
+                        finished = True
+                        raise RuntimeError(payload)
+                    if not cancel_sent:
+                        yield payload
+            except (EOFError, OSError) as e:
+                self._close()
+                raise RuntimeError(f"Analysis worker connection lost: {str(e)}")
+            finally:
+                # An abandoned request is cancelled so the worker is free for the next one
+                if not finished and self.is_running():
+                    try:
+                        self._conn.send(('cancel', request_id))
+                    except OSError:
+                        pass
\ No newline at end of file
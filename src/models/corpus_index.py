@@ -0,0 +1,319 @@
+"""
+Positional inverted index of an analyzed corpus
+
+Maps every cleaned word to postings of (sentence, position), so the
+corpus can be re-scored against a changed lexicon by intersecting
+posting lists instead of re-tokenizing it. A keyword of n words matches
+a sentence where its words' postings line up at consecutive positions,
+which is exactly how CompiledLexicon.match_words matches n-grams of the
+cleaned words.
+
+The index is a directory of immutable segments and a JSON manifest
+listing the documents of each. Adding documents writes a new segment; a
+source added again with other contents replaces its old documents,
+which stay on disk until the segments are compacted. Segment arrays are
+.npy files opened with mmap, so only the postings looked up are read.
+"""
+
+import array
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.result_cache import pack_strings, pack_utf8, unpack_strings, unpack_utf8
+from models.text_processor import ENGINE_VERSION, MAX_NGRAM, CompiledLexicon, TextProcessor
+
+INDEX_VERSION = 1
+MANIFEST_NAME = "index.json"
+
+# Columns of EDGAR submission results that tell their documents apart
+LABEL_COLUMNS = ('Document', 'Sequence')
+
+# Postings buffered before a segment is written
+SEGMENT_POSTINGS = 5_000_000
+
+# Segments are merged into one once there are more than this
+MAX_SEGMENTS = 16
+
+# Packs a sentence and a position into one sortable key
+POSITION_STRIDE = 1 << 32
+
+def _json_value(value):
+    """Convert a numpy scalar label to a plain Python value"""
+    return value.item() if isinstance(value, np.generic) else value
+
+class _Segment:
+    """Arrays of one written segment, opened with mmap"""
+    
+    def __init__(self, path: str):
+        load = lambda name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+        terms = unpack_strings(load('terms_text'), load('terms_offsets'))
+        self.term_ids = {term: index for index, term in enumerate(terms)}
+        self.term_starts = load('term_starts')
+        self.sentences = load('sentences')
+        self.positions = load('positions')
+        self.text = load('text')
+        self.text_offsets = load('text_offsets')
+        self.doc_starts = load('doc_starts')
+    
+    def document_range(self, index: int) -> range:
+        """Get the sentences of the segment's index-th document"""
+        return range(int(self.doc_starts[index]), int(self.doc_starts[index + 1]))
+    
+    def sentence_text(self, sentences: range) -> List[str]:
+        """Decode a range of sentences"""
+        return unpack_utf8(self.text, self.text_offsets, sentences.start, sentences.stop)
+    
+    def phrase_sentences(self, words: List[str]) -> np.ndarray:
+        """Get the sentences in which words occur at consecutive positions"""
+        keys = None
+        for offset, word in enumerate(words):
+            term_id = self.term_ids.get(word)
+            if term_id is None:
+                return np.empty(0, dtype=np.int64)
+            start, end = self.term_starts[term_id], self.term_starts[term_id + 1]
+            word_keys = (self.sentences[start:end].astype(np.int64) * POSITION_STRIDE
+                         + self.positions[start:end] - offset)
+            keys = word_keys if keys is None else np.intersect1d(keys, word_keys, assume_unique=True)
+            if not len(keys):
+                break
+        return np.unique(keys // POSITION_STRIDE)
+
+class _SegmentBuilder:
+    """Postings and sentences of documents not yet written"""
+    
+    def __init__(self):
+        self.documents: List[Dict] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.term_ids = array.array('i')
+        self.sentences = array.array('i')
+        self.positions = array.array('i')
+        self.text: List[str] = []
+        self.doc_starts = [0]
+    
+    def add(self, document: Dict, sentences: List[str], cleaned: List[List[str]]):
+        """Add a document's sentences and their cleaned words"""
+        vocabulary = self.vocabulary
+        sentence = len(self.text)
+        for words in cleaned:
+            for position, word in enumerate(words):
+                self.term_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+                self.sentences.append(sentence)
+                self.positions.append(position)
+            sentence += 1
+        self.text.extend(sentences)
+        self.doc_starts.append(len(self.text))
+        self.documents.append(document)
+    
+    def write(self, path: str):
+        """Write the segment arrays to a new directory"""
+        terms = sorted(self.vocabulary)
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[[self.vocabulary[term] for term in terms]] = np.arange(len(terms))
+        
+        # Postings were added in (sentence, position) order; a stable sort by term keeps it
+        term_ranks = rank[np.frombuffer(self.term_ids, dtype=np.int32)] if len(self.term_ids) else rank[:0]
+        order = np.argsort(term_ranks, kind='stable')
+        counts = np.bincount(term_ranks, minlength=len(terms))
+        terms_text, terms_offsets = pack_strings(terms)
+        text, text_offsets = pack_utf8(self.text)
+        
+        arrays = {
+            'terms_text': terms_text,
+            'terms_offsets': terms_offsets,
+            'term_starts': np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+            'sentences': np.frombuffer(self.sentences, dtype=np.int32)[order],
+            'positions': np.frombuffer(self.positions, dtype=np.int32)[order],
+            'text': text,
+            'text_offsets': text_offsets,
+            'doc_starts': np.array(self.doc_starts, dtype=np.int64),
+        }
+        os.makedirs(path)
+        for name, values in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), values)
+
+class CorpusIndex:
+    """Positional inverted index stored in a directory
+
+    Add analysis results with add() and call flush() (or use the index as
+    a context manager) to write them. One process at a time may write to
+    an index. Adding needs a TextProcessor to clean sentences; re-scoring
+    does not.
+    """
+    
+    def __init__(self, index_dir: str, text_processor: Optional[TextProcessor] = None):
+        self.index_dir = index_dir
+        self.text_processor = text_processor
+        self.manifest = self._load_manifest()
+        self._segments: Dict[str, _Segment] = {}
+        self._builder = _SegmentBuilder()
+    
+    def __enter__(self) -> 'CorpusIndex':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.flush()
+    
+    def _load_manifest(self) -> Dict:
+        path = os.path.join(self.index_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {'version': INDEX_VERSION, 'engine_version': ENGINE_VERSION, 'next_segment': 1, 'segments': []}
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != INDEX_VERSION or manifest.get('engine_version') != ENGINE_VERSION:
+            raise ValueError(f"Index {self.index_dir} was built by another version of MarkLex; rebuild it")
+        return manifest
+    
+    def _save_manifest(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.index_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_path, os.path.join(self.index_dir, MANIFEST_NAME))
+    
+    def _all_documents(self) -> Iterator[Dict]:
+        for segment in self.manifest['segments']:
+            yield from segment['documents']
+        yield from self._builder.documents
+    
+    def documents(self) -> List[Dict]:
+        """Get the indexed documents: source, hash, labels and sentence count"""
+        return [document for document in self._all_documents() if not document['deleted']]
+    
+    def contains(self, source: str, document_hash: str) -> bool:
+        """Check if a source is indexed with these contents"""
+        return any(document['source'] == source and document['hash'] == document_hash
+                   for document in self.documents())
+    
+    def add(self, source: str, document_hash: str, results: pd.DataFrame) -> bool:
+        """Index the sentences of a source's analysis results
+
+        EDGAR submission results are split into their documents. A source
+        indexed with other contents is replaced. Returns False if the
+        source is already indexed with these contents.
+        """
+        if self.contains(source, document_hash):
+            return False
+        for document in self._all_documents():
+            if document['source'] == source:
+                document['deleted'] = True
+        if self.text_processor is None:
+            self.text_processor = TextProcessor()
+        
+        label_columns = [column for column in LABEL_COLUMNS if column in results.columns]
+        texts = results['Text'].tolist()
+        if label_columns:
+            # Documents of a submission come one after another
+            labels = list(zip(*(results[column].tolist() for column in label_columns)))
+            starts = [0] + [i for i in range(1, len(labels)) if labels[i] != labels[i - 1]]
+        else:
+            labels = [()] * len(texts)
+            starts = [0] if texts else []
+        
+        for start, end in zip(starts, starts[1:] + [len(texts)]):
+            sentences = texts[start:end]
+            document = {
+                'source': source,
+                'hash': document_hash,
+                'labels': {column: _json_value(value) for column, value in zip(label_columns, labels[start])},
+                'sentences': len(sentences),
+                'deleted': False,
+            }
+            self._builder.add(document, sentences, [self.text_processor.clean_words(s) for s in sentences])
+        
+        if len(self._builder.sentences) >= SEGMENT_POSTINGS:
+            self.flush()
+        return True
+    
+    def flush(self):
+        """Write documents added since the last flush as a new segment"""
+        if self._builder.documents:
+            self.manifest['segments'].append(self._write_segment(self._builder))
+            self._builder = _SegmentBuilder()
+        self._save_manifest()
+        self._remove_unused_segments()
+        
+        if len(self.manifest['segments']) > MAX_SEGMENTS:
+            self.compact()
+    
+    def compact(self):
+        """Merge all written segments into one, dropping replaced documents"""
+        if self.text_processor is None:
+            self.text_processor = TextProcessor()
+        
+        builder = _SegmentBuilder()
+        for entry in self.manifest['segments']:
+            segment = self._segment(entry['name'])
+            for index, document in enumerate(entry['documents']):
+                if not document['deleted']:
+                    sentences = segment.sentence_text(segment.document_range(index))
+                    builder.add(document, sentences, [self.text_processor.clean_words(s) for s in sentences])
+        
+        self.manifest['segments'] = [self._write_segment(builder)] if builder.documents else []
+        self._save_manifest()
+        self._remove_unused_segments()
+    
+    def _write_segment(self, builder: _SegmentBuilder) -> Dict:
+        """Write a builder as the next segment; returns its manifest entry"""
+        name = f"segment-{self.manifest['next_segment']:06d}"
+        path = os.path.join(self.index_dir, name)
+        # Left over if writing the manifest failed last time
+        shutil.rmtree(path, ignore_errors=True)
+        builder.write(path)
+        self.manifest['next_segment'] += 1
+        return {'name': name, 'documents': builder.documents}
+    
+    def _remove_unused_segments(self):
+        """Delete segment directories the manifest no longer lists"""
+        used = {segment['name'] for segment in self.manifest['segments']}
+        for name in list(self._segments):
+            if name not in used:
+                del self._segments[name]
+        for name in os.listdir(self.index_dir):
+            if name.startswith('segment-') and name not in used:
+                shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+    
+    def _segment(self, name: str) -> _Segment:
+        if name not in self._segments:
+            self._segments[name] = _Segment(os.path.join(self.index_dir, name))
+        return self._segments[name]
+    
+    def label_columns(self) -> List[str]:
+        """Get the label columns of the indexed documents"""
+        present = {column for document in self.documents() for column in document['labels']}
+        return [column for column in LABEL_COLUMNS if column in present]
+    
+    def rescore(self, lexicon: pd.DataFrame) -> Iterator[pd.DataFrame]:
+        """Match the indexed sentences against a lexicon, yielding one table per document
+
+        Tables have Source, any label columns, Text and a 0/1 column per
+        entity, like the results of analyzing the documents again.
+        """
+        compiled = CompiledLexicon(lexicon)
+        keywords = [(keyword.split(' '), entities) for keyword, entities in compiled.keyword_entities.items()
+                    if len(keyword.split(' ')) <= MAX_NGRAM]
+        columns = ['Source'] + self.label_columns() + ['Text'] + compiled.entities
+        
+        for segment_entry in self.manifest['segments']:
+            if all(document['deleted'] for document in segment_entry['documents']):
+                continue
+            segment = self._segment(segment_entry['name'])
+            flags = np.zeros((int(segment.doc_starts[-1]), len(compiled.entities)), dtype=np.int64)
+            for words, entities in keywords:
+                hits = segment.phrase_sentences(words)
+                for entity in entities:
+                    flags[hits, entity] = 1
+            
+            for index, document in enumerate(segment_entry['documents']):
+                if document['deleted'] or not document['sentences']:
+                    continue
+                sentences = segment.document_range(index)
+                table = {'Source': document['source'], **document['labels'], 'Text': segment.sentence_text(sentences)}
+                for entity_index, entity in enumerate(compiled.entities):
+                    table[entity] = flags[sentences.start:sentences.stop, entity_index]
+                yield pd.DataFrame(table).reindex(columns=columns, fill_value='')
\ No newline at end of file
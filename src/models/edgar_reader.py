@@ -0,0 +1,236 @@
+"""
+Lazy reader for EDGAR full-text submission files
+
+A submission (.txt) bundles many <DOCUMENT> blocks: the filing body,
+exhibits, XBRL and uuencoded graphics. The reader walks the file line by
+line, yields one document at a time, skips encoded binaries without
+decoding them and strips HTML to text incrementally.
+"""
+
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from models.text_reader import detect_encoding
+
+# Document types and file extensions that never contain prose
+BINARY_TYPES = {'GRAPHIC', 'ZIP', 'EXCEL', 'PDF', 'JSON', 'XML'}
+BINARY_EXTENSIONS = ('.jpg', '.jpeg', '.gif', '.png', '.pdf', '.zip', '.xls', '.xlsx', '.json')
+XBRL_EXTENSIONS = ('.xml', '.xsd')
+
+UUENCODE_RE = re.compile(rb'^begin [0-7]{3} ')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Extracted text is buffered to roughly this size before being yielded
+TEXT_CHUNK_CHARS = 64 * 1024
+
+def is_edgar_submission(path: str) -> bool:
+    """Check if a file looks like an EDGAR full-text submission"""
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+    return b'<SEC-DOCUMENT>' in head or b'<SEC-HEADER>' in head or b'<DOCUMENT>' in head
+
+class HTMLTextExtractor(HTMLParser):
+    """Incremental HTML to text converter"""
+    
+    BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+                  'title', 'center', 'pre', 'blockquote', 'hr'}
+    CELL_TAGS = {'td', 'th'}
+    SKIP_TAGS = {'script', 'style', 'head', 'ix:header'}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append('\n')
+        elif tag in self.CELL_TAGS:
+            self._parts.append(' ')
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append('\n')
+    
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(WHITESPACE_RE.sub(' ', data))
+    
+    def pop_text(self) -> str:
+        """Get text extracted since the last call"""
+        text = ''.join(self._parts)
+        self._parts = []
+        return text
+
+class EdgarDocument:
+    """One <DOCUMENT> block of a submission
+
+    The text is read lazily from the underlying file; iterate it before
+    advancing the reader, otherwise the remaining lines are skipped.
+    """
+    
+    def __init__(self, lines: Iterator[bytes], encoding: str, doc_type: str,
+                 sequence: Optional[int], filename: str, description: str):
+        self._lines = lines
+        self._encoding = encoding
+        self._consumed = False
+        self.doc_type = doc_type
+        self.sequence = sequence
+        self.filename = filename
+        self.description = description
+    
+    @property
+    def is_binary(self) -> bool:
+        """Check if the document type or file name marks it as binary"""
+        return (self.doc_type in BINARY_TYPES or
+                self.filename.lower().endswith(BINARY_EXTENSIONS))
+    
+    @property
+    def is_xbrl(self) -> bool:
+        """Check if the document is an XBRL instance, schema or linkbase"""
+        return (self.doc_type.startswith('EX-101') or
+                self.filename.lower().endswith(XBRL_EXTENSIONS))
+    
+    def _raw_lines(self) -> Iterator[bytes]:
+        """Yield the lines inside <TEXT> and leave the reader after </DOCUMENT>"""
+        if self._consumed:
+            return
+        self._consumed = True
+        for line in self._lines:
+            if line.startswith(b'</TEXT>'):
+                break
+            if line.startswith(b'</DOCUMENT>'):
+                return
+            yield line
+        for line in self._lines:
+            if line.startswith(b'</DOCUMENT>'):
+                return
+    
+    def skip(self):
+        """Advance past the document without decoding it"""
+        for _ in self._raw_lines():
+            pass
+    
+    def iter_text(self) -> Iterator[str]:
+        """Yield the document text in chunks, with HTML stripped"""
+        decoder = codecs.getincrementaldecoder(self._encoding)(errors='replace')
+        extractor = None
+        buffer = []
+        buffered = 0
+        started = False
+        
+        lines = self._raw_lines()
+        for line in lines:
+            if not started:
+                stripped = line.strip()
+                if not stripped:
+                    continue
+                started = True
+                # Encoded attachments can hide behind any document type
+                if UUENCODE_RE.match(stripped) or stripped.startswith(b'<PDF>'):
+                    for _ in lines:
+                        pass
+                    return
+                head = stripped[:64].lower()
+                if (self.filename.lower().endswith(('.htm', '.html')) or
+                        head.startswith((b'<html', b'<!doctype', b'<xbrl>', b'<?xml'))):
+                    extractor = HTMLTextExtractor()
+            
+            text = decoder.decode(line)
+            if extractor is not None:
+                extractor.feed(text)
+                text = extractor.pop_text()
+            if text:
+                buffer.append(text)
+                buffered += len(text)
+                if buffered >= TEXT_CHUNK_CHARS:
+                    yield ''.join(buffer)
+                    buffer = []
+                    buffered = 0
+        
+        text = decoder.decode(b'', final=True)
+        if extractor is not None:
+            extractor.feed(text)
+            extractor.close()
+            text = extractor.pop_text()
+        if text:
+            buffer.append(text)
+        if buffer:
+            yield ''.join(buffer)
+    
+    def read_text(self) -> str:
+        """Read the whole document text"""
+        return ''.join(self.iter_text())
+
+def iter_documents(path: str, document_types: Optional[Iterable[str]] = None,
+                   include_binary: bool = False, include_xbrl: bool = False,
+                   encoding: Optional[str] = None,
+                   progress_callback: Optional[Callable[[int, int], None]] = None) -> Iterator[EdgarDocument]:
+    """Lazily yield the documents of an EDGAR submission file
+
+    Args:
+        path: Submission .txt file
+        document_types: Only yield these types (e.g. {'10-K', 'EX-13'}); None yields all
+        include_binary: Also yield graphics, PDFs and other encoded attachments
+        include_xbrl: Also yield XBRL instance and schema documents
+        encoding: Text encoding, detected from the file when None
+        progress_callback: Receives (bytes read, file size) at each document start
+    """
+    if encoding is None:
+        encoding = detect_encoding(path)
+    wanted = {t.upper() for t in document_types} if document_types is not None else None
+    total_bytes = os.path.getsize(path)
+    
+    with open(path, 'rb') as f:
+        lines = iter(f)
+        for line in lines:
+            if not line.startswith(b'<DOCUMENT>'):
+                continue
+            
+            if progress_callback is not None:
+                progress_callback(f.tell(), total_bytes)
+            header = _read_document_header(lines, encoding)
+            document = EdgarDocument(lines, encoding, **header)
+            
+            skip = ((wanted is not None and document.doc_type not in wanted) or
+                    (document.is_binary and not include_binary) or
+                    (document.is_xbrl and not include_xbrl))
+            if not skip:
+                yield document
+            document.skip()
+
+def _read_document_header(lines: Iterator[bytes], encoding: str) -> dict:
+    """Read the tagged header lines of a document up to <TEXT>"""
+    header = {'doc_type': '', 'sequence': None, 'filename': '', 'description': ''}
+    fields = {b'<TYPE>': 'doc_type', b'<SEQUENCE>': 'sequence',
+              b'<FILENAME>': 'filename', b'<DESCRIPTION>': 'description'}
+    
+    for line in lines:
+        if line.startswith(b'<TEXT>'):
+            break
+        for tag, field in fields.items():
+            if line.startswith(tag):
+                header[field] = line[len(tag):].strip().decode(encoding, errors='replace')
+                break
+    
+    header['doc_type'] = header['doc_type'].upper()
+    try:
+        header['sequence'] = int(header['sequence'])
+    except (TypeError, ValueError):
+        header['sequence'] = None
+    return header
+
+def list_documents(path: str) -> List[dict]:
+    """List document metadata of a submission without extracting any text"""
+    return [
+        {'type': doc.doc_type, 'sequence': doc.sequence,
+         'filename': doc.filename, 'description': doc.description}
+        for doc in iter_documents(path, include_binary=True, include_xbrl=True)
+    ]
\ No newline at end of file
@@ -1,253 +1,408 @@
 """
-Embedding model manager for downloading and loading Word2Vec models
+Embedding model manager for loading Word2Vec models
+
+Qt-free, so it can be used outside the GUI; see core.LexiconExpander.
 """
 
 import os
-import shutil
-import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Callable
-import zipfile
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
 
-import requests
-from tqdm import tqdm
-from PyQt6.QtCore import QThread, pyqtSignal, QObject
-from gensim.models import Word2Vec
+import numpy as np
 
 from utils.app_dirs import AppDirs
+from models.model_registry import ModelRegistry, ModelSpec
+from models.native_vectors import NativeVectors, convert_keyed_vectors, is_native_current
+from utils.stage_timer import StageTimer, timed
+from utils.memory_sampler import measured
+
+# gensim (which pulls in scipy) is slow to import, so it is loaded on first use
+if TYPE_CHECKING:
+    from gensim.models import KeyedVectors
+
+# Unused models are unloaded after this many seconds; native models reload from a memory map
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+
+# Approximate bytes per vocabulary word: list slot and str object, plus a dict entry for lookups
+VOCAB_WORD_BYTES = 70
+VOCAB_INDEX_BYTES = 100
+
+# Either NativeVectors or gensim KeyedVectors; both expose key_to_index and most_similar
+KeyedVectorsLike = Union[NativeVectors, 'KeyedVectors']
+
+def estimate_model_bytes(vectors: KeyedVectorsLike) -> int:
+    """Estimate the memory held by loaded word vectors
 
-class DownloadThread(QThread):
-    """Thread for downloading embeddings from GitHub"""
+    Memory-mapped arrays are counted at full size, although the OS only
+    keeps the pages that were read resident.
+    """
+    total = 0
+    for name in ('vectors', 'norms', '_safe_norms'):
+        array = getattr(vectors, name, None)
+        if isinstance(array, np.ndarray):
+            total += array.nbytes
     
-    progress_updated = pyqtSignal(int)  # Progress percentage
-    status_updated = pyqtSignal(str)    # Status message
-    download_completed = pyqtSignal(bool)  # Success/failure
+    words = len(vectors.index_to_key)
+    total += words * VOCAB_WORD_BYTES
+    # NativeVectors builds its lookup on first use; gensim always has one
+    if getattr(vectors, '_key_to_index', True) is not None:
+        total += words * VOCAB_INDEX_BYTES
+    return total
+
+class _LoadedModel:
+    """A loaded model, the number of handles using it and when it was last used"""
     
-    def __init__(self, app_dirs: AppDirs, force: bool = False):
-        super().__init__()
-        self.app_dirs = app_dirs
-        self.force = force
-        self.repo_url = "https://github.com/sec-edgar-warranty/MarkLex"
-        
-    def run(self):
-        """Run download in separate thread"""
-        try:
-            self.status_updated.emit("Starting download...")
-            
-            # Since files are stored in Git LFS, we need to download them directly from GitHub's raw API
-            # The files in the zip archive are just LFS pointer files
-            
-            embeddings_dest = self.app_dirs.embeddings_dir
-            os.makedirs(embeddings_dest, exist_ok=True)
-            
-            # Define files to download with their raw URLs
-            embedding_files = [
-                "embeddings_8",
-                "embeddings_8.trainables.syn1neg.npy", 
-                "embeddings_8.wv.vectors.npy",
-                "embeddings_bi_grams"
-            ]
-            
-            files_downloaded = 0
-            total_files = len(embedding_files)
-            
-            for i, file_name in enumerate(embedding_files):
-                try:
-                    self.status_updated.emit(f"Downloading {file_name}... ({i+1}/{total_files})")
-                    
-                    # Use GitHub's raw content API
-                    file_url = f"{self.repo_url}/raw/main/{file_name}"
-                    dest_path = os.path.join(embeddings_dest, file_name)
-                    
-                    # Download the file
-                    self._download_file_direct(file_url, dest_path)
-                    
-                    # Check if file was downloaded successfully
-                    if os.path.exists(dest_path) and os.path.getsize(dest_path) > 1000:  # Should be much larger than 1KB
-                        size_mb = os.path.getsize(dest_path) / (1024 * 1024)
-                        files_downloaded += 1
-                        self.status_updated.emit(f"✅ Downloaded {file_name} ({size_mb:.1f} MB)")
-                    else:
-                        self.status_updated.emit(f"❌ Failed to download {file_name} - file too small or missing")
-                        # Remove empty file if it exists
-                        if os.path.exists(dest_path):
-                            os.remove(dest_path)
-                    
-                    # Update progress
-                    progress = int(((i + 1) / total_files) * 80)  # Use 80% for downloads
-                    self.progress_updated.emit(progress)
-                    
-                except Exception as e:
-                    self.status_updated.emit(f"❌ Error downloading {file_name}: {str(e)}")
-            
-            # Also download lexicon file
-            try:
-                self.status_updated.emit("Downloading lexicon file...")
-                lexicon_url = f"{self.repo_url}/raw/main/Lexicon List.xlsx"
-                lexicon_dest = os.path.join(self.app_dirs.user_data_dir, "Lexicon List.xlsx")
-                
-                self._download_file_direct(lexicon_url, lexicon_dest)
-                
-                if os.path.exists(lexicon_dest) and os.path.getsize(lexicon_dest) > 1000:
-                    self.status_updated.emit("✅ Downloaded lexicon file")
-                else:
-                    self.status_updated.emit("⚠️ Lexicon file download failed, using default")
-            except:
-                self.status_updated.emit("⚠️ Lexicon file download failed, using default")
-            
-            self.progress_updated.emit(100)
-            
-            if files_downloaded > 0:
-                self.status_updated.emit(f"✅ Successfully downloaded {files_downloaded}/{total_files} embedding files")
-                self.download_completed.emit(True)
-            else:
-                self.status_updated.emit("❌ No embedding files were downloaded successfully")
-                self.download_completed.emit(False)
-                    
-        except Exception as e:
-            self.status_updated.emit(f"Download failed: {str(e)}")
-            self.download_completed.emit(False)
+    def __init__(self, spec: ModelSpec, vectors: KeyedVectorsLike):
+        self.spec = spec
+        self.vectors = vectors
+        self.refs = 0
+        self.size = estimate_model_bytes(vectors)
+        self.last_used = time.monotonic()
+        self.load_seconds: Optional[float] = None
+        self.load_memory: Optional[Dict[str, int]] = None  # Measured if memory sampling was on
+
+class ModelHandle:
+    """Reference to loaded word vectors that keeps them alive until released
+
+    Use as a context manager, which yields the vectors:
+
+        with embedding_manager.acquire_model('uni') as vectors:
+            vectors.most_similar(...)
+    """
     
-    def _download_file_direct(self, url: str, dest_path: str):
-        """Download file directly with progress tracking"""
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        
-        with open(dest_path, 'wb') as f:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    # We don't emit progress here since we're doing it per file in the main loop
-    
-    def _download_file(self, url: str, dest_path: str):
-        """Download file with progress tracking (legacy method)"""
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        
-        with open(dest_path, 'wb') as f:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        progress = int((downloaded / total_size) * 40)  # Use 40% for download
-                        self.progress_updated.emit(progress)
-
-class EmbeddingManager(QObject):
-    """Manager for embedding models with download capabilities"""
-    
-    def __init__(self, app_dirs: AppDirs):
-        super().__init__()
+    def __init__(self, manager: 'EmbeddingManager', entry: _LoadedModel):
+        self._manager = manager
+        self._entry = entry
+    
+    @property
+    def vectors(self) -> KeyedVectorsLike:
+        """The word vectors; only valid until the handle is released"""
+        if self._entry is None:
+            raise RuntimeError("Model handle was released")
+        return self._entry.vectors
+    
+    def release(self):
+        """Give up the reference; calling it again does nothing"""
+        if self._entry is not None:
+            self._manager._release(self._entry)
+            self._entry = None
+    
+    def __enter__(self) -> KeyedVectorsLike:
+        return self.vectors
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+class EmbeddingManager:
+    """Manager for embedding models
+
+    Models are loaded once and shared between threads. Concurrent requests
+    for a model that is loading wait for that load instead of starting
+    their own, and clear_cache only drops the cache's reference, so queries
+    holding a ModelHandle keep using the model they started with.
+    
+    Models nobody holds a handle to are unloaded after idle_timeout seconds
+    (None keeps them), and least recently used ones are unloaded to stay
+    within memory_budget bytes (None for no limit). Both are reloaded on
+    the next acquire.
+    
+    Which models exist comes from the ModelRegistry. Each is cached under
+    its model id and only loaded when a query asks for it.
+    """
+    
+    def __init__(self, app_dirs: AppDirs, memory_budget: Optional[int] = None,
+                 idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT):
         self.app_dirs = app_dirs
-        self._uni_model = None
-        self._bi_model = None
+        self.registry = ModelRegistry(app_dirs.embeddings_dir)
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+        self._models: Dict[str, _LoadedModel] = {}
+        self._loading = set()     # Model ids being loaded
+        self._failures: Dict[str, int] = {}  # Failed loads per model id
+        self._generation = 0      # Bumped by clear_cache so in-flight loads are discarded
+        self._sizes: Dict[str, int] = {}  # Size of each model when last loaded
+        self._idle_timer = None
+        self._condition = threading.Condition()
     
-    def are_embeddings_available(self) -> bool:
-        """Check if embedding files are available"""
-        embeddings_dir = Path(self.app_dirs.embeddings_dir)
-        
-        required_files = [
-            "embeddings_8",
-            "embeddings_bi_grams"
-        ]
-        
-        return all((embeddings_dir / file).exists() for file in required_files)
+    def are_embeddings_available(self, collection: Optional[str] = None) -> bool:
+        """Check if the models of a collection (default if None) are available"""
+        return all(self.registry.is_installed(spec) for spec in self.registry.collection_models(collection))
     
-    def get_missing_files(self) -> list:
-        """Get list of missing embedding files"""
+    def get_missing_files(self, collection: Optional[str] = None) -> list:
+        """Get list of missing embedding files of a collection (default if None)"""
         embeddings_dir = Path(self.app_dirs.embeddings_dir)
         
-        required_files = [
-            "embeddings_8",
-            "embeddings_8.trainables.syn1neg.npy", 
-            "embeddings_8.wv.vectors.npy",
-            "embeddings_bi_grams"
-        ]
-        
         missing = []
-        for file in required_files:
-            if not (embeddings_dir / file).exists():
-                missing.append(file)
-                
+        for spec in self.registry.collection_models(collection):
+            for file in spec.files:
+                if not (embeddings_dir / file).exists():
+                    missing.append(file)
+        
         return missing
     
-    def create_download_thread(self, force: bool = False) -> DownloadThread:
-        """Create a download thread for embeddings"""
-        return DownloadThread(self.app_dirs, force)
-    
     def get_embeddings_status(self) -> dict:
-        """Get detailed status of embedding files"""
+        """Get detailed status of the files of every registered model"""
         embeddings_dir = Path(self.app_dirs.embeddings_dir)
-        required_files = [
-            "embeddings_8",
-            "embeddings_8.trainables.syn1neg.npy", 
-            "embeddings_8.wv.vectors.npy",
-            "embeddings_bi_grams"
-        ]
         
         status = {}
-        for file in required_files:
-            file_path = embeddings_dir / file
-            if file_path.exists():
-                status[file] = {
-                    'exists': True,
-                    'size': file_path.stat().st_size,
-                    'path': str(file_path)
-                }
-            else:
-                status[file] = {
-                    'exists': False,
-                    'size': 0,
-                    'path': str(file_path)
-                }
+        for spec in self.registry.models():
+            for file in spec.files:
+                file_path = embeddings_dir / file
+                if file_path.exists():
+                    status[file] = {
+                        'exists': True,
+                        'size': file_path.stat().st_size,
+                        'path': str(file_path)
+                    }
+                    if file == spec.file:
+                        status[file]['native'] = is_native_current(str(file_path))
+                else:
+                    status[file] = {
+                        'exists': False,
+                        'size': 0,
+                        'path': str(file_path)
+                    }
         
         return status
     
-    def load_unigram_model(self) -> Optional[Word2Vec]:
-        """Load unigram Word2Vec model"""
-        if self._uni_model is None:
-            model_path = os.path.join(self.app_dirs.embeddings_dir, "embeddings_8")
-            if os.path.exists(model_path):
-                try:
-                    self._uni_model = Word2Vec.load(model_path)
-                except Exception as e:
-                    print(f"Error loading unigram model: {e}")
-                    return None
-            else:
-                return None
-        return self._uni_model
-    
-    def load_bigram_model(self) -> Optional[Word2Vec]:
-        """Load bigram Word2Vec model"""
-        if self._bi_model is None:
-            model_path = os.path.join(self.app_dirs.embeddings_dir, "embeddings_bi_grams")
-            if os.path.exists(model_path):
-                try:
-                    self._bi_model = Word2Vec.load(model_path)
-                except Exception as e:
-                    print(f"Error loading bigram model: {e}")
+    def _load_vectors(self, file_name: str, label: str):
+        """Load word vectors, preferring the native format over gensim"""
+        model_path = os.path.join(self.app_dirs.embeddings_dir, file_name)
+        
+        if is_native_current(model_path):
+            try:
+                return NativeVectors.load(model_path)
+            except Exception as e:
+                print(f"Error loading native {label} vectors, falling back to gensim: {e}")
+        
+        if not os.path.exists(model_path):
+            return None
+        
+        try:
+            from gensim.models import Word2Vec
+            model = Word2Vec.load(model_path)
+        except Exception as e:
+            print(f"Error loading {label} model: {e}")
+            return None
+        
+        # Convert now so the next start can use the native format
+        try:
+            convert_keyed_vectors(model.wv, model_path)
+        except Exception as e:
+            print(f"Error converting {label} model to native format: {e}")
+        
+        return model.wv
+    
+    def acquire_model(self, model_type: str, collection: Optional[str] = None,
+                      timer: Optional[StageTimer] = None) -> Optional[ModelHandle]:
+        """Get a handle to word vectors by type ('uni' or 'bi') from a collection
+        (default if None), loading them if needed
+
+        Returns None if the collection has no such model or it failed to
+        load. Release the handle when done with the vectors. Time spent
+        loading, or waiting for another thread's load, is added to timer
+        as the model_load stage, as is the memory used by a load if memory
+        sampling is on.
+        """
+        spec = self.registry.resolve(model_type, collection)
+        if spec is None:
+            return None
+        model_id = spec.model_id
+        
+        with self._condition:
+            while True:
+                entry = self._models.get(model_id)
+                if entry is not None:
+                    entry.refs += 1
+                    entry.last_used = time.monotonic()
+                    return ModelHandle(self, entry)
+                if model_id not in self._loading:
+                    break
+                # Another thread is loading this model; share its result
+                failures = self._failures.get(model_id, 0)
+                with timed(timer, 'model_load'):
+                    self._condition.wait()
+                if self._failures.get(model_id, 0) != failures:
+                    # That load failed; don't retry it once per waiter
                     return None
-            else:
-                return None
-        return self._bi_model
-    
-    def get_model(self, model_type: str) -> Optional[Word2Vec]:
-        """Get model by type ('uni' or 'bi')"""
-        if model_type == 'uni':
-            return self.load_unigram_model()
-        elif model_type == 'bi':
-            return self.load_bigram_model()
-        else:
+            self._loading.add(model_id)
+            generation = self._generation
+            # Make room before loading, so the old and new models are never resident together
+            self._enforce_budget(self._sizes.get(model_id, 0))
+        
+        vectors = None
+        load_seconds = None
+        load_memory = None
+        try:
+            while True:
+                start = time.perf_counter()
+                with timed(timer, 'model_load'), measured(timer, 'model_load') as sampler:
+                    vectors = self._load_vectors(spec.file, spec.name)
+                load_seconds = time.perf_counter() - start
+                load_memory = sampler.usage if sampler is not None else None
+                with self._condition:
+                    if generation == self._generation or vectors is None:
+                        break
+                    # The cache was cleared while loading, e.g. after a download
+                    generation = self._generation
+        finally:
+            with self._condition:
+                self._loading.discard(model_id)
+                handle = None
+                if vectors is not None:
+                    entry = self._models[model_id] = _LoadedModel(spec, vectors)
+                    entry.load_seconds = load_seconds
+                    entry.load_memory = load_memory
+                    entry.refs += 1
+                    self._sizes[model_id] = entry.size
+                    self._enforce_budget()
+                    handle = ModelHandle(self, entry)
+                else:
+                    self._failures[model_id] = self._failures.get(model_id, 0) + 1
+                self._condition.notify_all()
+        return handle
+    
+    def _release(self, entry: _LoadedModel):
+        """Drop a handle's reference to a loaded model"""
+        with self._condition:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            if entry.refs == 0:
+                # It may have been kept over budget while in use
+                self._enforce_budget()
+                self._schedule_idle_check()
+    
+    def _evict(self, model_id: str):
+        """Drop the cache's reference to a model; the caller holds the lock"""
+        self._models.pop(model_id, None)
+    
+    def _enforce_budget(self, extra: int = 0):
+        """Unload least recently used idle models until the cache plus extra
+        bytes fits the budget; the caller holds the lock
+
+        Models in use are never unloaded, so the budget can be exceeded
+        while they are.
+        """
+        if self.memory_budget is None:
+            return
+        idle = sorted((entry.last_used, model_id) for model_id, entry in self._models.items()
+                      if entry.refs == 0)
+        total = sum(entry.size for entry in self._models.values()) + extra
+        for _, model_id in idle:
+            if total <= self.memory_budget:
+                break
+            total -= self._models[model_id].size
+            self._evict(model_id)
+    
+    def _schedule_idle_check(self):
+        """Run evict_idle when the next idle model times out; the caller holds the lock"""
+        if self.idle_timeout is None or self._idle_timer is not None:
+            return
+        idle = [entry.last_used for entry in self._models.values() if entry.refs == 0]
+        if not idle:
+            return
+        delay = max(0.0, min(idle) + self.idle_timeout - time.monotonic())
+        self._idle_timer = threading.Timer(delay + 1.0, self._on_idle_timer)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+    
+    def _on_idle_timer(self):
+        """Evict timed out models, then wait for the next one"""
+        with self._condition:
+            self._idle_timer = None
+        self.evict_idle()
+        with self._condition:
+            self._schedule_idle_check()
+    
+    def evict_idle(self) -> List[str]:
+        """Unload models that have not been used for idle_timeout seconds
+
+        Returns the evicted model ids.
+        """
+        with self._condition:
+            if self.idle_timeout is None:
+                return []
+            cutoff = time.monotonic() - self.idle_timeout
+            expired = [model_id for model_id, entry in self._models.items()
+                       if entry.refs == 0 and entry.last_used <= cutoff]
+            for model_id in expired:
+                self._evict(model_id)
+            return expired
+    
+    def set_memory_budget(self, memory_budget: Optional[int]):
+        """Change the memory budget in bytes, unloading models if needed"""
+        with self._condition:
+            self.memory_budget = memory_budget
+            self._enforce_budget()
+    
+    def set_idle_timeout(self, idle_timeout: Optional[float]):
+        """Change how many seconds unused models stay loaded"""
+        with self._condition:
+            self.idle_timeout = idle_timeout
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            self._schedule_idle_check()
+    
+    def get_memory_status(self) -> dict:
+        """Get the registered and loaded models and their estimated memory use"""
+        specs = {spec.model_id: spec for spec in self.registry.models()}
+        with self._condition:
+            # Models dropped from the manifest are listed until they are unloaded
+            for model_id, entry in self._models.items():
+                specs.setdefault(model_id, entry.spec)
+            
+            now = time.monotonic()
+            models = {}
+            for model_id, spec in specs.items():
+                entry = self._models.get(model_id)
+                models[model_id] = {
+                    'label': spec.name,
+                    'collection': spec.collection,
+                    'loaded': entry is not None,
+                    'loading': model_id in self._loading,
+                    'size': entry.size if entry is not None else 0,
+                    'in_use': entry.refs if entry is not None else 0,
+                    'idle_seconds': now - entry.last_used if entry is not None and entry.refs == 0 else 0.0,
+                    'load_seconds': entry.load_seconds if entry is not None else None,
+                    'load_memory': entry.load_memory if entry is not None else None,
+                }
+            return {
+                'models': models,
+                'total': sum(entry.size for entry in self._models.values()),
+                'memory_budget': self.memory_budget,
+                'idle_timeout': self.idle_timeout,
+            }
+    
+    def load_unigram_model(self, collection: Optional[str] = None) -> Optional[KeyedVectorsLike]:
+        """Load unigram word vectors"""
+        return self.get_model('uni', collection)
+    
+    def load_bigram_model(self, collection: Optional[str] = None) -> Optional[KeyedVectorsLike]:
+        """Load bigram word vectors"""
+        return self.get_model('bi', collection)
+    
+    def get_model(self, model_type: str, collection: Optional[str] = None) -> Optional[KeyedVectorsLike]:
+        """Get word vectors by type ('uni' or 'bi') from a collection (default if None)
+
+        The vectors are not protected from clear_cache; code that queries
+        them from a background thread should use acquire_model.
+        """
+        handle = self.acquire_model(model_type, collection)
+        if handle is None:
             return None
+        vectors = handle.vectors
+        handle.release()
+        return vectors
     
     def clear_cache(self):
-        """Clear cached models"""
-        self._uni_model = None
-        self._bi_model = None
\ No newline at end of file
+        """Clear cached models
+
+        Models still referenced by handles stay alive until those are
+        released; the next acquire loads the files again.
+        """
+        with self._condition:
+            self._models = {}
+            self._generation += 1
\ No newline at end of file
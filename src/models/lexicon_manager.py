@@ -2,41 +2,88 @@
 Lexicon manager for loading and managing lexicon data
 """
 
+import hashlib
 import os
+import pickle
+import tempfile
+import threading
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from utils.app_dirs import AppDirs
 
+LEXICON_FILE = "Lexicon List.xlsx"
+SIDECAR_FILE = "Lexicon List.cache.pkl"
+SIDECAR_VERSION = 1
+
+def _file_sha256(path: str) -> str:
+    """Hash a file in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def lexicon_hash(lexicon: pd.DataFrame) -> str:
+    """Get a content hash of a lexicon table"""
+    hashes = pd.util.hash_pandas_object(lexicon, index=False).to_numpy()
+    columns = '\x1f'.join(str(column) for column in lexicon.columns).encode('utf-8')
+    return hashlib.sha256(columns + hashes.tobytes()).hexdigest()
+
 class LexiconManager:
-    """Manager for lexicon data"""
-    
+    """Manager for lexicon data
+
+    Parsed lexicons are cached in a pickle sidecar next to the xlsx file,
+    keyed on the xlsx size, mtime and hash, so Excel parsing only happens
+    when the spreadsheet actually changes.
+    """
+
     def __init__(self, app_dirs: AppDirs):
         self.app_dirs = app_dirs
         self._lexicon_cache = None
-    
+        self._lexicon_version = None
+        self._save_lock = threading.Lock()
+        self._save_generation = 0
+        self._save_thread = None
+
+    @property
+    def lexicon_path(self) -> str:
+        """Get path of the lexicon spreadsheet"""
+        return os.path.join(self.app_dirs.user_data_dir, LEXICON_FILE)
+
+    @property
+    def sidecar_path(self) -> str:
+        """Get path of the binary lexicon cache"""
+        return os.path.join(self.app_dirs.user_data_dir, SIDECAR_FILE)
+
     def load_lexicon(self) -> pd.DataFrame:
         """Load lexicon data with caching"""
         if self._lexicon_cache is not None:
             return self._lexicon_cache
-        
+
         # Try to load from app data directory first
-        lexicon_path = os.path.join(self.app_dirs.user_data_dir, "Lexicon List.xlsx")
-        
+        lexicon_path = self.lexicon_path
+
         if os.path.exists(lexicon_path):
+            df = self._load_sidecar()
+            if df is not None:
+                self._lexicon_cache = df
+                return df
+
             try:
                 df = pd.read_excel(lexicon_path)
                 self._lexicon_cache = df
+                self._write_sidecar(df)
                 return df
             except Exception as e:
                 print(f"Error loading lexicon from {lexicon_path}: {e}")
-        
+
         # Fallback to default lexicon
         default_lexicon = self.create_default_lexicon()
         self._lexicon_cache = default_lexicon
         return default_lexicon
-    
+
     def create_default_lexicon(self) -> pd.DataFrame:
         """Create a default lexicon with multiple business dimensions"""
         return pd.DataFrame({
@@ -67,30 +114,165 @@ class LexiconManager:
                 'investor', 'shareholder', 'earnings', 'revenue', 'profit', 'financial', 'return', 'dividend'
             ]
         })
-    
-    def save_lexicon(self, df: pd.DataFrame) -> bool:
-        """Save lexicon data"""
+
+    def _load_sidecar(self) -> Optional[pd.DataFrame]:
+        """Load the cached lexicon if it still matches the xlsx file"""
         try:
-            lexicon_path = os.path.join(self.app_dirs.user_data_dir, "Lexicon List.xlsx")
-            os.makedirs(os.path.dirname(lexicon_path), exist_ok=True)
-            df.to_excel(lexicon_path, index=False)
-            self._lexicon_cache = df  # Update cache
-            return True
+            with open(self.sidecar_path, 'rb') as f:
+                payload = pickle.load(f)
+            stat = os.stat(self.lexicon_path)
+        except OSError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError, TypeError) as e:
+            # Written by another pickle protocol or pandas version; the xlsx is read instead
+            print(f"Discarding unreadable lexicon cache: {e}")
+            try:
+                os.remove(self.sidecar_path)
+            except OSError:
+                pass
+            return None
+
+        if not isinstance(payload, dict) or payload.get('version') != SIDECAR_VERSION:
+            return None
+        if payload.get('size') != stat.st_size:
+            return None
+
+        if payload.get('mtime') != stat.st_mtime:
+            # Copies and touches change mtime without changing content
+            try:
+                if payload.get('sha256') != _file_sha256(self.lexicon_path):
+                    return None
+            except OSError:
+                return None
+            self._write_sidecar(payload['lexicon'])
+
+        return payload['lexicon']
+
+    def _write_sidecar(self, df: pd.DataFrame, match_xlsx: bool = True):
+        """Write the binary lexicon cache, keyed on the current xlsx file"""
+        payload = {
+            'version': SIDECAR_VERSION,
+            'size': None,
+            'mtime': None,
+            'sha256': None,
+            'lexicon': df,
+        }
+
+        tmp_path = None
+        try:
+            # An unkeyed sidecar never matches, so a crash before the xlsx
+            # write finishes falls back to the previous spreadsheet
+            if match_xlsx and os.path.exists(self.lexicon_path):
+                stat = os.stat(self.lexicon_path)
+                payload['size'] = stat.st_size
+                payload['mtime'] = stat.st_mtime
+                payload['sha256'] = _file_sha256(self.lexicon_path)
+
+            # A temporary file of its own, as a load, a save and a background
+            # xlsx write may all write the sidecar at once
+            sidecar_dir = os.path.dirname(self.sidecar_path)
+            os.makedirs(sidecar_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".pkl", dir=sidecar_dir)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.sidecar_path)
+            tmp_path = None
+        except Exception as e:
+            print(f"Error writing lexicon cache: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save_lexicon(self, df: pd.DataFrame, on_saved: Optional[Callable[[Optional[str]], None]] = None) -> bool:
+        """Save lexicon data
+
+        The cache is updated immediately; the xlsx file is written on a
+        background thread. Use wait_for_pending_writes() to block on it.
+        on_saved is called on that thread with None once the file is
+        written, or superseded by a newer save, and with the error message
+        if writing failed. Returns False if the save could not be started.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.lexicon_path), exist_ok=True)
         except Exception as e:
             print(f"Error saving lexicon: {e}")
             return False
-    
+
+        self._lexicon_cache = df  # Update cache
+        self._write_sidecar(df, match_xlsx=False)
+
+        with self._save_lock:
+            self._save_generation += 1
+            generation = self._save_generation
+
+        # Non-daemon so interpreter shutdown still waits for the write
+        self._save_thread = threading.Thread(
+            target=self._write_xlsx, args=(df, generation, on_saved), name="LexiconSave"
+        )
+        self._save_thread.start()
+        return True
+
+    def _write_xlsx(self, df: pd.DataFrame, generation: int,
+                    on_saved: Optional[Callable[[Optional[str]], None]] = None):
+        """Write the xlsx file and re-key the sidecar on it
+
+        The lock is only held to swap the finished file in, so a newer
+        save never waits for this write.
+        """
+        # A newer save supersedes this one
+        if generation != self._save_generation:
+            if on_saved is not None:
+                on_saved(None)
+            return
+
+        error = None
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".xlsx", dir=os.path.dirname(self.lexicon_path))
+            os.close(fd)
+            df.to_excel(tmp_path, index=False, engine='openpyxl')
+            with self._save_lock:
+                if generation == self._save_generation:
+                    os.replace(tmp_path, self.lexicon_path)
+                    tmp_path = None
+                    self._write_sidecar(df)
+        except Exception as e:
+            error = str(e)
+            print(f"Error saving lexicon: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if on_saved is not None:
+            on_saved(error)
+
+    def wait_for_pending_writes(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background xlsx write to finish"""
+        thread = self._save_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
     def clear_cache(self):
         """Clear lexicon cache"""
         self._lexicon_cache = None
-    
+        self._lexicon_version = None
+
+    def lexicon_version(self) -> str:
+        """Get a content hash of the current lexicon"""
+        lexicon = self.load_lexicon()
+        if self._lexicon_version is None or self._lexicon_version[0] is not lexicon:
+            self._lexicon_version = (lexicon, lexicon_hash(lexicon))
+        return self._lexicon_version[1]
+
     def get_entities(self) -> list:
         """Get list of available entities"""
         lexicon = self.load_lexicon()
         if 'Entity' in lexicon.columns:
             return lexicon['Entity'].unique().tolist()
         return []
-    
+
     def get_keywords_for_entity(self, entity: str) -> list:
         """Get keywords for a specific entity"""
         lexicon = self.load_lexicon()
@@ -0,0 +1,116 @@
+"""
+Paragraph-level incremental analysis for live re-scoring while typing
+
+The document is split into paragraphs at blank lines. Each paragraph's
+result rows are cached by its text, so after an edit only new or changed
+paragraphs are tokenized and matched, and the table is patched with a
+list of row edits instead of being rebuilt.
+"""
+
+import difflib
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from models.text_processor import CompiledLexicon, TextProcessor
+
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+
+# (first row, number of rows replaced, replacement rows)
+RowEdit = Tuple[int, int, pd.DataFrame]
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split text into non-empty paragraphs at blank lines"""
+    return [p.strip() for p in PARAGRAPH_BREAK_RE.split(text) if p.strip()]
+
+class LiveAnalysis:
+    """Result state of the last analyzed version of a document
+
+    pending_paragraphs and apply run on the UI thread; analyze_paragraphs
+    only reads the compiled lexicon and may run on a worker thread.
+    """
+    
+    def __init__(self, text_processor: TextProcessor):
+        self.text_processor = text_processor
+        self.compiled = None
+        self.lexicon_version = None
+        self.paragraphs: List[str] = []
+        self.row_counts: List[int] = []
+        self._results: Dict[str, pd.DataFrame] = {}
+    
+    def reset(self):
+        """Forget the analyzed document"""
+        self.paragraphs = []
+        self.row_counts = []
+        self._results = {}
+    
+    def set_lexicon(self, lexicon: pd.DataFrame, lexicon_version: str) -> bool:
+        """Use a lexicon; returns True if it changed, which invalidates all results"""
+        if lexicon_version == self.lexicon_version:
+            return False
+        self.compiled = self.text_processor.compile_lexicon(lexicon)
+        self.lexicon_version = lexicon_version
+        self._results = {}
+        return True
+    
+    def add_results(self, results: Dict[str, pd.DataFrame]):
+        """Cache paragraph results without changing the document version"""
+        self._results.update(results)
+    
+    def pending_paragraphs(self, paragraphs: List[str]) -> List[str]:
+        """Get the paragraphs that have no cached result"""
+        return list(dict.fromkeys(p for p in paragraphs if p not in self._results))
+    
+    def analyze_paragraphs(self, paragraphs: List[str],
+                           compiled: CompiledLexicon) -> Dict[str, pd.DataFrame]:
+        """Analyze paragraphs independently"""
+        return {
+            paragraph: self.text_processor.analyze_sentences(
+                self.text_processor.tokenize_sentences(paragraph), compiled
+            )
+            for paragraph in paragraphs
+        }
+    
+    def apply(self, paragraphs: List[str], results: Dict[str, pd.DataFrame]) -> List[RowEdit]:
+        """Move to a new document version and get the row edits that turn the
+        previous result table into the new one
+
+        Edits are in descending row order, so applying them one after the
+        other keeps the remaining row numbers valid.
+        """
+        self._results.update(results)
+        
+        offsets = [0]
+        for count in self.row_counts:
+            offsets.append(offsets[-1] + count)
+        
+        edits = []
+        matcher = difflib.SequenceMatcher(None, self.paragraphs, paragraphs, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            frames = [self._results[p] for p in paragraphs[j1:j2]]
+            rows = pd.concat(frames, ignore_index=True) if frames else self.empty_result()
+            edits.append((offsets[i1], offsets[i2] - offsets[i1], rows))
+        
+        self.paragraphs = list(paragraphs)
+        self.row_counts = [len(self._results[p]) for p in paragraphs]
+        
+        # Only keep results of paragraphs still in the document
+        current = set(paragraphs)
+        self._results = {p: df for p, df in self._results.items() if p in current}
+        return edits[::-1]
+    
+    def empty_result(self) -> pd.DataFrame:
+        """Get a result table with no rows"""
+        return self.text_processor.analyze_sentences([], self.compiled)
+    
+    def result(self) -> pd.DataFrame:
+        """Get the full result table of the current version"""
+        frames = [self._results[p] for p in self.paragraphs]
+        return pd.concat(frames, ignore_index=True) if frames else self.empty_result()
+    
+    def row_count(self) -> int:
+        """Get the number of result rows of the current version"""
+        return sum(self.row_counts)
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Download of embedding models and the default lexicon
+
+Qt-free; the Setup tab runs it on a DownloadThread.
+"""
+
+import os
+from typing import Callable, List, Optional
+
+from utils.app_dirs import AppDirs
+from models.model_registry import ModelSpec
+from models.native_vectors import convert_model
+
+class ModelDownloader:
+    """Downloads embedding models and the default lexicon from GitHub"""
+    
+    def __init__(self, app_dirs: AppDirs, models: List[ModelSpec], force: bool = False,
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 status_callback: Optional[Callable[[str], None]] = None):
+        self.app_dirs = app_dirs
+        self.models = models
+        self.force = force
+        self.repo_url = "https://github.com/sec-edgar-warranty/MarkLex"
+        self._progress_callback = progress_callback
+        self._status_callback = status_callback
+    
+    def _progress(self, percent: int):
+        """Report overall progress in percent"""
+        if self._progress_callback is not None:
+            self._progress_callback(percent)
+    
+    def _status(self, message: str):
+        """Report a status message"""
+        if self._status_callback is not None:
+            self._status_callback(message)
+    
+    def run(self) -> bool:
+        """Download the models; returns True if at least one file was downloaded"""
+        try:
+            self._status("Starting download...")
+            
+            # Since files are stored in Git LFS, we need to download them directly from GitHub's raw API
+            # The files in the zip archive are just LFS pointer files
+            
+            embeddings_dest = self.app_dirs.embeddings_dir
+            os.makedirs(embeddings_dest, exist_ok=True)
+            
+            # Files of the requested models with the URLs they are served from
+            embedding_files = [(spec.url, file_name) for spec in self.models for file_name in spec.files]
+            
+            files_downloaded = 0
+            total_files = len(embedding_files)
+            
+            for i, (base_url, file_name) in enumerate(embedding_files):
+                try:
+                    self._status(f"Downloading {file_name}... ({i+1}/{total_files})")
+                    
+                    # Use GitHub's raw content API
+                    file_url = f"{base_url}/{file_name}"
+                    dest_path = os.path.join(embeddings_dest, file_name)
+                    
+                    # Download the file
+                    self._download_file_direct(file_url, dest_path)
+                    
+                    # Check if file was downloaded successfully
+                    if os.path.exists(dest_path) and os.path.getsize(dest_path) > 1000:  # Should be much larger than 1KB
+                        size_mb = os.path.getsize(dest_path) / (1024 * 1024)
+                        files_downloaded += 1
+                        self._status(f"✅ Downloaded {file_name} ({size_mb:.1f} MB)")
+                    else:
+                        self._status(f"❌ Failed to download {file_name} - file too small or missing")
+                        # Remove empty file if it exists
+                        if os.path.exists(dest_path):
+                            os.remove(dest_path)
+                    
+                    # Update progress
+                    progress = int(((i + 1) / total_files) * 80)  # Use 80% for downloads
+                    self._progress(progress)
+                
+                except Exception as e:
+                    self._status(f"❌ Error downloading {file_name}: {str(e)}")
+            
+            # Convert models once so later loads skip unpickling
+            for i, spec in enumerate(self.models):
+                model_path = spec.path(embeddings_dest)
+                if not os.path.exists(model_path):
+                    continue
+                self._status(f"Converting {spec.file} to native format...")
+                if convert_model(model_path):
+                    self._status(f"✅ Converted {spec.file}")
+                else:
+                    self._status(f"⚠️ Could not convert {spec.file}, it will be loaded with gensim")
+                self._progress(80 + int(((i + 1) / len(self.models)) * 10))
+            
+            # Also download lexicon file
+            try:
+                self._status("Downloading lexicon file...")
+                lexicon_url = f"{self.repo_url}/raw/main/Lexicon List.xlsx"
+                lexicon_dest = os.path.join(self.app_dirs.user_data_dir, "Lexicon List.xlsx")
+                
+                self._download_file_direct(lexicon_url, lexicon_dest)
+                
+                if os.path.exists(lexicon_dest) and os.path.getsize(lexicon_dest) > 1000:
+                    self._status("✅ Downloaded lexicon file")
+                else:
+                    self._status("⚠️ Lexicon file download failed, using default")
+            except:
+                self._status("⚠️ Lexicon file download failed, using default")
+            
+            self._progress(100)
+            
+            if files_downloaded > 0:
+                self._status(f"✅ Successfully downloaded {files_downloaded}/{total_files} embedding files")
+                return True
+            else:
+                self._status("❌ No embedding files were downloaded successfully")
+                return False
+        
+        except Exception as e:
+            self._status(f"Download failed: {str(e)}")
+            return False
+    
+    def _download_file_direct(self, url: str, dest_path: str):
+        """Download file directly with progress tracking"""
+        import requests
+        
+        response = requests.get(url, stream=True)
+        response.raise_for_status()
+        
+        total_size = int(response.headers.get('content-length', 0))
+        
+        with open(dest_path, 'wb') as f:
+            downloaded = 0
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    # We don't emit progress here since we're doing it per file in the main loop
+    
+    def _download_file(self, url: str, dest_path: str):
+        """Download file with progress tracking (legacy method)"""
+        import requests
+        
+        response = requests.get(url, stream=True)
+        response.raise_for_status()
+        
+        total_size = int(response.headers.get('content-length', 0))
+        
+        with open(dest_path, 'wb') as f:
+            downloaded = 0
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    if total_size > 0:
+                        progress = int((downloaded / total_size) * 40)  # Use 40% for download
+                        self._progress(progress)
@@ -0,0 +1,198 @@
+"""
+Registry of the embedding models installed in the embeddings directory
+
+Models are described by a models.json manifest next to the model files,
+so several versions or domains (for example 10-K filings and earnings
+calls) can be installed side by side. Models are grouped in collections;
+a query picks a collection and gets the unigram or bigram model from it.
+Without a manifest the registry describes the default MarkLex models.
+
+Manifest format:
+
+    {
+      "version": 1,
+      "default_collection": "10-K",
+      "models": [
+        {"id": "embeddings_8", "name": "10-K unigrams", "collection": "10-K",
+         "ngram": "uni", "file": "embeddings_8",
+         "files": ["embeddings_8", "embeddings_8.wv.vectors.npy"],
+         "url": "https://example.com/models"}
+      ]
+    }
+
+"files" lists everything to download (defaults to "file") and "url" is
+the base URL they are downloaded from (defaults to the MarkLex repository).
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+MANIFEST_FILE = "models.json"
+MANIFEST_VERSION = 1
+
+DEFAULT_SOURCE_URL = "https://github.com/sec-edgar-warranty/MarkLex/raw/main"
+DEFAULT_COLLECTION = "10-K"
+
+NGRAM_TYPES = ('uni', 'bi')
+
+DEFAULT_MANIFEST = {
+    'version': MANIFEST_VERSION,
+    'default_collection': DEFAULT_COLLECTION,
+    'models': [
+        {
+            'id': "embeddings_8",
+            'name': "10-K unigrams",
+            'collection': DEFAULT_COLLECTION,
+            'ngram': 'uni',
+            'file': "embeddings_8",
+            'files': ["embeddings_8", "embeddings_8.trainables.syn1neg.npy", "embeddings_8.wv.vectors.npy"],
+        },
+        {
+            'id': "embeddings_bi_grams",
+            'name': "10-K bigrams",
+            'collection': DEFAULT_COLLECTION,
+            'ngram': 'bi',
+            'file': "embeddings_bi_grams",
+        },
+    ],
+}
+
+class ModelSpec:
+    """Description of one embedding model"""
+    
+    def __init__(self, model_id: str, name: str, ngram: str, file: str,
+                 files: Optional[List[str]] = None, collection: str = DEFAULT_COLLECTION,
+                 url: Optional[str] = None):
+        if ngram not in NGRAM_TYPES:
+            raise ValueError(f"Model '{model_id}' has unknown ngram type '{ngram}'")
+        self.model_id = model_id
+        self.name = name
+        self.ngram = ngram
+        self.file = file
+        self.files = list(files) if files else [file]
+        self.collection = collection
+        self.url = url or DEFAULT_SOURCE_URL
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ModelSpec':
+        """Create a spec from a manifest entry"""
+        try:
+            model_id = data['id']
+            return cls(
+                model_id,
+                data.get('name', model_id),
+                data['ngram'],
+                data.get('file', model_id),
+                data.get('files'),
+                data.get('collection', DEFAULT_COLLECTION),
+                data.get('url'),
+            )
+        except KeyError as e:
+            raise ValueError(f"Model entry is missing {e}")
+    
+    def path(self, embeddings_dir: str) -> str:
+        """Get the path of the model file"""
+        return os.path.join(embeddings_dir, self.file)
+
+class ModelRegistry:
+    """Models listed in the embeddings directory's manifest
+
+    The manifest is re-read whenever it changes on disk, so models added
+    to it can be used without restarting.
+    """
+    
+    def __init__(self, embeddings_dir: str):
+        self.embeddings_dir = embeddings_dir
+        self._lock = threading.Lock()
+        self._signature = None
+        self._models: List[ModelSpec] = []
+        self._default_collection = DEFAULT_COLLECTION
+        self._apply_manifest(DEFAULT_MANIFEST)
+    
+    @property
+    def manifest_path(self) -> str:
+        """Get path of the manifest file"""
+        return os.path.join(self.embeddings_dir, MANIFEST_FILE)
+    
+    def _refresh(self):
+        """Reload the manifest if it changed; the caller holds the lock"""
+        try:
+            stat = os.stat(self.manifest_path)
+            signature = (stat.st_size, stat.st_mtime)
+        except OSError:
+            signature = None
+        if signature == self._signature:
+            return
+        self._signature = signature
+        
+        if signature is None:
+            self._apply_manifest(DEFAULT_MANIFEST)
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self._apply_manifest(json.load(f))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            # Unreadable or malformed; keep the app usable with the default models
+            print(f"Error reading model manifest, using default models: {e}")
+            self._apply_manifest(DEFAULT_MANIFEST)
+    
+    def _apply_manifest(self, manifest: Dict):
+        """Replace the registered models with a manifest's"""
+        if manifest.get('version', MANIFEST_VERSION) != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version {manifest.get('version')}")
+        models = [ModelSpec.from_dict(entry) for entry in manifest.get('models', [])]
+        if not models:
+            raise ValueError("Manifest lists no models")
+        ids = [spec.model_id for spec in models]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Manifest lists a model id more than once")
+        
+        self._models = models
+        collections = [spec.collection for spec in models]
+        default = manifest.get('default_collection')
+        self._default_collection = default if default in collections else collections[0]
+    
+    def models(self) -> List[ModelSpec]:
+        """Get all registered models"""
+        with self._lock:
+            self._refresh()
+            return list(self._models)
+    
+    def get(self, model_id: str) -> Optional[ModelSpec]:
+        """Get a model by id"""
+        for spec in self.models():
+            if spec.model_id == model_id:
+                return spec
+        return None
+    
+    def collections(self) -> List[str]:
+        """Get the collection names, default first"""
+        with self._lock:
+            self._refresh()
+            names = list(dict.fromkeys(spec.collection for spec in self._models))
+            names.remove(self._default_collection)
+            return [self._default_collection] + names
+    
+    @property
+    def default_collection(self) -> str:
+        """Get the collection used when a query names none"""
+        return self.collections()[0]
+    
+    def resolve(self, ngram: str, collection: Optional[str] = None) -> Optional[ModelSpec]:
+        """Get the unigram or bigram model of a collection (default if None)"""
+        collection = collection or self.default_collection
+        for spec in self.models():
+            if spec.collection == collection and spec.ngram == ngram:
+                return spec
+        return None
+    
+    def collection_models(self, collection: Optional[str] = None) -> List[ModelSpec]:
+        """Get the models of a collection (default if None)"""
+        collection = collection or self.default_collection
+        return [spec for spec in self.models() if spec.collection == collection]
+    
+    def is_installed(self, spec: ModelSpec) -> bool:
+        """Check if a model's file is present"""
+        return os.path.exists(spec.path(self.embeddings_dir))
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Native embedding format for fast, pickle-free loading of word vectors
+
+A converted model is stored next to its gensim file as three raw arrays
+(vectors, vocabulary and precomputed norms) plus a small JSON header, so
+loading is a memory map instead of a pickle deserialization.
+"""
+
+import json
+import os
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Upper bound on the similarity matrix of one most_similar_batch block, in bytes
+SIMILARITY_BLOCK_BYTES = 128 * 1024 * 1024
+
+def native_paths(model_path: str) -> Dict[str, str]:
+    """Get native format file paths for a gensim model file"""
+    return {
+        'vectors': f"{model_path}.native.vectors.npy",
+        'vocab': f"{model_path}.native.vocab.npy",
+        'norms': f"{model_path}.native.norms.npy",
+        'meta': f"{model_path}.native.json",
+    }
+
+def _source_signature(model_path: str) -> Optional[Dict]:
+    """Get size and mtime of the source model file"""
+    if not os.path.exists(model_path):
+        return None
+    stat = os.stat(model_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def is_native_current(model_path: str) -> bool:
+    """Check if an up-to-date native conversion exists for a model"""
+    paths = native_paths(model_path)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return False
+    
+    try:
+        with open(paths['meta'], 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    
+    if meta.get('format_version') != FORMAT_VERSION:
+        return False
+    
+    # A re-downloaded source model invalidates the conversion
+    source = _source_signature(model_path)
+    if source is not None and meta.get('source') != source:
+        return False
+    
+    return True
+
+def _save_array(path: str, array: np.ndarray):
+    """Save an array atomically so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+def convert_keyed_vectors(wv, model_path: str):
+    """Write gensim KeyedVectors to the native format next to model_path"""
+    paths = native_paths(model_path)
+    
+    vectors = np.ascontiguousarray(wv.vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+    
+    # Vocabulary is stored as newline-separated UTF-8 so it needs no pickling
+    vocab = np.frombuffer('\n'.join(wv.index_to_key).encode('utf-8'), dtype=np.uint8)
+    
+    _save_array(paths['vectors'], vectors)
+    _save_array(paths['vocab'], vocab)
+    _save_array(paths['norms'], norms)
+    
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'count': int(vectors.shape[0]),
+        'vector_size': int(vectors.shape[1]),
+        'source': _source_signature(model_path),
+    }
+    tmp_meta = f"{paths['meta']}.tmp"
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, paths['meta'])
+
+def convert_model(model_path: str) -> bool:
+    """Convert a gensim Word2Vec model file to the native format"""
+    from gensim.models import Word2Vec
+    
+    try:
+        model = Word2Vec.load(model_path)
+        convert_keyed_vectors(model.wv, model_path)
+        return True
+    except Exception as e:
+        print(f"Error converting {model_path}: {e}")
+        return False
+
+class NativeVectors:
+    """Read-only word vectors backed by memory-mapped arrays
+
+    Implements the subset of the gensim KeyedVectors API used by MarkLex
+    (key_to_index, index_to_key, get_vector and most_similar).
+    """
+    
+    def __init__(self, vectors: np.ndarray, vocab: Sequence[str], norms: np.ndarray,
+                 key_to_index: Optional[Mapping[str, int]] = None, safe_norms: Optional[np.ndarray] = None):
+        self.vectors = vectors
+        self.norms = norms
+        self.index_to_key = vocab
+        self._key_to_index = key_to_index
+        self._safe_norms = safe_norms
+    
+    @classmethod
+    def load(cls, model_path: str, mmap: bool = True) -> 'NativeVectors':
+        """Load native vectors for a gensim model file"""
+        paths = native_paths(model_path)
+        mmap_mode = 'r' if mmap else None
+        
+        vectors = np.load(paths['vectors'], mmap_mode=mmap_mode, allow_pickle=False)
+        norms = np.load(paths['norms'], mmap_mode=mmap_mode, allow_pickle=False)
+        vocab_bytes = np.load(paths['vocab'], mmap_mode=mmap_mode, allow_pickle=False)
+        vocab = vocab_bytes.tobytes().decode('utf-8').split('\n') if len(vocab_bytes) else []
+        
+        if len(vocab) != vectors.shape[0] or norms.shape[0] != vectors.shape[0]:
+            raise ValueError(f"Native files for {model_path} are inconsistent")
+        
+        return cls(vectors, vocab, norms)
+    
+    @property
+    def key_to_index(self) -> Mapping[str, int]:
+        """Get vocabulary lookup, built on first use"""
+        if self._key_to_index is None:
+            self._key_to_index = {key: i for i, key in enumerate(self.index_to_key)}
+        return self._key_to_index
+    
+    @property
+    def vector_size(self) -> int:
+        """Get vector dimensionality"""
+        return self.vectors.shape[1]
+    
+    def __len__(self) -> int:
+        return len(self.index_to_key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.key_to_index
+    
+    def get_index(self, key: str) -> int:
+        """Get vocabulary index of a key"""
+        try:
+            return self.key_to_index[key]
+        except KeyError:
+            raise KeyError(f"Key '{key}' not present in vocabulary")
+    
+    def get_vector(self, key: str, norm: bool = False) -> np.ndarray:
+        """Get vector for a key, optionally unit-normalized"""
+        index = self.get_index(key)
+        vector = np.asarray(self.vectors[index], dtype=np.float32)
+        if norm and self.norms[index] > 0:
+            vector = vector / self.norms[index]
+        return vector
+    
+    def _get_safe_norms(self) -> np.ndarray:
+        """Get norms with zeros replaced so division is always defined"""
+        if self._safe_norms is None:
+            self._safe_norms = np.where(self.norms > 0, self.norms, 1.0).astype(np.float32)
+        return self._safe_norms
+    
+    def most_similar(self, positive: Union[str, List[str]], topn: int = 10) -> List[Tuple[str, float]]:
+        """Find the top-N most similar keys by cosine similarity"""
+        keys = [positive] if isinstance(positive, str) else list(positive)
+        indices = [self.get_index(key) for key in keys]
+        
+        query = np.mean([self.get_vector(key, norm=True) for key in keys], axis=0)
+        query_norm = np.linalg.norm(query)
+        if query_norm > 0:
+            query = query / query_norm
+        
+        similarities = (self.vectors @ query) / self._get_safe_norms()
+        return self._top_similar(similarities, set(indices), topn)
+    
+    def most_similar_batch(self, keys: List[str], topn: int = 10) -> List[List[Tuple[str, float]]]:
+        """Find the top-N most similar keys for each of several keys
+
+        Queries are scored together with one matrix product per block, which
+        is much faster than a most_similar call per key.
+        """
+        indices = [self.get_index(key) for key in keys]
+        block = max(1, SIMILARITY_BLOCK_BYTES // (4 * max(len(self), 1)))
+        
+        results = []
+        for start in range(0, len(keys), block):
+            queries = np.stack([self.get_vector(key, norm=True) for key in keys[start:start + block]])
+            similarities = (queries @ self.vectors.T) / self._get_safe_norms()
+            for row, index in zip(similarities, indices[start:start + block]):
+                results.append(self._top_similar(row, {index}, topn))
+        return results
+    
+    def _top_similar(self, similarities: np.ndarray, excluded: set, topn: int) -> List[Tuple[str, float]]:
+        """Get the topn best scoring keys, leaving out the query keys"""
+        # Partial sort: only the best candidates need ordering
+        count = min(topn + len(excluded), len(similarities))
+        if count < len(similarities):
+            best = np.argpartition(-similarities, count - 1)[:count]
+        else:
+            best = np.arange(len(similarities))
+        best = best[np.argsort(-similarities[best], kind='stable')]
+        
+        result = [(self.index_to_key[i], float(similarities[i])) for i in best if i not in excluded]
+        return result[:topn]
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+Content-addressed on-disk cache of analysis results
+
+Results are keyed by a hash of the document, the lexicon version,
+ENGINE_VERSION and the text processor's fingerprint, so re-analyzing
+an unchanged document against an unchanged lexicon reads the stored
+table instead. Tables are stored column by column in compressed npz
+files without pickles: text columns as one UTF-8 string plus offsets,
+match flags as uint8. The least recently used entries are evicted once
+the cache grows past its size limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.text_processor import ENGINE_VERSION
+
+RESULT_CACHE_DIR = "results"
+
+# Default size limit of the cache directory
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+ENTRY_SUFFIX = ".npz"
+
+def hash_text(text: str) -> str:
+    """Hash a document given as text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def hash_file(path: str) -> str:
+    """Hash a document file in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def pack_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into one UTF-8 buffer and the character offsets of each string"""
+    lengths = np.fromiter((len(value) for value in values), dtype=np.int64, count=len(values))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    return np.frombuffer(''.join(values).encode('utf-8'), dtype=np.uint8), offsets
+
+def unpack_strings(buffer: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Unpack strings packed by pack_strings"""
+    text = buffer.tobytes().decode('utf-8')
+    offsets = offsets.tolist()
+    return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+def pack_utf8(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into one UTF-8 buffer and the byte offsets of each string
+
+    Unlike pack_strings, any range of the strings can be decoded on its own.
+    """
+    encoded = [value.encode('utf-8') for value in values]
+    lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), np.concatenate(([0], np.cumsum(lengths)))
+
+def unpack_utf8(buffer: np.ndarray, offsets: np.ndarray, start: int, stop: int) -> List[str]:
+    """Decode strings start to stop packed by pack_utf8"""
+    offsets = offsets[start:stop + 1].tolist()
+    if not offsets:
+        return []
+    base = offsets[0]
+    data = buffer[base:offsets[-1]].tobytes()
+    return [data[begin - base:end - base].decode('utf-8') for begin, end in zip(offsets, offsets[1:])]
+
+def _encode_table(df: pd.DataFrame) -> Optional[Dict[str, np.ndarray]]:
+    """Split a result table into arrays; None if a column can't be stored"""
+    arrays = {}
+    columns = []
+    for index, column in enumerate(df.columns):
+        values = df[column].to_numpy()
+        dtype = str(values.dtype)
+        if values.dtype == object:
+            if not all(isinstance(value, str) for value in values):
+                return None
+            arrays[f'text{index}'], arrays[f'offsets{index}'] = pack_strings(values)
+        elif values.dtype.kind in 'iu':
+            # Match flags are 0/1
+            if len(values) and (values.min() < 0 or values.max() > 255):
+                arrays[f'values{index}'] = values
+            else:
+                arrays[f'values{index}'] = values.astype(np.uint8)
+        elif values.dtype.kind in 'fb':
+            arrays[f'values{index}'] = values
+        else:
+            return None
+        columns.append({'name': str(column), 'dtype': dtype})
+    arrays['meta'] = np.array(json.dumps({'columns': columns, 'rows': len(df)}))
+    return arrays
+
+def _decode_table(arrays) -> pd.DataFrame:
+    """Rebuild a result table from its arrays"""
+    meta = json.loads(str(arrays['meta']))
+    data = {}
+    for index, column in enumerate(meta['columns']):
+        if column['dtype'] == 'object':
+            values = np.empty(meta['rows'], dtype=object)
+            values[:] = unpack_strings(arrays[f'text{index}'], arrays[f'offsets{index}'])
+        else:
+            values = arrays[f'values{index}'].astype(column['dtype'], copy=False)
+        data[column['name']] = values
+    return pd.DataFrame(data, columns=[column['name'] for column in meta['columns']])
+
+class ResultCache:
+    """Analysis result tables stored on disk by content key
+
+    Safe to share between threads; entries are written under a temporary
+    name and moved into place, so readers never see a partial file.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(document_hash: str, lexicon_version: str, fingerprint: str, encoding: Optional[str] = None) -> str:
+        """Get the cache key of a document analyzed with a lexicon
+
+        fingerprint is TextProcessor.fingerprint, which changes with the
+        sentence splitter and stopwords. The encoding a file is read with
+        is part of the key, as it can change the text.
+        """
+        parts = [document_hash, lexicon_version, str(ENGINE_VERSION), fingerprint, encoding or '']
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Get a cached result table, or None if there is none"""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                df = _decode_table(arrays)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached results: {e}")
+            self._remove(path)
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """Store a result table; returns False if it could not be stored"""
+        arrays = _encode_table(df)
+        if arrays is None:
+            return False
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix=ENTRY_SUFFIX + ".tmp", dir=self.cache_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez_compressed(f, **arrays)
+                os.replace(temp_path, self._path(key))
+            except BaseException:
+                self._remove(temp_path)
+                raise
+        except Exception as e:
+            print(f"Error caching results: {e}")
+            return False
+
+        self.evict()
+        return True
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits its size limit"""
+        with self._lock:
+            entries = []
+            for name in self._entry_names():
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(os.path.join(self.cache_dir, name))
+                total -= size
+
+    def size(self) -> int:
+        """Get the bytes used by cached results"""
+        total = 0
+        for name in self._entry_names():
+            try:
+                total += os.path.getsize(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        return total
+
+    def clear(self):
+        """Remove all cached results"""
+        with self._lock:
+            for name in self._entry_names():
+                self._remove(os.path.join(self.cache_dir, name))
+
+    def _entry_names(self):
+        try:
+            return [name for name in os.listdir(self.cache_dir) if name.endswith(ENTRY_SUFFIX)]
+        except OSError:
+            return []
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Chunked export of result tables to CSV, gzip CSV, Parquet and XLSX
+
+Results are consumed as an iterable of DataFrame chunks, so streaming or
+corpus-level analyses can be written without building one large table.
+"""
+
+import gzip
+import importlib.util
+import os
+from typing import Callable, Iterable, Iterator, Optional
+
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 10000
+
+# Excel's hard row limit, header row included
+XLSX_MAX_ROWS = 1048576
+
+EXPORT_FORMATS = {
+    'csv': ('CSV files', '.csv'),
+    'csv.gz': ('Compressed CSV files', '.csv.gz'),
+    'parquet': ('Parquet files', '.parquet'),
+    'xlsx': ('Excel workbooks', '.xlsx'),
+}
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled before completion"""
+
+def parquet_available() -> bool:
+    """Check if the optional pyarrow dependency is installed"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+def available_formats() -> list:
+    """Get export formats usable in this environment"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or parquet_available()]
+
+def format_from_filename(filename: str) -> str:
+    """Get the export format implied by a file name, defaulting to CSV"""
+    lower = filename.lower()
+    for fmt, (_, extension) in sorted(EXPORT_FORMATS.items(), key=lambda item: -len(item[1][1])):
+        if lower.endswith(extension):
+            return fmt
+    return 'csv'
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Split a DataFrame into row chunks without copying it"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+class ResultExporter:
+    """Writes result chunks to a file in one of EXPORT_FORMATS"""
+    
+    def __init__(self, filename: str, fmt: Optional[str] = None):
+        self.filename = filename
+        self.fmt = fmt or format_from_filename(filename)
+        if self.fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {self.fmt}")
+    
+    def export(self, chunks: Iterable[pd.DataFrame], total_rows: Optional[int] = None,
+               progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """Write all chunks and return the number of rows written
+
+        The file is written under a temporary name and only moved into
+        place once complete, so a cancelled or failed export leaves nothing.
+        """
+        tmp_path = f"{self.filename}.part"
+        writer = {
+            'csv': self._write_csv,
+            'csv.gz': self._write_csv,
+            'parquet': self._write_parquet,
+            'xlsx': self._write_xlsx,
+        }[self.fmt]
+        
+        def checked_chunks():
+            rows = 0
+            for chunk in chunks:
+                if is_cancelled is not None and is_cancelled():
+                    raise ExportCancelled()
+                yield chunk
+                rows += len(chunk)
+                if progress_callback is not None:
+                    progress_callback(rows, total_rows)
+        
+        try:
+            rows_written = writer(tmp_path, checked_chunks())
+            os.replace(tmp_path, self.filename)
+            return rows_written
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _write_csv(self, path: str, chunks: Iterable[pd.DataFrame]) -> int:
+        """Write chunks as CSV, gzip-compressed for csv.gz"""
+        if self.fmt == 'csv.gz':
+            f = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        else:
+            f = open(path, 'w', encoding='utf-8', newline='')
+        
+        rows = 0
+        with f:
+            for chunk in chunks:
+                chunk.to_csv(f, header=(rows == 0), index=False)
+                rows += len(chunk)
+        return rows
+    
+    def _write_parquet(self, path: str, chunks: Iterable[pd.DataFrame]) -> int:
+        """Write chunks as row groups of one Parquet file"""
+        if not parquet_available():
+            raise ImportError("Parquet export requires the pyarrow package")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        writer = None
+        rows = 0
+        try:
+            for chunk in chunks:
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        if writer is None:
+            pq.write_table(pa.table({}), path)
+        return rows
+    
+    def _write_xlsx(self, path: str, chunks: Iterable[pd.DataFrame]) -> int:
+        """Write chunks with openpyxl in write-only mode, spilling to new sheets"""
+        from openpyxl import Workbook
+        
+        workbook = Workbook(write_only=True)
+        sheet = None
+        sheet_rows = 0
+        header = None
+        rows = 0
+        
+        for chunk in chunks:
+            if header is None:
+                header = [str(column) for column in chunk.columns]
+            for values in chunk.itertuples(index=False, name=None):
+                if sheet is None or sheet_rows >= XLSX_MAX_ROWS:
+                    sheet = workbook.create_sheet(f"Results {len(workbook.worksheets) + 1}")
+                    sheet.append(header)
+                    sheet_rows = 1
+                sheet.append([value.item() if hasattr(value, 'item') else value for value in values])
+                sheet_rows += 1
+            rows += len(chunk)
+        
+        if sheet is None:
+            sheet = workbook.create_sheet("Results 1")
+            if header:
+                sheet.append(header)
+        
+        workbook.save(path)
+        return rows
\ No newline at end of file
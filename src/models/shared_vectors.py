@@ -0,0 +1,138 @@
+"""
+Word vectors shared with worker processes through memory-mapped files
+
+The parent writes a model's vectors, norms and vocabulary once, to
+/dev/shm where available; workers attach with attach_vectors and map the
+same pages, so adding a worker costs neither a model load nor a copy of
+the vectors. The vocabulary stays as UTF-8 bytes with a sorted index, so
+lookups are binary searches instead of a per-process dict.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator, Mapping, Sequence
+
+import numpy as np
+
+from models.native_vectors import NativeVectors
+
+# RAM-backed on Linux; elsewhere the system temp directory is used
+SHARED_MEMORY_DIR = "/dev/shm"
+
+class SharedVocabulary(Sequence):
+    """index_to_key over UTF-8 bytes and offsets, decoding keys on access"""
+    
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def key_bytes(self, index: int) -> bytes:
+        """Get the UTF-8 bytes of a key"""
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes()
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Vocabulary index out of range")
+        return self.key_bytes(index).decode('utf-8')
+
+class SharedVocabularyIndex(Mapping):
+    """key_to_index by binary search over the keys in byte order"""
+    
+    def __init__(self, vocabulary: SharedVocabulary, order: np.ndarray):
+        self.vocabulary = vocabulary
+        self.order = order
+    
+    def __getitem__(self, key: str) -> int:
+        if not isinstance(key, str):
+            raise KeyError(key)
+        target = key.encode('utf-8')
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.vocabulary.key_bytes(self.order[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.order) and self.vocabulary.key_bytes(self.order[low]) == target:
+            return int(self.order[low])
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.vocabulary)
+    
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+class SharedVectors:
+    """A model's arrays written once for worker processes to attach to
+
+    Pass info to the workers (it is a small picklable dict) and call
+    close once they are done; use as a context manager to do both in one
+    block.
+    """
+    
+    def __init__(self, vectors):
+        base = SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None
+        self.directory = tempfile.mkdtemp(prefix="marklex-vectors-", dir=base)
+        try:
+            self.info = self._write(vectors)
+        except Exception:
+            self.close()
+            raise
+    
+    def _write(self, vectors) -> Dict[str, str]:
+        """Write the shared arrays; returns their paths"""
+        paths = {name: os.path.join(self.directory, f"{name}.npy")
+                 for name in ('vectors', 'norms', 'vocab', 'offsets', 'order')}
+        
+        matrix = vectors.vectors
+        if isinstance(matrix, np.memmap) and matrix.filename and matrix.dtype == np.float32:
+            # Native models are already memory-mapped files; share those pages directly
+            paths['vectors'] = matrix.filename
+        else:
+            np.save(paths['vectors'], np.asarray(matrix, dtype=np.float32))
+        
+        norms = getattr(vectors, 'norms', None)
+        if norms is None:
+            # gensim computes norms lazily
+            norms = np.linalg.norm(matrix, axis=1)
+        np.save(paths['norms'], np.where(norms > 0, norms, 1.0).astype(np.float32))
+        
+        keys = [key.encode('utf-8') for key in vectors.index_to_key]
+        lengths = np.fromiter((len(key) for key in keys), dtype=np.int64, count=len(keys))
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        np.save(paths['vocab'], np.frombuffer(b''.join(keys), dtype=np.uint8))
+        np.save(paths['offsets'], offsets)
+        np.save(paths['order'], np.array(sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int64))
+        return paths
+    
+    def __enter__(self) -> 'SharedVectors':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Delete the shared files; attached workers keep their mappings"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def attach_vectors(info: Dict[str, str]) -> NativeVectors:
+    """Map shared vectors written by SharedVectors, without copying them"""
+    arrays = {name: np.load(path, mmap_mode='r', allow_pickle=False) for name, path in info.items()}
+    vocabulary = SharedVocabulary(arrays['vocab'], arrays['offsets'])
+    if len(vocabulary) != arrays['vectors'].shape[0]:
+        raise ValueError("Shared vectors are inconsistent")
+    
+    # The shared norms are already safe to divide by
+    return NativeVectors(arrays['vectors'], vocabulary, arrays['norms'],
+                         key_to_index=SharedVocabularyIndex(vocabulary, arrays['order']),
+                         safe_norms=arrays['norms'])
\ No newline at end of file
@@ -2,18 +2,148 @@
 Text processing utilities adapted from Streamlit version
 """
 
+import hashlib
 import re
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Set, Optional
+from typing import List, Dict, Set, Optional, Iterable, Iterator, Tuple, Callable, Union
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import sent_tokenize, word_tokenize
 
+from models.text_reader import iter_text_chunks
+from models.edgar_reader import iter_documents
+from utils.stage_timer import StageTimer, timed, timed_iter
+
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+# Longest n-gram matched against lexicon keywords
+MAX_NGRAM = 3
+
+# Sentence tails longer than this are flushed even without a boundary
+MAX_CARRY_CHARS = 1024 * 1024
+
+# Version of the analysis results; bump it when a change alters them, so
+# cached results from earlier versions are not reused
+ENGINE_VERSION = 1
+
+class CompiledLexicon:
+    """Lexicon keywords compiled into a lookup table for matching"""
+    
+    def __init__(self, lexicon: pd.DataFrame):
+        self.entities = lexicon['Entity'].unique().tolist() if not lexicon.empty else []
+        
+        keyword_entities = {}
+        for index, entity in enumerate(self.entities):
+            keywords = lexicon[lexicon['Entity'] == entity]['Keyword'].tolist()
+            for keyword in keywords:
+                if pd.notna(keyword):
+                    keyword_entities.setdefault(str(keyword).lower(), set()).add(index)
+        
+        self.keyword_entities = {k: tuple(sorted(v)) for k, v in keyword_entities.items()}
+        
+        # Only build n-grams of lengths that some keyword can match
+        self.ngram_sizes = sorted({len(k.split(' ')) for k in self.keyword_entities} &
+                                  set(range(1, MAX_NGRAM + 1)))
+    
+    def match_words(self, words: List[str]) -> List[int]:
+        """Get a 0/1 match flag per entity for a cleaned sentence"""
+        row = [0] * len(self.entities)
+        lookup = self.keyword_entities
+        for n in self.ngram_sizes:
+            for i in range(len(words) - n + 1):
+                hits = lookup.get(words[i] if n == 1 else ' '.join(words[i:i + n]))
+                if hits:
+                    for index in hits:
+                        row[index] = 1
+        return row
+
+    def count_ngrams(self, cleaned: List[List[str]]) -> int:
+        """Count the n-grams match_words looks up for cleaned sentences"""
+        return sum(max(0, len(words) - n + 1) for words in cleaned for n in self.ngram_sizes)
+
+class TokenMatcher:
+    """A compiled lexicon mapped onto the vocabulary of a tokenized document
+
+    Words are filtered and n-grams matched on integer arrays: each
+    keyword becomes a key packed from the ids of its words, renumbered
+    so only words of some keyword count, and the n-grams of a run of
+    sentences are looked up in the sorted keys at once.
+    """
+    
+    def __init__(self, compiled: CompiledLexicon, vocabulary: List[str], stop_words: Set[str]):
+        self.compiled = compiled
+        self.keep = np.fromiter((len(word) > 1 and word not in stop_words for word in vocabulary),
+                                dtype=bool, count=len(vocabulary))
+        kept_ids = {word: index for index, word in enumerate(vocabulary) if self.keep[index]}
+        
+        # Keywords whose words all occur in the document, as word id tuples
+        keywords = {}
+        for keyword, entities in compiled.keyword_entities.items():
+            words = keyword.split(' ')
+            if len(words) in compiled.ngram_sizes and all(word in kept_ids for word in words):
+                keywords[tuple(kept_ids[word] for word in words)] = entities
+        
+        # Renumber the keyword words from 1; every other word is 0
+        relevant = sorted({word_id for ids in keywords for word_id in ids})
+        self.renumbered = np.zeros(len(vocabulary), dtype=np.int64)
+        self.renumbered[relevant] = np.arange(1, len(relevant) + 1)
+        self.base = len(relevant) + 1
+        
+        self.keys = {}
+        for n in compiled.ngram_sizes:
+            entries = sorted((self._pack([self.renumbered[word_id] for word_id in ids]), entities)
+                             for ids, entities in keywords.items() if len(ids) == n)
+            rows = np.zeros((len(entries), len(compiled.entities)), dtype=np.int64)
+            for row, (_, entities) in enumerate(entries):
+                rows[row, list(entities)] = 1
+            self.keys[n] = (np.array([key for key, _ in entries], dtype=np.int64), rows)
+    
+    def _pack(self, digits) -> int:
+        key = 0
+        for digit in digits:
+            key = key * self.base + int(digit)
+        return key
+    
+    def match(self, ids: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Get the match flags and the n-gram count of consecutive sentences
+
+        ids holds the words of the sentences, one after the other, and
+        lengths the number of words of each.
+        """
+        flags = np.zeros((len(lengths), len(self.compiled.entities)), dtype=np.int64)
+        sentence = np.repeat(np.arange(len(lengths)), lengths)
+        kept = self.keep[ids]
+        ids, sentence = ids[kept], sentence[kept]
+        kept_lengths = np.bincount(sentence, minlength=len(lengths))
+        digits = self.renumbered[ids]
+        
+        ngrams = 0
+        for n in self.compiled.ngram_sizes:
+            ngrams += int(np.maximum(kept_lengths - n + 1, 0).sum())
+            keyword_keys, rows = self.keys[n]
+            windows = len(ids) - n + 1
+            if not len(keyword_keys) or windows <= 0:
+                continue
+            keys = digits[:windows].copy()
+            for offset in range(1, n):
+                keys = keys * self.base + digits[offset:offset + windows]
+            
+            # N-grams don't cross sentences
+            starts = sentence[:windows]
+            inside = starts == sentence[n - 1:n - 1 + windows]
+            positions = np.searchsorted(keyword_keys, keys)
+            positions[positions == len(keyword_keys)] = 0
+            hits = inside & (keyword_keys[positions] == keys)
+            np.maximum.at(flags, starts[hits], rows[positions[hits]])
+        return flags, ngrams
+
 class TextProcessor:
     """Text processing utilities for analysis"""
     
     def __init__(self):
         self.stop_words = self._setup_nltk()
+        self.splitter_fingerprint = self._splitter_fingerprint()
     
     def _setup_nltk(self) -> Set[str]:
         """Setup NLTK data and return stopwords"""
@@ -28,17 +158,36 @@ class TextProcessor:
                         nltk.download('punkt_tab', quiet=True)
                     except:
                         nltk.download('punkt', quiet=True)
-
+            
             try:
                 nltk.data.find('corpora/stopwords')
             except LookupError:
                 nltk.download('stopwords', quiet=True)
-                
+            
             return set(stopwords.words('english'))
         except:
             # Fallback stopwords if NLTK fails
             return {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
     
+    def _splitter_fingerprint(self) -> str:
+        """Hash the sentence splitter in use, for keys of stored sentences
+
+        Without NLTK's punkt data sentences are split by a regex instead,
+        so sentences stored with another setup don't apply.
+        """
+        try:
+            sent_tokenize("Test sentence. Another one.")
+            splitter = f"nltk {nltk.__version__}"
+        except:
+            splitter = "regex"
+        return hashlib.sha256(splitter.encode('utf-8')).hexdigest()[:16]
+    
+    @property
+    def fingerprint(self) -> str:
+        """Hash the sentence splitter and the current stopwords, for keys of cached results"""
+        data = '\x1f'.join([self.splitter_fingerprint] + sorted(self.stop_words))
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+    
     def preprocess_text(self, text: str) -> str:
         """Basic text preprocessing"""
         text = text.replace("U.S.A.", "USA").replace("U.S.", "US")
@@ -54,16 +203,53 @@ class TextProcessor:
             sentences = re.split(r'[.!?]+', self.preprocess_text(text))
             return [s.strip() for s in sentences if s.strip()]
     
+    def iter_sentences(self, chunks: Iterable[str], timer: Optional[StageTimer] = None) -> Iterator[str]:
+        """Tokenize a stream of text chunks into sentences with bounded memory
+
+        With a timer, reading the chunks and tokenizing are timed as the
+        read and tokenize stages and the characters read are counted.
+        """
+        carry = ''
+        for chunk in timed_iter(timer, 'read', chunks):
+            if timer is not None:
+                timer.add_size('characters', len(chunk))
+            with timed(timer, 'tokenize'):
+                text = self.preprocess_text(carry + chunk)
+                sentences = self.tokenize_sentences(text)
+            if not sentences:
+                carry = ''
+                continue
+            
+            # The last sentence may continue in the next chunk
+            last = sentences.pop()
+            start = text.rfind(last)
+            carry = text[start:] if start >= 0 else last + ' '
+            if len(carry) > MAX_CARRY_CHARS:
+                sentences.append(carry.strip())
+                carry = ''
+            
+            yield from sentences
+        
+        if carry.strip():
+            with timed(timer, 'tokenize'):
+                sentences = self.tokenize_sentences(carry)
+            yield from sentences
+    
+    def tokenize_words(self, sentence: str) -> List[str]:
+        """Lowercase a sentence and split it into words without punctuation"""
+        return PUNCTUATION_RE.sub('', sentence.lower()).split()
+    
+    def clean_words(self, sentence: str) -> List[str]:
+        """Lowercase, strip punctuation and drop stopwords from a sentence"""
+        return [word for word in self.tokenize_words(sentence) if word not in self.stop_words and len(word) > 1]
+    
     def clean_text(self, sentences: List[str]) -> List[Dict]:
         """Clean and process sentences"""
         cleaned_sentences = []
         for i, sentence in enumerate(sentences):
             try:
-                text = sentence.lower()
-                text = re.sub(r'[^\w\s]', '', text)
-                words = text.split()
-                words = [word for word in words if word and word not in self.stop_words and len(word) > 1]
-
+                words = self.clean_words(sentence)
+                
                 if words:
                     cleaned_sentences.append({
                         'sentence_id': i + 1,
@@ -72,7 +258,7 @@ class TextProcessor:
                     })
             except:
                 continue
-
+        
         return cleaned_sentences
     
     def generate_ngrams(self, cleaned_sentences: List[Dict], n: int) -> List[Dict]:
@@ -90,52 +276,151 @@ class TextProcessor:
                         })
         return ngrams
     
-    def analyze_text(self, text_input: str, lexicon: pd.DataFrame) -> pd.DataFrame:
-        """Analyze text against lexicon"""
+    def compile_lexicon(self, lexicon: pd.DataFrame) -> CompiledLexicon:
+        """Compile a lexicon for repeated matching"""
+        return CompiledLexicon(lexicon)
+    
+    def analyze_sentences(self, sentences: List[str], compiled: CompiledLexicon,
+                          timer: Optional[StageTimer] = None) -> pd.DataFrame:
+        """Match a batch of sentences against a compiled lexicon"""
+        with timed(timer, 'clean'):
+            cleaned = [self.clean_words(s) for s in sentences]
+        return self._build_results(sentences, cleaned, compiled, timer)
+    
+    def _build_results(self, sentences: List[str], cleaned: List[List[str]],
+                       compiled: CompiledLexicon, timer: Optional[StageTimer] = None) -> pd.DataFrame:
+        """Build the result table from cleaned sentences"""
+        # N-grams are built while matching, so both are timed as one stage
+        with timed(timer, 'match'):
+            rows = [compiled.match_words(words) for words in cleaned]
+        if timer is not None:
+            timer.add_size('sentences', len(sentences))
+            timer.add_size('ngrams', compiled.count_ngrams(cleaned))
+        
+        with timed(timer, 'table'):
+            results = {'Text': sentences}
+            for index, entity in enumerate(compiled.entities):
+                results[entity] = [row[index] for row in rows]
+            return pd.DataFrame(results)
+    
+    def _compiled(self, lexicon: Union[pd.DataFrame, CompiledLexicon],
+                  timer: Optional[StageTimer] = None) -> CompiledLexicon:
+        """Compile a lexicon unless it already is"""
+        if isinstance(lexicon, CompiledLexicon):
+            return lexicon
+        with timed(timer, 'compile'):
+            return self.compile_lexicon(lexicon)
+    
+    def iter_analyze(self, sentences: Iterable[str], lexicon: Union[pd.DataFrame, CompiledLexicon],
+                     batch_size: int = 1000, timer: Optional[StageTimer] = None) -> Iterator[pd.DataFrame]:
+        """Analyze a sentence stream, yielding result batches"""
+        compiled = self._compiled(lexicon, timer)
+        batch = []
+        for sentence in sentences:
+            batch.append(sentence)
+            if len(batch) >= batch_size:
+                yield self.analyze_sentences(batch, compiled, timer)
+                batch = []
+        if batch:
+            yield self.analyze_sentences(batch, compiled, timer)
+    
+    def iter_analyze_tokens(self, document, lexicon: Union[pd.DataFrame, CompiledLexicon],
+                            batch_size: int = 1000, timer: Optional[StageTimer] = None) -> Iterator[pd.DataFrame]:
+        """Analyze a document from a TokenStore, yielding the batches its analysis from text would
+
+        Only the stored word ids are matched, so neither NLTK nor the
+        punctuation regex run; the current stopwords are applied to the
+        document's vocabulary.
+        """
+        compiled = self._compiled(lexicon, timer)
+        with timed(timer, 'compile'):
+            matcher = TokenMatcher(compiled, document.vocabulary, self.stop_words)
+        
+        # Keys of the longest n-grams must fit in int64
+        if compiled.ngram_sizes and matcher.base ** max(compiled.ngram_sizes) >= 2 ** 62:
+            matcher = None
+        
+        offsets = document.word_offsets
+        parts = document.parts
+        for index, part in enumerate(parts):
+            end = parts[index + 1]['start'] if index + 1 < len(parts) else document.sentence_count()
+            for start in range(part['start'], end, batch_size):
+                stop = min(start + batch_size, end)
+                sentences = document.sentences(start, stop)
+                if matcher is None:
+                    batch = self.analyze_sentences(sentences, compiled, timer)
+                else:
+                    with timed(timer, 'match'):
+                        ids = np.asarray(document.ids[offsets[start]:offsets[stop]])
+                        flags, ngrams = matcher.match(ids, np.diff(offsets[start:stop + 1]))
+                    if timer is not None:
+                        timer.add_size('sentences', len(sentences))
+                        timer.add_size('ngrams', ngrams)
+                    with timed(timer, 'table'):
+                        results = {'Text': sentences}
+                        for column, entity in enumerate(compiled.entities):
+                            results[entity] = flags[:, column]
+                        batch = pd.DataFrame(results)
+                for column, value in reversed(list(part['labels'].items())):
+                    batch.insert(0, column, value)
+                yield batch
+    
+    def iter_analyze_file(self, path: str, lexicon: Union[pd.DataFrame, CompiledLexicon],
+                          encoding: Optional[str] = None, batch_size: int = 1000,
+                          progress_callback: Optional[Callable[[int, int], None]] = None,
+                          timer: Optional[StageTimer] = None) -> Iterator[pd.DataFrame]:
+        """Analyze a text file from disk, yielding result batches"""
+        chunks = iter_text_chunks(path, encoding, progress_callback=progress_callback)
+        return self.iter_analyze(self.iter_sentences(chunks, timer), lexicon, batch_size, timer)
+    
+    def iter_analyze_submission(self, path: str, lexicon: Union[pd.DataFrame, CompiledLexicon],
+                                document_types: Optional[Iterable[str]] = None, batch_size: int = 1000,
+                                progress_callback: Optional[Callable[[int, int], None]] = None,
+                                timer: Optional[StageTimer] = None) -> Iterator[pd.DataFrame]:
+        """Analyze the text documents of an EDGAR submission, yielding result batches"""
+        compiled = self._compiled(lexicon, timer)
+        for document in iter_documents(path, document_types, progress_callback=progress_callback):
+            sentences = self.iter_sentences(document.iter_text(), timer)
+            for batch in self.iter_analyze(sentences, compiled, batch_size, timer):
+                batch.insert(0, 'Sequence', document.sequence)
+                batch.insert(0, 'Document', document.doc_type)
+                yield batch
+    
+    def analyze_stream(self, chunks: Iterable[str], lexicon: pd.DataFrame) -> pd.DataFrame:
+        """Analyze a stream of text chunks against lexicon"""
+        batches = list(self.iter_analyze(self.iter_sentences(chunks), lexicon))
+        if not batches:
+            return pd.DataFrame({'Text': ['No sentences found']})
+        return pd.concat(batches, ignore_index=True)
+    
+    def analyze_file(self, path: str, lexicon: pd.DataFrame, encoding: Optional[str] = None) -> pd.DataFrame:
+        """Analyze a text file without loading it into memory at once"""
+        return self.analyze_stream(iter_text_chunks(path, encoding), lexicon)
+    
+    def analyze_submission(self, path: str, lexicon: pd.DataFrame,
+                           document_types: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Analyze the text documents of an EDGAR submission file"""
+        batches = list(self.iter_analyze_submission(path, lexicon, document_types))
+        if not batches:
+            return pd.DataFrame({'Text': ['No sentences found']})
+        return pd.concat(batches, ignore_index=True)
+    
+    def analyze_text(self, text_input: str, lexicon: pd.DataFrame,
+                     timer: Optional[StageTimer] = None) -> pd.DataFrame:
+        """Analyze text against lexicon, timing each stage with timer if given"""
         if not text_input or not text_input.strip():
             return pd.DataFrame({'Text': ['No text provided']})
-
-        sentences = self.tokenize_sentences(text_input)
+        if timer is not None:
+            timer.add_size('characters', len(text_input))
+        
+        with timed(timer, 'tokenize'):
+            sentences = self.tokenize_sentences(text_input)
         if not sentences:
             return pd.DataFrame({'Text': ['No sentences found']})
-
-        cleaned_sentences = self.clean_text(sentences)
-        if not cleaned_sentences:
+        
+        with timed(timer, 'clean'):
+            cleaned = [self.clean_words(sentence) for sentence in sentences]
+        if lexicon.empty or not any(cleaned):
             return pd.DataFrame({'Text': sentences})
-
-        # Generate n-grams
-        all_ngrams = (self.generate_ngrams(cleaned_sentences, 1) + 
-                     self.generate_ngrams(cleaned_sentences, 2) + 
-                     self.generate_ngrams(cleaned_sentences, 3))
-
-        if all_ngrams:
-            ngrams_df = pd.DataFrame(all_ngrams)
-        else:
-            ngrams_df = pd.DataFrame(columns=['sentence_id', 'ngram'])
-
-        results = {'Text': sentences}
-
-        if lexicon.empty:
-            return pd.DataFrame(results)
-
-        # Process each entity
-        for entity in lexicon['Entity'].unique():
-            keywords = lexicon[lexicon['Entity'] == entity]['Keyword'].tolist()
-            keywords = [str(k).lower() for k in keywords if pd.notna(k)]
-
-            entity_matches = []
-
-            for i, sentence in enumerate(sentences):
-                sentence_id = i + 1
-
-                if not ngrams_df.empty:
-                    sentence_ngrams = ngrams_df[ngrams_df['sentence_id'] == sentence_id]['ngram'].tolist()
-                else:
-                    sentence_ngrams = []
-
-                match = 1 if any(ngram in keywords for ngram in sentence_ngrams) else 0
-                entity_matches.append(match)
-
-            results[entity] = entity_matches
-
-        return pd.DataFrame(results)
\ No newline at end of file
+        
+        return self._build_results(sentences, cleaned, self._compiled(lexicon, timer), timer)
\ No newline at end of file
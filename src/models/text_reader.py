@@ -0,0 +1,107 @@
+"""
+Chunked text file reading with encoding detection
+
+Large filings are read in fixed-size chunks through an incremental
+decoder, so memory stays bounded regardless of file size.
+"""
+
+import codecs
+import os
+from typing import Callable, Iterator, Optional, Tuple
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_PAGE_SIZE = 64 * 1024
+DETECT_SAMPLE_SIZE = 64 * 1024
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+def detect_encoding(path: str, sample_size: int = DETECT_SAMPLE_SIZE) -> str:
+    """Detect text file encoding from its BOM or a leading sample"""
+    with open(path, 'rb') as f:
+        sample = f.read(sample_size)
+    
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    
+    # Incremental decode tolerates a multi-byte character cut at the sample end
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+def iter_text_chunks(path: str, encoding: Optional[str] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> Iterator[str]:
+    """Yield decoded text from a file in chunks of roughly chunk_size bytes
+    
+    progress_callback, if given, receives (bytes read, file size) after each chunk.
+    """
+    if encoding is None:
+        encoding = detect_encoding(path)
+    
+    total_bytes = os.path.getsize(path)
+    bytes_read = 0
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            bytes_read += len(data)
+            if progress_callback is not None:
+                progress_callback(bytes_read, total_bytes)
+            text = decoder.decode(data)
+            if text:
+                yield text
+    
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def read_text_file(path: str, encoding: Optional[str] = None) -> str:
+    """Read a whole text file with encoding detection"""
+    return ''.join(iter_text_chunks(path, encoding))
+
+def page_count(path: str, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """Get the number of preview pages in a file"""
+    return max(1, -(-os.path.getsize(path) // page_size))
+
+def read_page(path: str, page: int, encoding: Optional[str] = None,
+              page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[str, bool]:
+    """Read one preview page of a file, returning its text and whether more follows"""
+    if encoding is None:
+        encoding = detect_encoding(path)
+    
+    with open(path, 'rb') as f:
+        f.seek(page * page_size)
+        data = f.read(page_size)
+        has_more = bool(f.read(1))
+    
+    # Only the first page carries the BOM
+    if page > 0:
+        encoding = _bomless_encoding(path, encoding)
+    
+    # Pages start at arbitrary byte offsets, so drop partial characters at the edges
+    return data.decode(encoding, errors='ignore'), has_more
+
+def _bomless_encoding(path: str, encoding: str) -> str:
+    """Get the equivalent encoding for data read past the BOM"""
+    if encoding == 'utf-8-sig':
+        return 'utf-8'
+    if encoding == 'utf-16':
+        with open(path, 'rb') as f:
+            bom = f.read(2)
+        return 'utf-16-be' if bom == codecs.BOM_UTF16_BE else 'utf-16-le'
+    return encoding
\ No newline at end of file
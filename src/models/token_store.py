@@ -0,0 +1,287 @@
+"""
+On-disk store of tokenized documents as integer id arrays
+
+Splitting a document into sentences (NLTK) and words (regex) dominates
+repeated runs over the same corpus, whatever the lexicon. The store keeps
+each document's sentences and its words before stopword removal as an
+int32 id array into the document's own vocabulary, with the word offset
+of every sentence. TextProcessor.iter_analyze_tokens matches a lexicon
+on these arrays, applying the current stopwords to the vocabulary, so a
+stored document is never tokenized again.
+
+Each document is a directory of .npy files opened with mmap, keyed by
+the document's content hash and the sentence splitter in use. A
+TokenWriter appends a document batch by batch to files in a temporary
+directory, so storing it holds no more than its vocabulary in memory,
+and renames it into place when complete. The least recently used
+documents are evicted once the store grows past its size limit.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models.result_cache import pack_strings, pack_utf8, unpack_strings, unpack_utf8
+
+TOKEN_STORE_DIR = "tokens"
+
+# Version of the stored tokens; bump it when sentence or word splitting changes
+TOKENIZER_VERSION = 1
+
+# Default size limit of the store directory
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+PARTS_NAME = "parts.json"
+
+# Temporary directories left this long, e.g. by a killed worker, are removed on eviction
+STALE_TEMP_SECONDS = 24 * 60 * 60
+
+# Array items copied at a time when a document is finished
+COPY_ITEMS = 1024 * 1024
+
+# Appended files of a document being written, and the dtype of each
+ARRAY_FILES = {'ids': np.int32, 'word_offsets': np.int64, 'text': np.uint8, 'text_offsets': np.int64}
+
+class TokenizedDocument:
+    """A stored document, opened with mmap
+
+    ids holds the vocabulary index of every word, sentence after
+    sentence; word_offsets[i] is where sentence i starts in ids. parts
+    lists the sentence each part of an EDGAR submission starts at and
+    its Document and Sequence labels; a plain text has one unlabeled part.
+    """
+    
+    def __init__(self, path: str):
+        load = lambda name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+        self.vocabulary = unpack_strings(load('vocabulary_text'), load('vocabulary_offsets'))
+        self.ids = load('ids')
+        self.word_offsets = load('word_offsets')
+        self.text = load('text')
+        self.text_offsets = load('text_offsets')
+        with open(os.path.join(path, PARTS_NAME), 'r', encoding='utf-8') as f:
+            self.parts: List[Dict] = json.load(f)
+    
+    def sentence_count(self) -> int:
+        return len(self.word_offsets) - 1
+    
+    def sentences(self, start: int, stop: int) -> List[str]:
+        """Decode sentences start to stop"""
+        return unpack_utf8(self.text, self.text_offsets, start, stop)
+
+def _raw_to_npy(raw_path: str, npy_path: str, dtype):
+    """Turn a file of raw array items into a .npy file, a chunk at a time"""
+    count = os.path.getsize(raw_path) // np.dtype(dtype).itemsize
+    if not count:
+        np.save(npy_path, np.empty(0, dtype=dtype))
+        return
+    source = np.memmap(raw_path, dtype=dtype, mode='r', shape=(count,))
+    target = np.lib.format.open_memmap(npy_path, mode='w+', dtype=dtype, shape=(count,))
+    for start in range(0, count, COPY_ITEMS):
+        target[start:start + COPY_ITEMS] = source[start:start + COPY_ITEMS]
+    target.flush()
+    del source, target
+
+class TokenWriter:
+    """Writes one document to a TokenStore batch by batch
+
+    Word ids and sentence text go to files as they are added; nothing is
+    visible in the store until commit. Errors are printed and the
+    document is discarded.
+    """
+    
+    def __init__(self, store: 'TokenStore', key: str):
+        self.store = store
+        self.key = key
+        self.vocabulary: Dict[str, int] = {}
+        self.parts: List[Dict] = []
+        self.sentence_count = 0
+        self.word_count = 0
+        self.text_bytes = 0
+        self.failed = False
+        self._files: Dict[str, BinaryIO] = {}
+        try:
+            os.makedirs(store.store_dir, exist_ok=True)
+            self.temp_dir = tempfile.mkdtemp(suffix=".tmp", dir=store.store_dir)
+            for name in ARRAY_FILES:
+                self._files[name] = open(os.path.join(self.temp_dir, name + '.raw'), 'wb')
+            self._files['word_offsets'].write(np.zeros(1, dtype=np.int64).tobytes())
+            self._files['text_offsets'].write(np.zeros(1, dtype=np.int64).tobytes())
+        except OSError as e:
+            self.temp_dir = None
+            self._fail(e)
+    
+    def add(self, sentences: Sequence[str], words: Sequence[List[str]], labels: Optional[Dict] = None):
+        """Append sentences and the words of each; labels are the Document and Sequence of EDGAR parts"""
+        if self.failed:
+            return
+        labels = labels or {}
+        if not self.parts or self.parts[-1]['labels'] != labels:
+            self.parts.append({'start': self.sentence_count, 'labels': labels})
+        
+        vocabulary = self.vocabulary
+        ids = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for sentence in words for word in sentence),
+                          dtype=np.int32)
+        lengths = np.fromiter((len(sentence) for sentence in words), dtype=np.int64, count=len(words))
+        text, text_offsets = pack_utf8(sentences)
+        try:
+            self._files['ids'].write(ids.tobytes())
+            self._files['word_offsets'].write((self.word_count + np.cumsum(lengths)).tobytes())
+            self._files['text'].write(text.tobytes())
+            self._files['text_offsets'].write((self.text_bytes + text_offsets[1:]).tobytes())
+        except OSError as e:
+            self._fail(e)
+            return
+        self.sentence_count += len(sentences)
+        self.word_count += len(ids)
+        self.text_bytes += len(text)
+    
+    def commit(self) -> bool:
+        """Finish the document and move it into the store; returns False if it could not be stored"""
+        if self.failed:
+            return False
+        path = os.path.join(self.store.store_dir, self.key)
+        try:
+            self._close_files()
+            document_dir = os.path.join(self.temp_dir, 'document')
+            os.makedirs(document_dir)
+            for name, dtype in ARRAY_FILES.items():
+                raw_path = os.path.join(self.temp_dir, name + '.raw')
+                _raw_to_npy(raw_path, os.path.join(document_dir, name + '.npy'), dtype)
+                os.remove(raw_path)
+            vocabulary_text, vocabulary_offsets = pack_strings(list(self.vocabulary))
+            np.save(os.path.join(document_dir, 'vocabulary_text.npy'), vocabulary_text)
+            np.save(os.path.join(document_dir, 'vocabulary_offsets.npy'), vocabulary_offsets)
+            with open(os.path.join(document_dir, PARTS_NAME), 'w', encoding='utf-8') as f:
+                json.dump(self.parts or [{'start': 0, 'labels': {}}], f)
+            os.replace(document_dir, path)
+        except Exception as e:
+            # Another process may have stored the same document first
+            if not os.path.isdir(path):
+                self._fail(e)
+                return False
+        finally:
+            self.discard()
+        
+        self.store.evict()
+        return True
+    
+    def discard(self):
+        """Drop the document without storing it"""
+        self._close_files()
+        if self.temp_dir is not None:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+    
+    def _close_files(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+    
+    def _fail(self, error: Exception):
+        print(f"Error storing tokens: {error}")
+        self.failed = True
+        self.discard()
+
+class TokenStore:
+    """Tokenized documents stored on disk by content key
+
+    Safe to share between threads and processes: a document is only
+    visible once completely written.
+    """
+    
+    def __init__(self, store_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(document_hash: str, fingerprint: str, encoding: Optional[str] = None) -> str:
+        """Get the store key of a document read with an encoding
+
+        fingerprint is TextProcessor.splitter_fingerprint: stored sentences
+        depend on the sentence splitter, but not on the stopwords, which
+        are applied when matching.
+        """
+        parts = [document_hash, str(TOKENIZER_VERSION), fingerprint, encoding or '']
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[TokenizedDocument]:
+        """Open a stored document, or get None if there is none"""
+        path = os.path.join(self.store_dir, key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            document = TokenizedDocument(path)
+        except Exception as e:
+            print(f"Error reading stored tokens: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return document
+    
+    def writer(self, key: str) -> Optional[TokenWriter]:
+        """Start writing a document, or get None if it is already stored"""
+        if os.path.isdir(os.path.join(self.store_dir, key)):
+            return None
+        return TokenWriter(self, key)
+    
+    def evict(self):
+        """Remove the least recently used documents until the store fits its size limit
+
+        Temporary directories older than STALE_TEMP_SECONDS are removed too.
+        """
+        with self._lock:
+            self._remove_stale_temp()
+            entries = []
+            for name in self._document_names():
+                path = os.path.join(self.store_dir, name)
+                try:
+                    size = sum(entry.stat().st_size for entry in os.scandir(path))
+                    entries.append((os.stat(path).st_mtime, size, path))
+                except OSError:
+                    continue
+            
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+    
+    def clear(self):
+        """Remove all stored documents"""
+        with self._lock:
+            for name in self._document_names():
+                shutil.rmtree(os.path.join(self.store_dir, name), ignore_errors=True)
+    
+    def _remove_stale_temp(self):
+        try:
+            names = [name for name in os.listdir(self.store_dir) if name.endswith('.tmp')]
+        except OSError:
+            return
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        for name in names:
+            path = os.path.join(self.store_dir, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+    
+    def _document_names(self) -> List[str]:
+        try:
+            return [name for name in os.listdir(self.store_dir) if not name.endswith('.tmp')]
+        except OSError:
+            return []
\ No newline at end of file
@@ -0,0 +1,387 @@
+"""
+Local HTTP/JSON analysis service
+
+    python marklex.py serve --port 8765 --lexicon lexicon.xlsx --workers 4
+
+Loads the embedding models and compiles the lexicon once, then serves
+other tools on localhost:
+
+    GET  /health   status, loaded models and batching counters
+    POST /analyze  {"text": "..."} or {"path": "filings/file.txt", "encoding": null}
+    POST /expand   {"terms": ["marketing", "market share"], "topn": 20, "collection": null}
+
+Expand requests that arrive together are scored in one batch (one matrix
+product per model); analysis requests are spread over a process pool.
+Only the standard library is used for HTTP, so the service runs offline.
+
+Requests must name a loopback Host (or one of allowed_hosts), so web
+pages can't reach the service through DNS rebinding. Files can only be
+analyzed by path when the service is given a root directory, and only
+files under it.
+"""
+
+import asyncio
+import codecs
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from core.analyzer import Analyzer, init_worker_analyzer, worker_analyzer
+from core.lexicon_expander import DEFAULT_TOP_N, LexiconExpander
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# How long the first expand request of a batch waits for others, in seconds
+BATCH_WINDOW = 0.002
+
+# Terms scored together at most
+MAX_BATCH_TERMS = 256
+
+# Largest accepted request body, in bytes
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# Largest accepted request line or header line, in bytes
+MAX_LINE_BYTES = 64 * 1024
+
+# Host header names always accepted
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+def host_name(host: str) -> str:
+    """Get the name of a Host header without its port"""
+    host = host.strip().lower()
+    if host.startswith('['):
+        return host[1:host.find(']')] if ']' in host else host
+    return host.rsplit(':', 1)[0] if host.count(':') == 1 else host
+
+class HTTPError(Exception):
+    """Error answered with an HTTP status and a JSON message"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ExpandBatcher:
+    """Collects concurrent expand requests and scores them together
+
+    Requests wait up to BATCH_WINDOW for company. While a batch is being
+    scored, new requests queue up and go out as the next batch when it
+    finishes, so batches grow with load.
+    """
+
+    def __init__(self, expander: LexiconExpander, executor: ThreadPoolExecutor,
+                 window: float = BATCH_WINDOW, max_terms: int = MAX_BATCH_TERMS):
+        self.expander = expander
+        self.executor = executor
+        self.window = window
+        self.max_terms = max_terms
+        self.batches = 0
+        self.terms = 0
+        self._pending: Dict[Optional[str], List[Tuple[str, int, asyncio.Future]]] = {}
+        self._timers: Dict[Optional[str], asyncio.TimerHandle] = {}
+        self._in_flight = set()
+
+    async def expand(self, term: str, n_words: int, collection: Optional[str] = None) -> pd.DataFrame:
+        """Expand one term as part of the next batch; raises ValueError like expand"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(collection, [])
+        pending.append((term, n_words, future))
+
+        if collection not in self._in_flight:
+            if len(pending) >= self.max_terms:
+                self._flush(collection)
+            elif collection not in self._timers:
+                self._timers[collection] = loop.call_later(self.window, self._flush, collection)
+        return await future
+
+    def _flush(self, collection: Optional[str]):
+        """Start scoring the pending requests of a collection"""
+        timer = self._timers.pop(collection, None)
+        if timer is not None:
+            timer.cancel()
+        if collection in self._in_flight or not self._pending.get(collection):
+            return
+
+        batch = self._pending[collection][:self.max_terms]
+        self._pending[collection] = self._pending[collection][self.max_terms:]
+        self._in_flight.add(collection)
+        self.batches += 1
+        self.terms += len(batch)
+
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self.executor, self.expander.expand_batch,
+                                    [term for term, _, _ in batch], [n for _, n, _ in batch], collection)
+        task.add_done_callback(lambda done: self._finish(collection, batch, done))
+
+    def _finish(self, collection: Optional[str], batch: list, done: asyncio.Future):
+        """Hand out a batch's results and send the next batch"""
+        self._in_flight.discard(collection)
+        error = done.exception()
+        results = done.result() if error is None else [error] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        # Requests that queued during this batch have waited long enough
+        if self._pending.get(collection):
+            self._flush(collection)
+
+def _warm_up() -> int:
+    """Make sure a worker process has its analyzer"""
+    return len(worker_analyzer().entities)
+
+def _analyze_request(text: str, path: Optional[str], encoding: Optional[str]) -> pd.DataFrame:
+    """Analyze text or a file in a worker process"""
+    analyzer = worker_analyzer()
+    if path:
+        return analyzer.analyze_file(path, encoding)
+    return analyzer.analyze_text(text)
+
+def _json_default(value):
+    """Convert numpy scalars for json.dumps"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class AnalysisService:
+    """HTTP/JSON front end over an Analyzer pool and a LexiconExpander"""
+
+    def __init__(self, analyzer: Analyzer, expander: LexiconExpander, workers: int = 1,
+                 root: Optional[str] = None, allowed_hosts: Iterable[str] = ()):
+        self.analyzer = analyzer
+        self.expander = expander
+        self.workers = max(1, workers)
+        self.root = os.path.realpath(root) if root else None
+        self.allowed_hosts = set(LOOPBACK_HOSTS) | {host_name(host) for host in allowed_hosts}
+        self.started = time.time()
+        self.requests = 0
+        self._server = None
+        self._process_pool = None
+        self._thread_pool = None
+        self.batcher = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Tuple[str, int]:
+        """Start the worker pools and listen; returns the bound address"""
+        # Spawn rather than fork: the service runs threads
+        self._process_pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=init_worker_analyzer,
+                                                 initargs=(self.analyzer.lexicon,))
+        # Start every worker now so the first requests don't wait for NLTK setup
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._process_pool, _warm_up) for _ in range(self.workers)))
+
+        self._thread_pool = ThreadPoolExecutor(2, thread_name_prefix="marklex-expand")
+        self.batcher = ExpandBatcher(self.expander, self._thread_pool)
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_LINE_BYTES)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Serve until cancelled"""
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """Stop listening and shut down the worker pools"""
+        if self._server is not None:
+            self._server.close()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown()
+        self.expander.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one connection, keeping it open between them"""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, keep_alive, body, host = request
+                    if host_name(host) not in self.allowed_hosts:
+                        raise HTTPError(HTTPStatus.FORBIDDEN, f"Host {host!r} is not allowed")
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload, keep_alive = e.status, {'error': str(e)}, False
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    status, payload, keep_alive = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}, False
+
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Read one request; returns (method, path, keep_alive, body, host) or None at end of stream"""
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            parts = line.decode('latin-1').split()
+            if len(parts) != 3:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+            method, path, version = parts
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request line or header too long")
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        return method.upper(), path.split('?', 1)[0], keep_alive, body, headers.get('host', '')
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, keep_alive: bool):
+        """Write a JSON response"""
+        body = json.dumps(payload, default=_json_default).encode('utf-8')
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, dict]:
+        """Route a request to its handler"""
+        self.requests += 1
+        routes = {
+            ('GET', '/health'): self._health,
+            ('POST', '/analyze'): self._analyze,
+            ('POST', '/expand'): self._expand,
+        }
+        handler = routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in routes):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {path}")
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No endpoint {path}")
+
+        params = {}
+        if method == 'POST':
+            try:
+                params = json.loads(body or b'{}')
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+            if not isinstance(params, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+        return HTTPStatus.OK, await handler(params)
+
+    async def _health(self, params: dict) -> dict:
+        """Report status, loaded models and batching counters"""
+        memory = self.expander.embedding_manager.get_memory_status()
+        return {
+            'status': 'ok',
+            'uptime_seconds': time.time() - self.started,
+            'requests': self.requests,
+            'workers': self.workers,
+            'entities': self.analyzer.entities,
+            'models': {model_id: {'label': model['label'], 'loaded': model['loaded']}
+                       for model_id, model in memory['models'].items()},
+            'expand_batches': self.batcher.batches,
+            'expand_terms': self.batcher.terms,
+        }
+
+    async def _analyze(self, params: dict) -> dict:
+        """Analyze text or a local file in the process pool"""
+        text = params.get('text', "")
+        path = params.get('path')
+        encoding = params.get('encoding')
+        if not isinstance(text, str) or (path is not None and not isinstance(path, str)):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "text and path must be strings")
+        if not text and not path:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Give text or path")
+        if encoding is not None:
+            try:
+                codecs.lookup(encoding)
+            except (TypeError, LookupError):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown encoding {encoding!r}")
+        if path:
+            path = self._resolve_path(path)
+
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            df = await loop.run_in_executor(self._process_pool, _analyze_request, text, path, encoding)
+        except OSError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        return {
+            'columns': list(df.columns),
+            'rows': df.values.tolist(),
+            'sentences': len(df),
+            'seconds': time.perf_counter() - start,
+        }
+
+    def _resolve_path(self, path: str) -> str:
+        """Resolve a requested path under the root directory; raises HTTPError outside it"""
+        if self.root is None:
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Analyzing files by path is disabled; start the service with --root")
+        resolved = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([resolved, self.root]) != self.root:
+            raise HTTPError(HTTPStatus.FORBIDDEN, "path is outside the served root directory")
+        return resolved
+
+    async def _expand(self, params: dict) -> dict:
+        """Expand terms; concurrent requests share batches"""
+        terms = params.get('terms', [params['term']] if 'term' in params else [])
+        topn = params.get('topn', DEFAULT_TOP_N)
+        collection = params.get('collection')
+        if not isinstance(terms, list) or not terms or not all(isinstance(term, str) for term in terms):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Give term or a list of terms")
+        if not isinstance(topn, int) or topn < 1:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "topn must be a positive integer")
+
+        outcomes = await asyncio.gather(*(self.batcher.expand(term, topn, collection) for term in terms),
+                                        return_exceptions=True)
+        results = []
+        for term, outcome in zip(terms, outcomes):
+            if isinstance(outcome, ValueError):
+                results.append({'term': term, 'similar': [], 'error': str(outcome)})
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                similar = [{'word': word, 'score': score}
+                           for word, score in zip(outcome['Similar Word'], outcome['Similarity Score'])]
+                results.append({'term': term, 'similar': similar, 'error': None})
+        return {'results': results}
+
+async def run_service(analyzer: Analyzer, expander: LexiconExpander, host: str = DEFAULT_HOST,
+                      port: int = DEFAULT_PORT, workers: int = 1, on_ready=None,
+                      root: Optional[str] = None, allowed_hosts: Iterable[str] = ()):
+    """Run the service until cancelled; on_ready is called with the bound (host, port)"""
+    service = AnalysisService(analyzer, expander, workers, root, allowed_hosts)
+    try:
+        address = await service.start(host, port)
+        if on_ready is not None:
+            on_ready(address)
+        await service.serve_forever()
+    finally:
+        service.close()
\ No newline at end of file
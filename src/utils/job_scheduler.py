@@ -0,0 +1,268 @@
+"""
+Shared background job scheduler on a QThreadPool
+
+Jobs are plain callables that receive a JobContext for progress, partial
+results and cooperative cancellation. The scheduler bounds concurrency,
+deduplicates identical in-flight requests by key and runs interactive
+jobs ahead of batch jobs. Every job carries a StageTimer for its stages;
+given a log directory, the scheduler logs them and can profile each job.
+While memory sampling is on, each job's peak and retained memory is
+logged with its timings.
+"""
+
+import heapq
+import itertools
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from utils.stage_timer import (StageLog, StageTimer, format_megabytes, format_seconds, job_profiling_requested,
+                               profile_path, profiled)
+from utils.memory_sampler import measured
+
+# Job priorities; higher runs first
+PRIORITY_BATCH = 0
+PRIORITY_INTERACTIVE = 10
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+class JobError(Exception):
+    """Job failure whose message is shown to the user as is"""
+
+class JobSignals(QObject):
+    """Signals of a job, delivered on the thread that created it"""
+    
+    partial_ready = pyqtSignal(object)       # Partial result
+    progress_updated = pyqtSignal(int, int, int)  # Done, total (0 if unknown), percent
+    finished = pyqtSignal(object, bool)      # Result, True if cancelled
+    error_occurred = pyqtSignal(str)         # Error message
+    done = pyqtSignal()                      # Internal: job left the running set
+
+class JobContext:
+    """Handle passed to job functions"""
+    
+    def __init__(self, job: 'Job'):
+        self._job = job
+    
+    def is_cancelled(self) -> bool:
+        """Check if the job should stop; poll this between units of work"""
+        return self._job.is_cancelled()
+    
+    def report_progress(self, done: int, total: int = 0, percent: int = 0):
+        """Report progress to subscribers"""
+        self._job.progress = (done, total, percent)
+        self._job.signals.progress_updated.emit(done, total, percent)
+    
+    def emit_partial(self, result: Any):
+        """Deliver a partial result to subscribers"""
+        self._job.signals.partial_ready.emit(result)
+    
+    @property
+    def timer(self) -> StageTimer:
+        """Get the timer for the stages of the job"""
+        return self._job.timer
+    
+    @property
+    def profile_path(self) -> Optional[str]:
+        """Get the file the job's profile is written to, or None if jobs are not profiled"""
+        return self._job.profile_path
+
+class Job(QRunnable):
+    """A unit of work scheduled on the shared thread pool"""
+    
+    def __init__(self, fn: Callable[[JobContext], Any], key: Optional[Hashable],
+                 name: str, priority: int):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.key = key
+        self.name = name
+        self.priority = priority
+        self.state = QUEUED
+        self.progress = (0, 0, 0)
+        self.signals = JobSignals()
+        self.timer = StageTimer()
+        self.seconds: Optional[float] = None  # Run time, once finished
+        self.profile_path: Optional[str] = None
+        self._cancelled = False
+    
+    def cancel(self):
+        """Request cooperative cancellation"""
+        self._cancelled = True
+    
+    def is_cancelled(self) -> bool:
+        """Check if cancellation was requested"""
+        return self._cancelled
+    
+    def run(self):
+        """Run the job function on a pool thread"""
+        self.state = RUNNING
+        start = time.perf_counter()
+        try:
+            try:
+                with profiled(self.profile_path), measured(self.timer, 'job'):
+                    result = self.fn(JobContext(self))
+            finally:
+                self.seconds = time.perf_counter() - start
+            self.state = CANCELLED if self._cancelled else FINISHED
+            self.signals.finished.emit(result, self._cancelled)
+        except JobError as e:
+            self.state = FAILED
+            self.signals.error_occurred.emit(str(e))
+        except Exception as e:
+            self.state = FAILED
+            self.signals.error_occurred.emit(f"{self.name} failed: {str(e)}")
+        finally:
+            self.signals.done.emit()
+
+class JobScheduler(QObject):
+    """Bounded, deduplicating, prioritized job runner
+
+    One pool slot is kept free of batch jobs, so an interactive request
+    never waits behind long-running batch work.
+    """
+    
+    status_changed = pyqtSignal()
+    
+    def __init__(self, max_workers: Optional[int] = None, parent: Optional[QObject] = None,
+                 log_dir: Optional[str] = None):
+        super().__init__(parent)
+        self.stage_log = StageLog(log_dir) if log_dir else None
+        self.profile_dir = log_dir if log_dir and job_profiling_requested() else None
+        self.pool = QThreadPool(self)
+        if max_workers is None:
+            max_workers = max(2, min(4, QThreadPool.globalInstance().maxThreadCount()))
+        self.max_workers = max_workers
+        self.pool.setMaxThreadCount(max_workers)
+        
+        self._sequence = itertools.count()
+        self._pending: List[tuple] = []
+        self._running: List[Job] = []
+        self._by_key: Dict[Hashable, Job] = {}
+    
+    def submit(self, fn: Callable[[JobContext], Any], key: Optional[Hashable] = None,
+               name: str = "Job", priority: int = PRIORITY_BATCH) -> Job:
+        """Schedule a job, or return the in-flight job with the same key
+
+        The job starts once control returns to the event loop. Subscribers
+        to a returned in-flight job only receive signals emitted from then on.
+        """
+        if key is not None:
+            existing = self._by_key.get(key)
+            if existing is not None and not existing.is_cancelled():
+                return existing
+        
+        job = Job(fn, key, name, priority)
+        if self.profile_dir:
+            job.profile_path = profile_path(self.profile_dir, name)
+        job.signals.done.connect(lambda: self._on_job_done(job))
+        job.signals.progress_updated.connect(lambda *_: self.status_changed.emit())
+        if key is not None:
+            self._by_key[key] = job
+        
+        heapq.heappush(self._pending, (-priority, next(self._sequence), job))
+        # Start from the event loop so the caller can connect to the job's signals first
+        QTimer.singleShot(0, self._dispatch)
+        self.status_changed.emit()
+        return job
+    
+    def cancel(self, job: Optional[Job]):
+        """Cancel a queued or running job"""
+        if job is None:
+            return
+        job.cancel()
+        
+        # Queued jobs never start, so finish them here
+        for i, (_, _, pending) in enumerate(self._pending):
+            if pending is job:
+                self._pending.pop(i)
+                heapq.heapify(self._pending)
+                job.state = CANCELLED
+                self._forget(job)
+                job.signals.finished.emit(None, True)
+                self.status_changed.emit()
+                break
+    
+    def cancel_all(self):
+        """Cancel every queued and running job"""
+        for _, _, job in list(self._pending):
+            self.cancel(job)
+        for job in list(self._running):
+            job.cancel()
+    
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Block until running jobs finish; queued jobs are not started meanwhile"""
+        return self.pool.waitForDone(msecs)
+    
+    def _dispatch(self):
+        """Start queued jobs while slots are free"""
+        while self._pending:
+            job = self._pending[0][2]
+            limit = self.max_workers
+            if job.priority < PRIORITY_INTERACTIVE and self.max_workers > 1:
+                limit -= 1
+            if len(self._running) >= limit:
+                break
+            
+            heapq.heappop(self._pending)
+            self._running.append(job)
+            self.pool.start(job, job.priority)
+    
+    def _forget(self, job: Job):
+        """Drop a job from the deduplication table"""
+        if job.key is not None and self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+    
+    def _on_job_done(self, job: Job):
+        """Handle a job leaving the pool"""
+        if job in self._running:
+            self._running.remove(job)
+        self._forget(job)
+        self._dispatch()
+        self.status_changed.emit()
+    
+    def record_timings(self, job: Job, **fields) -> str:
+        """Log the stage timings of a finished job; returns them as status bar text"""
+        if self.stage_log is not None:
+            self.stage_log.record(job.name, job.timer, job.seconds, state=job.state, **fields)
+        text = f"{job.name} took {format_seconds(job.seconds or 0.0)}"
+        stages = job.timer.summary()
+        if stages:
+            text = f"{text} ({stages})"
+        
+        # A job run in the worker process peaks there rather than in this process
+        usage = job.timer.memory.get('worker') or job.timer.memory.get('job') or {}
+        if 'peak' in usage:
+            text += f", peak +{format_megabytes(usage['peak'])}, retained {format_megabytes(usage['retained'])}"
+        return text
+    
+    def get_status(self) -> Dict:
+        """Get a snapshot of queued and running jobs"""
+        jobs = [
+            {'name': job.name, 'state': job.state, 'progress': job.progress, 'priority': job.priority}
+            for job in self._running + [entry[2] for entry in sorted(self._pending)]
+        ]
+        return {'running': len(self._running), 'queued': len(self._pending), 'jobs': jobs}
+    
+    def status_text(self) -> str:
+        """Get a one-line job summary for the status bar"""
+        running = len(self._running)
+        queued = len(self._pending)
+        if not running and not queued:
+            return ""
+        parts = []
+        if running == 1:
+            job = self._running[0]
+            percent = job.progress[2]
+            parts.append(f"{job.name} ({percent}%)" if percent else job.name)
+        elif running:
+            parts.append(f"{running} jobs running")
+        if queued:
+            parts.append(f"{queued} queued")
+        return ", ".join(parts)
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Peak and retained memory of jobs, model loads and exports
+
+Off by default. Run with --profile-memory (or MARKLEX_PROFILE_MEMORY=1),
+or pick a mode in Diagnostics, to sample the process resident set size
+on a background thread while each job runs. --profile-memory=python also
+traces Python allocations with tracemalloc, which catches spikes between
+samples but slows allocation-heavy code down. Results are added to the
+job's StageTimer and so end up in the stage timing log.
+
+Only the standard library is required; psutil is used if installed.
+"""
+
+import contextlib
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from utils.stage_timer import StageTimer
+
+MEMORY_FLAG = "--profile-memory"
+MEMORY_ENV = "MARKLEX_PROFILE_MEMORY"
+
+# Sampling modes: resident set size only, or also traced Python allocations
+MODE_RSS = 'rss'
+MODE_PYTHON = 'python'
+MEMORY_MODES = (MODE_RSS, MODE_PYTHON)
+
+# Seconds between resident set size samples
+SAMPLE_INTERVAL = 0.01
+
+_mode: Optional[str] = None
+
+def memory_mode_requested(argv: Optional[List[str]] = None) -> Optional[str]:
+    """Get the sampling mode requested on the command line or environment, or None"""
+    argv = sys.argv if argv is None else argv
+    for arg in argv:
+        if arg == MEMORY_FLAG:
+            return MODE_RSS
+        if arg.startswith(MEMORY_FLAG + "="):
+            return MODE_PYTHON if arg.split("=", 1)[1] == MODE_PYTHON else MODE_RSS
+    value = os.environ.get(MEMORY_ENV, "")
+    if value in ("", "0"):
+        return None
+    return MODE_PYTHON if value == MODE_PYTHON else MODE_RSS
+
+def set_memory_mode(mode: Optional[str]):
+    """Turn memory sampling off (None) or on for jobs started from now on"""
+    global _mode
+    if mode is not None and mode not in MEMORY_MODES:
+        raise ValueError(f"Unknown memory sampling mode: {mode}")
+    _mode = mode
+
+def memory_mode() -> Optional[str]:
+    """Get the memory sampling mode of this process"""
+    return _mode
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+    
+    class _ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+    
+    def _windows_rss() -> Optional[int]:
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+
+def current_rss() -> Optional[int]:
+    """Get the resident set size of this process in bytes, or None if it can't be read"""
+    try:
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        if sys.platform == "win32":
+            return _windows_rss()
+        with open("/proc/self/statm", 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_started = False
+
+def _start_tracing() -> bool:
+    """Start tracing Python allocations; returns True if no other sampler is tracing"""
+    global _trace_users, _trace_started
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_started = True
+        _trace_users += 1
+        if _trace_users == 1:
+            # The traced peak is only this sampler's while no other sampler overlaps it
+            tracemalloc.reset_peak()
+            return True
+        return False
+
+def _stop_tracing():
+    """Stop tracing once the last sampler is done, unless tracing was on before"""
+    global _trace_users, _trace_started
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_started:
+            tracemalloc.stop()
+            _trace_started = False
+
+class MemorySampler:
+    """Samples memory from entering to leaving a block
+
+    usage then holds, in bytes, rss_before, rss_after and rss_peak, with
+    peak (highest sample above rss_before) and retained (rss_after above
+    rss_before); with trace_python also python_peak and python_retained.
+    Memory is process-wide, so overlapping jobs count towards each other.
+    """
+    
+    def __init__(self, trace_python: bool = False, interval: float = SAMPLE_INTERVAL):
+        self.trace_python = trace_python
+        self.interval = interval
+        self.usage: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._alone = False
+    
+    def __enter__(self) -> 'MemorySampler':
+        self.usage = {}
+        self._rss_before = current_rss()
+        self._rss_peak = self._rss_before
+        if self.trace_python:
+            self._alone = _start_tracing()
+            self._traced_before = tracemalloc.get_traced_memory()[0]
+            self._traced_peak = self._traced_before
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MarkLex memory sampler", daemon=True)
+        self._thread.start()
+        return self
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and self._rss_peak is not None:
+            self._rss_peak = max(self._rss_peak, rss)
+        if self.trace_python:
+            self._traced_peak = max(self._traced_peak, tracemalloc.get_traced_memory()[0])
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        
+        rss_after = current_rss()
+        if self._rss_before is not None and rss_after is not None:
+            self.usage.update({
+                'rss_before': self._rss_before,
+                'rss_after': rss_after,
+                'rss_peak': self._rss_peak,
+                'peak': self._rss_peak - self._rss_before,
+                'retained': rss_after - self._rss_before,
+            })
+        if self.trace_python:
+            traced_after, traced_peak = tracemalloc.get_traced_memory()
+            if self._alone:
+                self._traced_peak = max(self._traced_peak, traced_peak)
+            self.usage['python_peak'] = self._traced_peak - self._traced_before
+            self.usage['python_retained'] = traced_after - self._traced_before
+            _stop_tracing()
+
+@contextlib.contextmanager
+def measured(timer: Optional[StageTimer], section: str) -> Iterator[Optional[MemorySampler]]:
+    """Sample memory over a block and record it on timer as section; does nothing while sampling is off
+
+    Gives the sampler, or None if sampling is off.
+    """
+    mode = _mode
+    if mode is None:
+        yield None
+        return
+    
+    sampler = MemorySampler(trace_python=mode == MODE_PYTHON)
+    try:
+        with sampler:
+            yield sampler
+    finally:
+        if timer is not None:
+            timer.record_memory(section, sampler.usage)
+
+def extrapolate(points: Sequence[Tuple[float, float]], size: float) -> Optional[float]:
+    """Estimate y at size from (size, y) points with a least-squares line
+
+    One point, or points all of one size, are scaled proportionally.
+    Returns None without points.
+    """
+    points = [(x, y) for x, y in points if x > 0]
+    if not points:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return mean_y * size / mean_x
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+    return mean_y + slope * (size - mean_x)
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Memory limits of loaded embedding models, set in the Setup tab
+
+The budget and idle timeout are saved with QSettings. The environment
+variables MARKLEX_MEMORY_BUDGET_MB and MARKLEX_IDLE_TIMEOUT_MIN override
+the saved values for one run; 0 means no budget or never unloading.
+"""
+
+import os
+from typing import Dict, Optional
+
+from PyQt6.QtCore import QSettings
+
+from models.embedding_manager import DEFAULT_IDLE_TIMEOUT
+
+MEMORY_BUDGET_ENV = "MARKLEX_MEMORY_BUDGET_MB"
+IDLE_TIMEOUT_ENV = "MARKLEX_IDLE_TIMEOUT_MIN"
+
+MEMORY_BUDGET_KEY = "models/memory_budget_mb"
+IDLE_TIMEOUT_KEY = "models/idle_timeout_min"
+
+def _megabytes_to_bytes(megabytes: float) -> Optional[int]:
+    return int(megabytes * 1024 * 1024) if megabytes > 0 else None
+
+def _minutes_to_seconds(minutes: float) -> Optional[float]:
+    return minutes * 60 if minutes > 0 else None
+
+def _env_number(name: str) -> Optional[float]:
+    """Read a non-negative number from the environment, or None if unset or invalid"""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        print(f"Ignoring {name}={value!r}: not a number")
+        return None
+    return number if number >= 0 else None
+
+def env_overrides() -> Dict[str, bool]:
+    """Check which limits are set in the environment"""
+    return {'memory_budget': _env_number(MEMORY_BUDGET_ENV) is not None,
+            'idle_timeout': _env_number(IDLE_TIMEOUT_ENV) is not None}
+
+def load_memory_limits() -> Dict[str, Optional[float]]:
+    """Get the memory_budget (bytes) and idle_timeout (seconds) for EmbeddingManager; None is no limit"""
+    settings = QSettings()
+    budget_mb = _env_number(MEMORY_BUDGET_ENV)
+    if budget_mb is None:
+        budget_mb = float(settings.value(MEMORY_BUDGET_KEY, 0))
+    timeout_min = _env_number(IDLE_TIMEOUT_ENV)
+    if timeout_min is None:
+        timeout_min = float(settings.value(IDLE_TIMEOUT_KEY, DEFAULT_IDLE_TIMEOUT / 60))
+    return {'memory_budget': _megabytes_to_bytes(budget_mb), 'idle_timeout': _minutes_to_seconds(timeout_min)}
+
+def save_memory_limits(budget_mb: Optional[int] = None, timeout_min: Optional[int] = None):
+    """Save the limits given in the Setup tab; 0 is no budget or never unloading"""
+    settings = QSettings()
+    if budget_mb is not None:
+        settings.setValue(MEMORY_BUDGET_KEY, budget_mb)
+    if timeout_min is not None:
+        settings.setValue(IDLE_TIMEOUT_KEY, timeout_min)
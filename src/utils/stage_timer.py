@@ -0,0 +1,229 @@
+"""
+Per-stage timing of analysis and lexicon jobs
+
+A StageTimer adds up the time a job spends in each named stage, such as
+tokenizing, cleaning, matching or rendering, along with the size of its
+input and, when memory sampling is on, its memory use; StageLog appends
+the totals of each job as a JSON line to stage_timings.jsonl in the user
+cache directory. Timing is always on and costs two clock reads per stage
+entry.
+
+Run with --profile-jobs or MARKLEX_PROFILE_JOBS=1 to also write a cProfile
+profile per job to the profiles directory next to the log. Only the
+standard library is imported here, so the models can use it without Qt.
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
+
+PROFILE_FLAG = "--profile-jobs"
+PROFILE_ENV = "MARKLEX_PROFILE_JOBS"
+
+STAGE_LOG_NAME = "stage_timings.jsonl"
+PROFILE_DIR_NAME = "profiles"
+
+# The log is rotated to stage_timings.jsonl.1 when it grows past this
+MAX_LOG_BYTES = 5 * 1024 * 1024
+
+T = TypeVar('T')
+
+class StageTimer:
+    """Seconds and entry counts per stage of one job
+
+    Stages can be timed from several threads, e.g. matching on a job
+    thread while the results are rendered on the GUI thread. sizes counts
+    what the job processed (characters, sentences, ngrams) and memory
+    holds the usage measured per section (see utils.memory_sampler).
+    """
+    
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.sizes: Dict[str, int] = {}
+        self.memory: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, stage: str, seconds: float, count: int = 1):
+        """Add time spent in a stage"""
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + count
+    
+    def add_size(self, name: str, amount: int):
+        """Count input processed, e.g. characters or sentences"""
+        with self._lock:
+            self.sizes[name] = self.sizes.get(name, 0) + amount
+    
+    def record_memory(self, section: str, usage: Dict[str, int]):
+        """Set the memory used by a section of the job, e.g. the whole job or a model load"""
+        with self._lock:
+            self.memory[section] = dict(usage)
+    
+    @contextlib.contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time a block as part of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+    
+    def iterate(self, stage: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Iterate, timing each step of the iterable (not of the loop body) as a stage"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, time.perf_counter() - start)
+                return
+            self.add(stage, time.perf_counter() - start)
+            yield item
+    
+    def state(self) -> Dict[str, Dict]:
+        """Get the totals as plain dicts, e.g. to send them to another process"""
+        with self._lock:
+            return {'seconds': dict(self.seconds), 'counts': dict(self.counts), 'sizes': dict(self.sizes),
+                    'memory': {section: dict(usage) for section, usage in self.memory.items()}}
+    
+    def merge(self, state: Dict[str, Dict]):
+        """Add totals from state() of another timer"""
+        for stage, seconds in state['seconds'].items():
+            self.add(stage, seconds, state['counts'].get(stage, 0))
+        for name, amount in state.get('sizes', {}).items():
+            self.add_size(name, amount)
+        for section, usage in state.get('memory', {}).items():
+            self.record_memory(section, usage)
+    
+    def total(self) -> float:
+        """Get the time spent in all stages"""
+        with self._lock:
+            return sum(self.seconds.values())
+    
+    def summary(self) -> str:
+        """Format the stages in the order they were first entered, e.g. tokenize 1.20 s, match 310 ms"""
+        with self._lock:
+            stages = list(self.seconds.items())
+        return ", ".join(f"{stage} {format_seconds(seconds)}" for stage, seconds in stages)
+
+def format_megabytes(size: int) -> str:
+    """Format a byte count in MB"""
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def format_seconds(seconds: float) -> str:
+    """Format a duration for the status bar"""
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    return f"{seconds:.2f} s"
+
+def timed(timer: Optional[StageTimer], stage: str):
+    """Time a block with timer, if there is one"""
+    return timer.stage(stage) if timer is not None else contextlib.nullcontext()
+
+def timed_iter(timer: Optional[StageTimer], stage: str, iterable: Iterable[T]) -> Iterable[T]:
+    """Time the steps of an iterable with timer, if there is one"""
+    return timer.iterate(stage, iterable) if timer is not None else iterable
+
+class StageLog:
+    """Job timings appended as JSON lines to a file in the log directory
+
+    Each record has the job name, its run time in seconds, seconds and
+    counts per stage, input sizes and, if sampled, memory per section.
+    """
+    
+    def __init__(self, log_dir: str):
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, STAGE_LOG_NAME)
+        self._lock = threading.Lock()
+    
+    def record(self, job: str, timer: StageTimer, seconds: Optional[float] = None, **fields) -> bool:
+        """Append a job's stage totals and wall time; returns False if the log can't be written"""
+        state = timer.state()
+        entry = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'job': job,
+            'seconds': seconds,
+            'stages': state['seconds'],
+            'counts': state['counts'],
+            'sizes': state['sizes'],
+            **fields,
+        }
+        if state['memory']:
+            entry['memory'] = state['memory']
+        try:
+            with self._lock:
+                os.makedirs(self.log_dir, exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_LOG_BYTES:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + '\n')
+            return True
+        except Exception as e:
+            print(f"Error writing stage timings: {e}")
+            return False
+    
+    def read_records(self, limit: int = 200) -> List[Dict]:
+        """Read the most recent records, oldest first"""
+        try:
+            with self._lock:
+                if not os.path.exists(self.path):
+                    return []
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()[-limit:]
+        except Exception as e:
+            print(f"Error reading stage timings: {e}")
+            return []
+        
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A line cut short by a crash
+                continue
+        return records
+
+def job_profiling_requested(argv: Optional[List[str]] = None) -> bool:
+    """Check if per-job profiles were requested on the command line or environment"""
+    argv = sys.argv if argv is None else argv
+    return PROFILE_FLAG in argv or os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+def profile_path(log_dir: str, job: str) -> str:
+    """Get a new profile file path for a job, e.g. profiles/text_analysis-20250101_120000_000000.prof"""
+    name = re.sub(r'\W+', '_', job.lower()).strip('_') or 'job'
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return os.path.join(log_dir, PROFILE_DIR_NAME, f"{name}-{timestamp}.prof")
+
+@contextlib.contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """Profile a block of the calling thread with cProfile and dump it to path; does nothing without a path"""
+    if path is None:
+        yield
+        return
+    
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as e:
+        # Only one profiler can be active at a time on newer Pythons
+        print(f"Not profiling {os.path.basename(path)}: {e}")
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            profile.dump_stats(path)
+        except Exception as e:
+            print(f"Error writing profile: {e}")
\ No newline at end of file
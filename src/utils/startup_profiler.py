@@ -0,0 +1,126 @@
+"""
+Startup profiling: per-module import times and initialization milestones
+
+Enabled with --profile-startup or MARKLEX_PROFILE_STARTUP=1. Only the
+standard library is imported here, so the profiler can be installed
+before anything heavy is loaded.
+"""
+
+import builtins
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_ENV = "MARKLEX_PROFILE_STARTUP"
+
+# Imports faster than this are left out of the log, in seconds
+MIN_IMPORT_SECONDS = 0.002
+
+def profiling_requested(argv: Optional[List[str]] = None) -> bool:
+    """Check if startup profiling was requested on the command line or environment"""
+    argv = sys.argv if argv is None else argv
+    return PROFILE_FLAG in argv or os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+def _module_label(name: str, globals: Optional[dict], fromlist, level: int) -> str:
+    """Get a readable module name for an import statement, resolving relative imports"""
+    if not level:
+        return name
+    package = (globals or {}).get('__package__') or ''
+    if level > 1:
+        package = package.rsplit('.', level - 1)[0]
+    if name:
+        return f"{package}.{name}"
+    return f"{package}.{{{', '.join(fromlist or ())}}}"
+
+class StartupProfiler:
+    """Records import times and named milestones from process start"""
+    
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.imports: List[Tuple[int, str, float]] = []  # Depth, module, seconds (inclusive)
+        self._original_import = None
+        self._depth = 0
+    
+    def install(self):
+        """Start timing imports"""
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+    
+    def uninstall(self):
+        """Stop timing imports"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+    
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Modules that are already loaded cost nothing worth recording
+        if level == 0 and name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        
+        label = _module_label(name, globals, fromlist, level)
+        index = len(self.imports)
+        self.imports.append((self._depth, label, 0.0))
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.imports[index] = (self._depth, label, time.perf_counter() - start)
+    
+    def mark(self, label: str):
+        """Record a milestone"""
+        self.marks.append((label, time.perf_counter() - self.start_time))
+    
+    def watch_first_paint(self, widget, label: str = "First paint"):
+        """Record a milestone when the widget is first painted"""
+        from PyQt6.QtCore import QObject, QEvent
+        
+        profiler = self
+        
+        class PaintWatcher(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Type.Paint:
+                    obj.removeEventFilter(self)
+                    profiler.mark(label)
+                return False
+        
+        self._paint_watcher = PaintWatcher(widget)
+        widget.installEventFilter(self._paint_watcher)
+    
+    def report(self) -> str:
+        """Format milestones and slow imports as text"""
+        lines = ["Startup milestones (seconds since start):"]
+        for label, seconds in self.marks:
+            lines.append(f"  {seconds:8.3f}  {label}")
+        
+        lines.append("")
+        lines.append(f"Imports slower than {MIN_IMPORT_SECONDS * 1000:.0f} ms (inclusive, nested by import):")
+        for depth, name, seconds in self.imports:
+            if seconds >= MIN_IMPORT_SECONDS:
+                lines.append(f"  {seconds:8.3f}  {'  ' * depth}{name}")
+        
+        lines.append("")
+        lines.append("Slowest top-level imports:")
+        top_level = sorted((entry for entry in self.imports if entry[0] == 0 and entry[2] >= MIN_IMPORT_SECONDS),
+                           key=lambda entry: -entry[2])
+        for _, name, seconds in top_level[:15]:
+            lines.append(f"  {seconds:8.3f}  {name}")
+        return "\n".join(lines) + "\n"
+    
+    def write_log(self, log_dir: str) -> Optional[str]:
+        """Write the report to startup_profile.log in log_dir"""
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            path = os.path.join(log_dir, "startup_profile.log")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.report())
+            return path
+        except Exception as e:
+            print(f"Error writing startup profile: {e}")
+            return None
\ No newline at end of file
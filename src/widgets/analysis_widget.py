@@ -7,67 +7,149 @@ from datetime import datetime
 from typing import Optional
 
 import pandas as pd
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QPushButton, QTextEdit, QTableWidget, QTableWidgetItem,
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                            QPushButton, QTextEdit, QTableView, QHeaderView,
                             QGroupBox, QMessageBox, QFileDialog, QProgressDialog,
-                            QFrame, QSplitter, QScrollArea)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+                            QFrame, QSplitter, QScrollArea, QCheckBox, QComboBox)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 
+from core.analyzer import Analyzer
 from models.embedding_manager import EmbeddingManager
 from models.text_processor import TextProcessor
 from models.lexicon_manager import LexiconManager
+from models.text_reader import detect_encoding, page_count, read_page, read_text_file
+from models.edgar_reader import is_edgar_submission
+from models.analysis_worker import AnalysisWorker
+from models.result_cache import RESULT_CACHE_DIR, ResultCache, hash_file, hash_text
+from models.token_store import TOKEN_STORE_DIR, TokenStore
+from models.live_analysis import LiveAnalysis, split_paragraphs
+from widgets.export_thread import start_export
+from widgets.results_model import ResultsTableModel
+from utils.job_scheduler import JobContext, JobError, JobScheduler, PRIORITY_BATCH, PRIORITY_INTERACTIVE
 
-class TextAnalysisThread(QThread):
-    """Thread for text analysis to prevent UI blocking"""
-    
-    result_ready = pyqtSignal(pd.DataFrame)
-    error_occurred = pyqtSignal(str)
-    
-    def __init__(self, text_processor: TextProcessor, text_input: str, lexicon: pd.DataFrame):
-        super().__init__()
-        self.text_processor = text_processor
-        self.text_input = text_input
-        self.lexicon = lexicon
-    
-    def run(self):
-        """Analyze text in separate thread"""
-        try:
-            result = self.text_processor.analyze_text(self.text_input, self.lexicon)
-            self.result_ready.emit(result)
-        except Exception as e:
-            self.error_occurred.emit(f"Error analyzing text: {str(e)}")
+# Files larger than this are analyzed from disk and only previewed in the editor
+LARGE_FILE_BYTES = 2 * 1024 * 1024
+
+# Sentences per result batch; also bounds how long a cancel takes to be honoured
+ANALYSIS_BATCH_SIZE = 250
+
+# Rows sampled when sizing result columns; match flags and document tags are short
+RESIZE_SAMPLE_ROWS = 20
+
+# Pause in typing before live analysis re-scores the text, in milliseconds
+LIVE_ANALYSIS_DELAY_MS = 400
+
+def run_text_analysis(context: JobContext, text_processor: TextProcessor, text_input: str,
+                      lexicon: pd.DataFrame, file_path: Optional[str] = None,
+                      encoding: Optional[str] = None, worker: Optional[AnalysisWorker] = None,
+                      lexicon_version: Optional[str] = None, cache: Optional[ResultCache] = None,
+                      token_dir: Optional[str] = None) -> int:
+    """Analyze text or a file as a scheduler job, emitting result batches
+
+    With a worker the analysis runs in its process and this thread only
+    relays results. With a cache and lexicon version, results of a document
+    analyzed before are read from the cache, and new complete results are
+    stored in it. With a token_dir, documents tokenized before are matched
+    from the TokenStore there. Stages are timed with the job's timer.
+    Returns the number of sentences analyzed.
+    """
+    try:
+        # Hashed once here for the result cache and the token store
+        cache_key = None
+        document_hash = None
+        if cache is not None and lexicon_version is not None:
+            with context.timer.stage('cache_read'):
+                document_hash = hash_file(file_path) if file_path else hash_text(text_input)
+                cache_key = ResultCache.key(document_hash, lexicon_version, text_processor.fingerprint, encoding)
+                cached = cache.get(cache_key)
+            if cached is not None and len(cached):
+                context.emit_partial(cached)
+                context.report_progress(len(cached), len(cached), 100)
+                return len(cached)
+
+        if worker is not None:
+            # The worker profiles its own process; this thread only waits on the pipe
+            worker_profile = None
+            if context.profile_path:
+                worker_profile = os.path.splitext(context.profile_path)[0] + "-worker.prof"
+            updates = worker.iter_analysis(lexicon, lexicon_version, text_input, file_path, encoding,
+                                           ANALYSIS_BATCH_SIZE, context.is_cancelled, context.timer,
+                                           worker_profile, token_dir, document_hash)
+        else:
+            with context.timer.stage('compile'):
+                analyzer = Analyzer(lexicon, text_processor, TokenStore(token_dir) if token_dir else None)
+            updates = analyzer.iter_updates(text_input, file_path, encoding, ANALYSIS_BATCH_SIZE, context.timer,
+                                            document_hash)
+
+        done = 0
+        batches = []
+        for batch, done, total, percent in updates:
+            if context.is_cancelled():
+                break
+            context.emit_partial(batch)
+            context.report_progress(done, total, percent)
+            if cache_key is not None:
+                batches.append(batch)
+
+        if done == 0 and not context.is_cancelled():
+            context.emit_partial(pd.DataFrame({'Text': ['No sentences found']}))
+        elif batches and not context.is_cancelled():
+            with context.timer.stage('cache_write'):
+                cache.put(cache_key, pd.concat(batches, ignore_index=True))
+        return done
+    except Exception as e:
+        raise JobError(f"Error analyzing text: {str(e)}")
 
 class AnalysisWidget(QWidget):
     """Widget for text analysis"""
-    
-    def __init__(self, embedding_manager: EmbeddingManager):
+
+    status_message = pyqtSignal(str)  # Stage timings of the last run, for the status bar
+
+    def __init__(self, embedding_manager: EmbeddingManager, job_scheduler: JobScheduler):
         super().__init__()
         self.embedding_manager = embedding_manager
+        self.job_scheduler = job_scheduler
         self.text_processor = TextProcessor()
         self.lexicon_manager = LexiconManager(embedding_manager.app_dirs)
         self.current_data = None
         self.current_text_preview = ""
-        self.analysis_thread = None
-        
+        self.analysis_job = None
+        self.analysis_worker = AnalysisWorker()
+        self.result_cache = ResultCache(os.path.join(embedding_manager.app_dirs.user_cache_dir, RESULT_CACHE_DIR))
+        self.token_dir = os.path.join(embedding_manager.app_dirs.user_cache_dir, TOKEN_STORE_DIR)
+        self.live_analysis = LiveAnalysis(self.text_processor)
+        self.live_generation = 0
+        self.loaded_file = None
+        self.loaded_file_encoding = None
+        self.preview_page = 0
+        self.export_thread = None
+
         self.setup_ui()
-    
+
+        # Live analysis runs once typing pauses
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_ANALYSIS_DELAY_MS)
+        self.live_timer.timeout.connect(self.run_live_analysis)
+        self.text_input.textChanged.connect(self.on_text_changed)
+
     def setup_ui(self):
         """Setup the user interface"""
         # Main layout
         layout = QVBoxLayout(self)
-        
+
         # Title
         title = QLabel("Text Analysis")
         title.setProperty("class", "title")
         layout.addWidget(title)
-        
+
         # Instructions
         instructions_frame = QFrame()
         instructions_frame.setFrameStyle(QFrame.Shape.StyledPanel)
         instructions_frame.setStyleSheet("background-color: #f8f9fa; border: 1px solid #dee2e6; border-radius: 5px;")
         instructions_layout = QVBoxLayout(instructions_frame)
-        
+
         instructions_text = QLabel("""
         <b>📝 Instructions:</b> This section provides a demonstration of lexicon usage. 
         The system analyzes text against eight business dimensions: <b>Marketing, ESG, DEI, Risk & Security, 
@@ -77,98 +159,172 @@ class AnalysisWidget(QWidget):
         instructions_text.setWordWrap(True)
         instructions_layout.addWidget(instructions_text)
         layout.addWidget(instructions_frame)
-        
+
         # Create splitter for input and results
         splitter = QSplitter(Qt.Orientation.Vertical)
         layout.addWidget(splitter)
-        
+
         # Input section
         input_widget = QWidget()
         input_layout = QVBoxLayout(input_widget)
-        
+
         # Text input
         input_group = QGroupBox("Text Input")
         input_group_layout = QVBoxLayout(input_group)
-        
+
         self.text_input = QTextEdit()
         self.text_input.setPlaceholderText("Paste your text here for analysis...")
         self.text_input.setMaximumHeight(200)
         input_group_layout.addWidget(self.text_input)
-        
+
+        # Large file preview controls
+        self.preview_bar = QWidget()
+        preview_layout = QHBoxLayout(self.preview_bar)
+        preview_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.preview_label = QLabel("")
+        self.preview_label.setStyleSheet("color: #666;")
+        preview_layout.addWidget(self.preview_label)
+        preview_layout.addStretch()
+
+        self.prev_page_button = QPushButton("◀ Previous")
+        self.prev_page_button.setProperty("class", "secondary")
+        self.prev_page_button.clicked.connect(lambda: self.show_preview_page(self.preview_page - 1))
+        preview_layout.addWidget(self.prev_page_button)
+
+        self.next_page_button = QPushButton("Next ▶")
+        self.next_page_button.setProperty("class", "secondary")
+        self.next_page_button.clicked.connect(lambda: self.show_preview_page(self.preview_page + 1))
+        preview_layout.addWidget(self.next_page_button)
+
+        self.close_file_button = QPushButton("Close File")
+        self.close_file_button.setProperty("class", "secondary")
+        self.close_file_button.clicked.connect(self.close_loaded_file)
+        preview_layout.addWidget(self.close_file_button)
+
+        self.preview_bar.setVisible(False)
+        input_group_layout.addWidget(self.preview_bar)
+
         # Control buttons
         button_layout = QHBoxLayout()
-        
+
         self.analyze_button = QPushButton("Analyze Text")
         self.analyze_button.clicked.connect(self.analyze_text)
         button_layout.addWidget(self.analyze_button)
-        
+
         self.reset_button = QPushButton("Reset Analysis")
         self.reset_button.setProperty("class", "secondary")
         self.reset_button.clicked.connect(self.reset_analysis)
         button_layout.addWidget(self.reset_button)
-        
+
         self.load_file_button = QPushButton("Load Text File")
         self.load_file_button.setProperty("class", "secondary")
         self.load_file_button.clicked.connect(self.load_text_file)
         button_layout.addWidget(self.load_file_button)
-        
+
         button_layout.addStretch()
+
+        self.live_checkbox = QCheckBox("Live analysis")
+        self.live_checkbox.setToolTip("Re-score the text as you type; only changed paragraphs are re-analyzed")
+        self.live_checkbox.toggled.connect(self.set_live_mode)
+        button_layout.addWidget(self.live_checkbox)
+
+        self.separate_process_checkbox = QCheckBox("Run in separate process")
+        self.separate_process_checkbox.setToolTip(
+            "Analyze in a background process so the window stays responsive during long analyses"
+        )
+        self.separate_process_checkbox.setChecked(True)
+        button_layout.addWidget(self.separate_process_checkbox)
+
         input_group_layout.addLayout(button_layout)
-        
+
         input_layout.addWidget(input_group)
         splitter.addWidget(input_widget)
-        
+
         # Results section
         results_widget = QWidget()
         results_layout = QVBoxLayout(results_widget)
-        
+
         # Results header
         results_header = QHBoxLayout()
-        
+
         self.results_label = QLabel("Analysis results will appear here")
         self.results_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
         self.results_label.setStyleSheet("color: #666; font-style: italic;")
         results_header.addWidget(self.results_label)
-        
+
         results_header.addStretch()
-        
+
         self.export_button = QPushButton("📥 Export Analysis Data")
         self.export_button.clicked.connect(self.export_data)
         self.export_button.setEnabled(False)
         results_header.addWidget(self.export_button)
-        
+
         results_layout.addLayout(results_header)
-        
-        # Results table
-        self.results_table = QTableWidget()
+
+        # Entity filter, shown with the results
+        self.filter_bar = QWidget()
+        filter_layout = QHBoxLayout(self.filter_bar)
+        filter_layout.setContentsMargins(0, 0, 0, 0)
+        filter_layout.addWidget(QLabel("Show sentences matching"))
+
+        self.filter_mode_combo = QComboBox()
+        self.filter_mode_combo.addItems(["all of", "any of"])
+        self.filter_mode_combo.currentIndexChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.filter_mode_combo)
+
+        self.filter_checkbox_layout = QHBoxLayout()
+        filter_layout.addLayout(self.filter_checkbox_layout)
+        self.filter_checkboxes = {}
+
+        filter_layout.addStretch()
+
+        self.filter_count_label = QLabel("")
+        self.filter_count_label.setStyleSheet("color: #666;")
+        filter_layout.addWidget(self.filter_count_label)
+
+        self.filter_bar.setVisible(False)
+        results_layout.addWidget(self.filter_bar)
+
+        # Results table; click a header to sort, starting in document order
+        self.results_model = ResultsTableModel(self)
+        self.results_model.modelReset.connect(self.update_filter_count)
+        self.results_model.rowsInserted.connect(self.update_filter_count)
+        self.results_model.rowsRemoved.connect(self.update_filter_count)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.results_table.horizontalHeader().setResizeContentsPrecision(RESIZE_SAMPLE_ROWS)
+        self.results_table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.results_table.setSortingEnabled(True)
         self.results_table.setVisible(False)
         results_layout.addWidget(self.results_table)
-        
+
         splitter.addWidget(results_widget)
-        
+
         # Set splitter sizes (40% input, 60% results)
         splitter.setSizes([400, 600])
-        
+
         # Lexicon info section
         self.setup_lexicon_info(layout)
-    
+
     def setup_lexicon_info(self, layout):
         """Setup lexicon information section"""
         lexicon_info = QGroupBox("📊 Current Lexicon Dimensions")
         lexicon_layout = QVBoxLayout(lexicon_info)
-        
+
         # Create scrollable area for lexicon info
         scroll_area = QScrollArea()
         scroll_area.setMaximumHeight(150)
         scroll_area.setWidgetResizable(True)
-        
+
         info_widget = QWidget()
         info_layout = QVBoxLayout(info_widget)
-        
+
         # Load and display lexicon information
         lexicon = self.lexicon_manager.load_lexicon()
         entities = self.lexicon_manager.get_entities()
-        
+
         info_text = "<p><b>Available analysis dimensions:</b></p><ul>"
         for entity in entities:
             keywords = self.lexicon_manager.get_keywords_for_entity(entity)
@@ -177,15 +333,15 @@ class AnalysisWidget(QWidget):
                 keyword_preview += f" (and {len(keywords) - 5} more)"
             info_text += f"<li><b>{entity}</b>: {keyword_preview}</li>"
         info_text += "</ul>"
-        
+
         info_label = QLabel(info_text)
         info_label.setWordWrap(True)
         info_layout.addWidget(info_label)
-        
+
         scroll_area.setWidget(info_widget)
         lexicon_layout.addWidget(scroll_area)
         layout.addWidget(lexicon_info)
-    
+
     def load_text_file(self):
         """Load text from file"""
         filename, _ = QFileDialog.getOpenFileName(
@@ -194,148 +350,369 @@ class AnalysisWidget(QWidget):
             "",
             "Text files (*.txt);;All files (*)"
         )
-        
+
         if filename:
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                self.text_input.setPlainText(content)
+                self.close_loaded_file()
+                encoding = detect_encoding(filename)
+                # Submissions are split into documents on disk, so never load them into the editor
+                if os.path.getsize(filename) > LARGE_FILE_BYTES or is_edgar_submission(filename):
+                    self.open_large_file(filename, encoding)
+                else:
+                    self.text_input.setPlainText(read_text_file(filename, encoding))
             except Exception as e:
                 QMessageBox.critical(self, "Load Failed", f"Failed to load file:\\n{str(e)}")
-    
+
+    def open_large_file(self, filename: str, encoding: str):
+        """Keep a large file on disk and show a paged, read-only preview"""
+        # Live analysis only covers editable text
+        self.live_checkbox.setChecked(False)
+        self.live_checkbox.setEnabled(False)
+        self.loaded_file = filename
+        self.loaded_file_encoding = encoding
+        self.text_input.setReadOnly(True)
+        self.preview_bar.setVisible(True)
+        self.show_preview_page(0)
+
+    def show_preview_page(self, page: int):
+        """Show one page of the loaded file in the editor"""
+        if not self.loaded_file:
+            return
+
+        total_pages = page_count(self.loaded_file)
+        self.preview_page = max(0, min(page, total_pages - 1))
+        text, _ = read_page(self.loaded_file, self.preview_page, self.loaded_file_encoding)
+        self.text_input.setPlainText(text)
+
+        size_mb = os.path.getsize(self.loaded_file) / (1024 * 1024)
+        self.preview_label.setText(
+            f"Previewing {os.path.basename(self.loaded_file)} ({size_mb:.1f} MB), "
+            f"page {self.preview_page + 1} of {total_pages}. The full file is analyzed from disk."
+        )
+        self.prev_page_button.setEnabled(self.preview_page > 0)
+        self.next_page_button.setEnabled(self.preview_page < total_pages - 1)
+
+    def close_loaded_file(self):
+        """Leave large file mode and return to the editable text input"""
+        if not self.loaded_file:
+            return
+        self.loaded_file = None
+        self.loaded_file_encoding = None
+        self.preview_page = 0
+        self.preview_bar.setVisible(False)
+        self.text_input.setReadOnly(False)
+        self.text_input.clear()
+        self.live_checkbox.setEnabled(True)
+
     def analyze_text(self):
         """Analyze the input text"""
-        text = self.text_input.toPlainText().strip()
-        if not text:
+        text = "" if self.loaded_file else self.text_input.toPlainText().strip()
+        if not text and not self.loaded_file:
             QMessageBox.warning(self, "No Text", "Please enter some text to analyze.")
             return
-        
+
         # Disable controls during analysis
-        self.analyze_button.setEnabled(False)
+        self.set_controls_enabled(False)
         self.analyze_button.setText("Analyzing...")
-        
-        # Show progress dialog
-        self.progress = QProgressDialog("Analyzing text...", "Cancel", 0, 0, self)
-        self.progress.setModal(True)
+
+        # Batches fill the table as they arrive
+        self.current_data = None
+        self.results_model.set_dataframe(None)
+        self.results_label.setText("Analyzing...")
+        self.results_label.setStyleSheet("color: #666; font-style: italic;")
+
+        # Show progress dialog; non-modal so partial results can be browsed
+        self.progress = QProgressDialog("Analyzing text...", "Cancel", 0, 100, self)
+        self.progress.setAutoClose(False)
+        self.progress.setAutoReset(False)
         self.progress.show()
-        
+
         # Load lexicon
         lexicon = self.lexicon_manager.load_lexicon()
-        
-        # Start analysis thread
-        self.analysis_thread = TextAnalysisThread(self.text_processor, text, lexicon)
-        self.analysis_thread.result_ready.connect(self.on_analysis_ready)
-        self.analysis_thread.error_occurred.connect(self.on_analysis_error)
-        self.analysis_thread.start()
-    
-    def on_analysis_ready(self, df: pd.DataFrame):
-        """Handle analysis completion"""
-        self.progress.close()
-        
-        self.current_data = df
+
+        # Identical text (or unchanged file) against the same lexicon shares one job
+        if self.loaded_file:
+            stat = os.stat(self.loaded_file)
+            source_key = ('file', self.loaded_file, stat.st_size, stat.st_mtime)
+        else:
+            # The text itself, so the job hashes it just once, off this thread
+            source_key = ('text', text)
+        lexicon_version = self.lexicon_manager.lexicon_version()
+        key = ('analyze', source_key, lexicon_version)
+
+        # Start analysis job
+        file_path, encoding = self.loaded_file, self.loaded_file_encoding
+        worker = self.analysis_worker if self.separate_process_checkbox.isChecked() else None
+        self.analysis_job = self.job_scheduler.submit(
+            lambda context: run_text_analysis(context, self.text_processor, text, lexicon, file_path,
+                                              encoding, worker, lexicon_version, self.result_cache,
+                                              self.token_dir),
+            key=key,
+            name="Text analysis",
+            priority=PRIORITY_BATCH
+        )
+        self.analysis_job.signals.partial_ready.connect(self.on_batch_ready)
+        self.analysis_job.signals.progress_updated.connect(self.on_progress_updated)
+        self.analysis_job.signals.finished.connect(self.on_analysis_finished)
+        self.analysis_job.signals.error_occurred.connect(self.on_analysis_error)
+        job = self.analysis_job
+        self.progress.canceled.connect(lambda: self.job_scheduler.cancel(job))
+
+    def showEvent(self, event):
+        """Warm up the analysis worker when the tab is first shown"""
+        super().showEvent(event)
+        if self.separate_process_checkbox.isChecked():
+            self.analysis_worker.start()
+
+    def shutdown(self):
+        """Stop the analysis worker process; call once running jobs have finished"""
+        self.analysis_worker.stop()
+
+    def on_text_changed(self):
+        """Restart the live analysis delay on every edit"""
+        if self.live_checkbox.isChecked() and not self.loaded_file:
+            self.live_timer.start()
+
+    def set_live_mode(self, enabled: bool):
+        """Turn live analysis on or off"""
+        self.live_timer.stop()
+        self.live_generation += 1
+        self.live_analysis.reset()
+        self.analyze_button.setEnabled(not enabled)
+        if enabled:
+            # Live results replace whatever the table showed
+            self.current_data = None
+            self.results_model.set_dataframe(None)
+            self.run_live_analysis()
+
+    def run_live_analysis(self):
+        """Re-analyze the paragraphs changed since the last live update"""
+        if not self.live_checkbox.isChecked() or self.loaded_file:
+            return
+
+        lexicon_version = self.lexicon_manager.lexicon_version()
+        if self.live_analysis.set_lexicon(self.lexicon_manager.load_lexicon(), lexicon_version):
+            # Every row may change with the lexicon, so start from an empty table
+            self.live_analysis.reset()
+            self.results_model.set_dataframe(None)
+
+        paragraphs = split_paragraphs(self.text_input.toPlainText())
+        pending = self.live_analysis.pending_paragraphs(paragraphs)
+        self.live_generation += 1
+        generation = self.live_generation
+        if not pending:
+            self.apply_live_results(generation, lexicon_version, paragraphs, {}, False)
+            return
+
+        compiled = self.live_analysis.compiled
+        job = self.job_scheduler.submit(
+            lambda context: self.live_analysis.analyze_paragraphs(pending, compiled),
+            name="Live analysis",
+            priority=PRIORITY_INTERACTIVE
+        )
+        job.signals.finished.connect(
+            lambda results, cancelled: self.apply_live_results(generation, lexicon_version, paragraphs,
+                                                               results, cancelled)
+        )
+        job.signals.error_occurred.connect(self.on_live_analysis_error)
+
+    def apply_live_results(self, generation: int, lexicon_version: str, paragraphs: list,
+                           results: Optional[dict], cancelled: bool):
+        """Patch the results table with a live analysis update"""
+        if cancelled or results is None or lexicon_version != self.live_analysis.lexicon_version:
+            return
+        if generation != self.live_generation:
+            # Superseded by a newer edit; the paragraph results are still reusable
+            self.live_analysis.add_results(results)
+            return
+
+        edits = self.live_analysis.apply(paragraphs, results)
+        if self.results_model.columnCount() == 0:
+            self.display_results(self.live_analysis.result())
+        else:
+            for row, count, rows in edits:
+                self.results_model.replace_rows(row, count, rows)
+
+        sentence_count = self.live_analysis.row_count()
+        self.current_data = self.results_model.dataframe() if sentence_count else None
         self.current_text_preview = self.text_input.toPlainText()[:100]
         if len(self.text_input.toPlainText()) > 100:
             self.current_text_preview += "..."
-        
-        # Display results
-        self.display_results(df)
-        
+        self.export_button.setEnabled(self.current_data is not None)
+
+        self.results_label.setText(f"Live analysis: {sentence_count} sentences")
+        self.results_label.setStyleSheet("color: #2E5CB8; font-weight: bold;")
+
+    def on_live_analysis_error(self, error_msg: str):
+        """Handle live analysis error"""
+        self.results_label.setText(f"Live analysis error: {error_msg}")
+        self.results_label.setStyleSheet("color: red;")
+
+    def set_controls_enabled(self, enabled: bool):
+        """Enable or disable input controls around an analysis run"""
+        self.analyze_button.setEnabled(enabled and not self.live_checkbox.isChecked())
+        self.live_checkbox.setEnabled(enabled and not self.loaded_file)
+        self.separate_process_checkbox.setEnabled(enabled)
+        self.load_file_button.setEnabled(enabled)
+        self.reset_button.setEnabled(enabled)
+        self.close_file_button.setEnabled(enabled)
+
+    def on_batch_ready(self, df: pd.DataFrame):
+        """Append a batch of analyzed sentences to the table"""
+        with self.analysis_job.timer.stage('render'):
+            if self.results_model.rowCount() == 0:
+                self.display_results(df)
+            else:
+                self.results_model.append_dataframe(df)
+
+    def on_progress_updated(self, done: int, total: int, percent: int):
+        """Handle analysis progress"""
+        self.progress.setValue(percent)
+        if total:
+            self.progress.setLabelText(f"Analyzed {done:,} of {total:,} sentences")
+        else:
+            self.progress.setLabelText(f"Analyzed {done:,} sentences")
+
+    def on_analysis_finished(self, sentence_total: Optional[int], cancelled: bool):
+        """Handle analysis completion or cancellation"""
+        self.progress.close()
+
+        df = self.results_model.dataframe()
+        self.current_data = df
+        if self.loaded_file:
+            self.current_text_preview = os.path.basename(self.loaded_file)
+        else:
+            self.current_text_preview = self.text_input.toPlainText()[:100]
+            if len(self.text_input.toPlainText()) > 100:
+                self.current_text_preview += "..."
+
         # Re-enable controls
-        self.analyze_button.setEnabled(True)
+        self.set_controls_enabled(True)
         self.analyze_button.setText("Analyze Text")
-        self.export_button.setEnabled(True)
-        
+        self.export_button.setEnabled(df is not None)
+
         # Update status
-        sentence_count = len(df) if not df.empty else 0
-        self.results_label.setText(f"Analysis completed: {sentence_count} sentences analyzed")
+        sentence_count = len(df) if df is not None else 0
+        if cancelled:
+            self.results_label.setText(f"Analysis cancelled: {sentence_count} sentences analyzed (partial results)")
+        else:
+            self.results_label.setText(f"Analysis completed: {sentence_count} sentences analyzed")
         self.results_label.setStyleSheet("color: #2E5CB8; font-weight: bold;")
-    
+
+        self.status_message.emit(self.job_scheduler.record_timings(
+            self.analysis_job, sentences=sentence_count, source='file' if self.loaded_file else 'text',
+            separate_process=self.separate_process_checkbox.isChecked()
+        ))
+
     def on_analysis_error(self, error_msg: str):
         """Handle analysis error"""
         self.progress.close()
-        
+
         # Re-enable controls
-        self.analyze_button.setEnabled(True)
+        self.set_controls_enabled(True)
         self.analyze_button.setText("Analyze Text")
-        
+
         # Show error
         QMessageBox.critical(self, "Analysis Error", error_msg)
-        
+
         self.results_label.setText("Error analyzing text")
         self.results_label.setStyleSheet("color: red;")
-    
+        self.job_scheduler.record_timings(self.analysis_job)
+
     def display_results(self, df: pd.DataFrame):
         """Display analysis results in table"""
         if df.empty:
             self.results_table.setVisible(False)
+            self.filter_bar.setVisible(False)
             return
-        
+
         self.results_table.setVisible(True)
-        self.results_table.setRowCount(len(df))
-        self.results_table.setColumnCount(len(df.columns))
-        self.results_table.setHorizontalHeaderLabels(df.columns.tolist())
-        
-        # Populate table
-        for row in range(len(df)):
-            for col in range(len(df.columns)):
-                value = df.iloc[row, col]
-                # Truncate long text for display
-                if col == 0 and isinstance(value, str) and len(value) > 100:
-                    display_value = value[:97] + "..."
-                else:
-                    display_value = str(value)
-                    
-                item = QTableWidgetItem(display_value)
-                
-                # Set tooltip for full text
-                if col == 0 and isinstance(value, str):
-                    item.setToolTip(value)
-                
-                self.results_table.setItem(row, col, item)
-        
-        # Adjust column widths
-        self.results_table.resizeColumnsToContents()
-        
+        self.results_model.set_dataframe(df)
+
+        lexicon_entities = set(self.lexicon_manager.get_entities())
+        self.set_filter_entities([column for column in df.columns if column in lexicon_entities])
+
+        # Adjust column widths (sampled rows only); measuring sentence text
+        # is slow and its width is fixed anyway
+        text_column = self.results_model.text_column()
+        for column in range(df.shape[1]):
+            if column != text_column:
+                self.results_table.resizeColumnToContents(column)
+
         # Set minimum width for text column
         if df.shape[1] > 0:
-            self.results_table.setColumnWidth(0, 300)
-        
+            self.results_table.setColumnWidth(text_column, 300)
+
         # Hide row numbers
         self.results_table.verticalHeader().setVisible(False)
-    
+
+    def set_filter_entities(self, entities: list):
+        """Offer a filter checkbox per entity column, keeping existing choices"""
+        self.filter_bar.setVisible(bool(entities))
+        if entities == list(self.filter_checkboxes):
+            return
+
+        checked = {entity for entity, checkbox in self.filter_checkboxes.items() if checkbox.isChecked()}
+        for checkbox in self.filter_checkboxes.values():
+            self.filter_checkbox_layout.removeWidget(checkbox)
+            checkbox.deleteLater()
+
+        self.filter_checkboxes = {}
+        for entity in entities:
+            checkbox = QCheckBox(entity)
+            checkbox.setChecked(entity in checked)
+            checkbox.toggled.connect(self.apply_filter)
+            self.filter_checkbox_layout.addWidget(checkbox)
+            self.filter_checkboxes[entity] = checkbox
+        self.apply_filter()
+
+    def apply_filter(self):
+        """Show only sentences that hit the checked entities"""
+        entities = [entity for entity, checkbox in self.filter_checkboxes.items() if checkbox.isChecked()]
+        self.results_model.set_filter(entities, match_any=self.filter_mode_combo.currentIndex() == 1)
+
+    def update_filter_count(self):
+        """Show how many sentences pass the filter"""
+        if self.results_model.is_filtered():
+            self.filter_count_label.setText(
+                f"Showing {self.results_model.rowCount():,} of {self.results_model.total_row_count():,} sentences"
+            )
+        else:
+            self.filter_count_label.setText("")
+
     def reset_analysis(self):
         """Reset analysis data and UI"""
         self.current_data = None
         self.current_text_preview = ""
-        
+        self.live_analysis.reset()
+
+        self.close_loaded_file()
         self.text_input.clear()
+        self.results_model.set_dataframe(None)
         self.results_table.setVisible(False)
+        self.filter_bar.setVisible(False)
         self.results_label.setText("Analysis results will appear here")
         self.results_label.setStyleSheet("color: #666; font-style: italic;")
-        
+
         self.export_button.setEnabled(False)
-    
+
     def export_data(self):
         """Export analysis results"""
         if self.current_data is None:
             QMessageBox.warning(self, "No Data", "No analysis data available to export.")
             return
-        
+
         # Generate default filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         default_filename = f"text_analysis_{timestamp}.csv"
-        
-        # Get save location
-        filename, _ = QFileDialog.getSaveFileName(
+
+        # Write the rows shown, in displayed order, in chunks on a background thread
+        chunks = self.results_model.iter_view_chunks()
+        self.export_thread = start_export(
             self,
             "Export Analysis Data",
             default_filename,
-            "CSV files (*.csv);;All files (*)"
-        )
-        
-        if filename:
-            try:
-                self.current_data.to_csv(filename, index=False)
-                QMessageBox.information(self, "Export Successful", f"Analysis data exported to:\\n{filename}")
-            except Exception as e:
-                QMessageBox.critical(self, "Export Failed", f"Failed to export data:\\n{str(e)}")
\ No newline at end of file
+            lambda: chunks,
+            total_rows=self.results_model.rowCount(),
+            stage_log=self.job_scheduler.stage_log
+        )
\ No newline at end of file
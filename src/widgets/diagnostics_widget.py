@@ -0,0 +1,171 @@
+"""
+Diagnostics dialog: memory sampling, loaded models and recent job runs
+"""
+
+from typing import Dict, List, Optional
+
+import pandas as pd
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                            QPushButton, QComboBox, QTableView, QGroupBox,
+                            QDoubleSpinBox, QHeaderView)
+
+from models.embedding_manager import EmbeddingManager
+from widgets.results_model import ResultsTableModel
+from utils.job_scheduler import JobScheduler
+from utils.memory_sampler import (MODE_PYTHON, MODE_RSS, current_rss, extrapolate,
+                                  memory_mode, set_memory_mode)
+from utils.stage_timer import format_megabytes
+
+# Memory sampling modes offered in the dialog
+MODE_LABELS = [("Off", None), ("Resident memory", MODE_RSS), ("Resident memory + Python allocations", MODE_PYTHON)]
+
+# Jobs whose input size is in characters, for estimating the memory of a corpus
+ANALYSIS_JOBS = ("Text analysis", "Live analysis")
+
+def run_memory(record: Dict) -> Dict:
+    """Get the memory of a logged run; runs in the analysis worker peak there"""
+    memory = record.get('memory', {})
+    return memory.get('worker') or memory.get('job') or memory.get('export') or {}
+
+def runs_table(records: List[Dict]) -> pd.DataFrame:
+    """Tabulate logged runs, newest first, with sizes and memory in MB"""
+    megabytes = lambda size: round(size / (1024 * 1024), 1) if size is not None else None
+    rows = []
+    for record in reversed(records):
+        sizes = record.get('sizes', {})
+        usage = run_memory(record)
+        model_load = record.get('memory', {}).get('model_load', {})
+        rows.append({
+            'Time': record.get('time', '')[:19].replace('T', ' '),
+            'Job': record.get('job', ''),
+            'Seconds': round(record.get('seconds') or 0.0, 3),
+            'Characters': sizes.get('characters', 0),
+            'Sentences': sizes.get('sentences', 0),
+            'N-grams': sizes.get('ngrams', 0),
+            'Peak MB': megabytes(usage.get('peak')),
+            'Retained MB': megabytes(usage.get('retained')),
+            'Python peak MB': megabytes(usage.get('python_peak')),
+            'Model load MB': megabytes(model_load.get('peak')),
+        })
+    return pd.DataFrame(rows)
+
+class DiagnosticsDialog(QDialog):
+    """Dialog for turning memory sampling on and reviewing what runs used"""
+    
+    def __init__(self, job_scheduler: JobScheduler, embedding_manager: Optional[EmbeddingManager], parent=None):
+        super().__init__(parent)
+        self.job_scheduler = job_scheduler
+        self.embedding_manager = embedding_manager
+        self.records: List[Dict] = []
+        
+        self.setup_ui()
+        self.refresh()
+    
+    def setup_ui(self):
+        """Setup the user interface"""
+        self.setWindowTitle("Diagnostics")
+        self.resize(900, 600)
+        layout = QVBoxLayout(self)
+        
+        # Sampling mode
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("Memory sampling:"))
+        self.mode_combo = QComboBox()
+        for label, mode in MODE_LABELS:
+            self.mode_combo.addItem(label, mode)
+        self.mode_combo.setCurrentIndex([mode for _, mode in MODE_LABELS].index(memory_mode()))
+        self.mode_combo.currentIndexChanged.connect(self.on_mode_changed)
+        mode_layout.addWidget(self.mode_combo)
+        mode_layout.addStretch()
+        layout.addLayout(mode_layout)
+        
+        mode_info = QLabel("Applies to jobs started from now on. Python allocation tracing slows analysis down.")
+        mode_info.setWordWrap(True)
+        layout.addWidget(mode_info)
+        
+        # Process and models
+        memory_group = QGroupBox("Memory")
+        memory_layout = QVBoxLayout(memory_group)
+        self.memory_label = QLabel()
+        memory_layout.addWidget(self.memory_label)
+        layout.addWidget(memory_group)
+        
+        # Recent runs
+        runs_group = QGroupBox("Recent runs")
+        runs_layout = QVBoxLayout(runs_group)
+        self.runs_model = ResultsTableModel(self)
+        self.runs_view = QTableView()
+        self.runs_view.setModel(self.runs_model)
+        self.runs_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        runs_layout.addWidget(self.runs_view)
+        layout.addWidget(runs_group)
+        
+        # Estimate for a corpus size
+        estimate_layout = QHBoxLayout()
+        estimate_layout.addWidget(QLabel("Corpus size (MB of text):"))
+        self.corpus_spin = QDoubleSpinBox()
+        self.corpus_spin.setRange(0.1, 100000.0)
+        self.corpus_spin.setValue(100.0)
+        self.corpus_spin.valueChanged.connect(self.update_estimate)
+        estimate_layout.addWidget(self.corpus_spin)
+        self.estimate_label = QLabel()
+        estimate_layout.addWidget(self.estimate_label)
+        estimate_layout.addStretch()
+        layout.addLayout(estimate_layout)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+    
+    def on_mode_changed(self, index: int):
+        """Switch memory sampling for later jobs"""
+        set_memory_mode(self.mode_combo.itemData(index))
+    
+    def refresh(self):
+        """Reload the memory status and the run log"""
+        self.update_memory_status()
+        stage_log = self.job_scheduler.stage_log
+        self.records = stage_log.read_records() if stage_log is not None else []
+        self.runs_model.set_dataframe(runs_table(self.records))
+        self.update_estimate()
+    
+    def update_memory_status(self):
+        """Show this process's memory and what loading each model took"""
+        rss = current_rss()
+        lines = [f"This process: {format_megabytes(rss) if rss is not None else 'unknown'}"]
+        
+        if self.embedding_manager is not None:
+            for info in self.embedding_manager.get_memory_status()['models'].values():
+                if not info['loaded']:
+                    continue
+                line = f"{info['label']}: {format_megabytes(info['size'])}"
+                if info['load_seconds'] is not None:
+                    line += f", loaded in {info['load_seconds']:.2f} s"
+                if info['load_memory'] and 'peak' in info['load_memory']:
+                    line += f" (peak +{format_megabytes(info['load_memory']['peak'])})"
+                lines.append(line)
+        self.memory_label.setText("\n".join(lines))
+    
+    def update_estimate(self):
+        """Estimate the peak memory of analyzing a corpus from sampled analysis runs"""
+        points = []
+        for record in self.records:
+            characters = record.get('sizes', {}).get('characters', 0)
+            usage = run_memory(record)
+            if record.get('job') in ANALYSIS_JOBS and characters and 'peak' in usage:
+                points.append((characters, usage['peak']))
+        
+        estimate = extrapolate(points, self.corpus_spin.value() * 1024 * 1024)
+        if estimate is None:
+            self.estimate_label.setText("Run analyses with memory sampling on to estimate peak memory")
+        else:
+            self.estimate_label.setText(
+                f"Estimated analysis peak: +{format_megabytes(max(estimate, 0))} (from {len(points)} runs)"
+            )
\ No newline at end of file
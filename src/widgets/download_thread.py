@@ -0,0 +1,30 @@
+"""
+Background download of embedding models for the Setup tab
+"""
+
+from typing import List
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from utils.app_dirs import AppDirs
+from models.model_registry import ModelSpec
+from models.model_downloader import ModelDownloader
+
+class DownloadThread(QThread):
+    """Thread for downloading embeddings from GitHub"""
+
+    progress_updated = pyqtSignal(int)  # Progress percentage
+    status_updated = pyqtSignal(str)    # Status message
+    download_completed = pyqtSignal(bool)  # Success/failure
+
+    def __init__(self, app_dirs: AppDirs, models: List[ModelSpec], force: bool = False):
+        super().__init__()
+        self.downloader = ModelDownloader(
+            app_dirs, models, force,
+            progress_callback=self.progress_updated.emit,
+            status_callback=self.status_updated.emit,
+        )
+
+    def run(self):
+        """Run download in separate thread"""
+        self.download_completed.emit(self.downloader.run())
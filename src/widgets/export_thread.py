@@ -0,0 +1,116 @@
+"""
+Background export of result tables with progress and cancellation
+"""
+
+import os
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+from PyQt6.QtWidgets import QWidget, QFileDialog, QMessageBox, QProgressDialog
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+
+from models.result_exporter import (EXPORT_FORMATS, ExportCancelled, ResultExporter,
+                                    available_formats, format_from_filename)
+from utils.memory_sampler import measured
+from utils.stage_timer import StageLog, StageTimer, timed
+
+class ExportThread(QThread):
+    """Thread for writing result chunks to disk
+
+    With a stage log, the export time and memory are logged as an Export job.
+    """
+    
+    progress_updated = pyqtSignal(int, int)  # Rows written, total rows (0 if unknown)
+    export_completed = pyqtSignal(str, int)  # File name, rows written
+    export_cancelled = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+    
+    def __init__(self, chunk_source: Callable[[], Iterable[pd.DataFrame]], filename: str,
+                 fmt: Optional[str] = None, total_rows: Optional[int] = None,
+                 stage_log: Optional[StageLog] = None):
+        super().__init__()
+        self.chunk_source = chunk_source
+        self.filename = filename
+        self.fmt = fmt
+        self.total_rows = total_rows
+        self.stage_log = stage_log
+        self._cancelled = False
+    
+    def cancel(self):
+        """Request cancellation; takes effect at the next chunk"""
+        self._cancelled = True
+    
+    def run(self):
+        """Export in separate thread"""
+        timer = StageTimer()
+        try:
+            exporter = ResultExporter(self.filename, self.fmt)
+            with timed(timer, 'export'), measured(timer, 'export'):
+                rows = exporter.export(
+                    self.chunk_source(),
+                    self.total_rows,
+                    progress_callback=lambda done, total: self.progress_updated.emit(done, total or 0),
+                    is_cancelled=lambda: self._cancelled,
+                )
+            timer.add_size('rows', rows)
+            if self.stage_log is not None:
+                self.stage_log.record("Export", timer, timer.total(), format=exporter.fmt)
+            self.export_completed.emit(self.filename, rows)
+        except ExportCancelled:
+            self.export_cancelled.emit()
+        except Exception as e:
+            self.error_occurred.emit(f"Failed to export data:\n{str(e)}")
+
+def start_export(parent: QWidget, title: str, default_filename: str,
+                 chunk_source: Callable[[], Iterable[pd.DataFrame]],
+                 total_rows: Optional[int] = None,
+                 stage_log: Optional[StageLog] = None) -> Optional[ExportThread]:
+    """Ask for a destination and export chunks in the background
+
+    Returns the running thread, which the caller must keep a reference to,
+    or None if the user cancelled the file dialog.
+    """
+    formats = available_formats()
+    filters = [f"{EXPORT_FORMATS[fmt][0]} (*{EXPORT_FORMATS[fmt][1]})" for fmt in formats]
+    
+    filename, selected_filter = QFileDialog.getSaveFileName(
+        parent, title, default_filename, ";;".join(filters + ["All files (*)"])
+    )
+    if not filename:
+        return None
+    
+    # Honour the chosen filter when the name has no recognised extension
+    fmt = format_from_filename(filename)
+    if selected_filter in filters and not filename.lower().endswith(EXPORT_FORMATS[fmt][1]):
+        fmt = formats[filters.index(selected_filter)]
+        filename = os.path.splitext(filename)[0] + EXPORT_FORMATS[fmt][1]
+    
+    progress = QProgressDialog("Exporting data...", "Cancel", 0, total_rows or 0, parent)
+    progress.setWindowModality(Qt.WindowModality.WindowModal)
+    progress.setMinimumDuration(500)
+    
+    thread = ExportThread(chunk_source, filename, fmt, total_rows, stage_log)
+    
+    def on_progress(done: int, total: int):
+        if total:
+            progress.setValue(min(done, total))
+        progress.setLabelText(f"Exporting data... {done:,} rows written")
+    
+    def on_completed(name: str, rows: int):
+        progress.close()
+        QMessageBox.information(parent, "Export Successful", f"{rows:,} rows exported to:\n{name}")
+    
+    def on_cancelled():
+        progress.close()
+    
+    def on_error(message: str):
+        progress.close()
+        QMessageBox.critical(parent, "Export Failed", message)
+    
+    thread.progress_updated.connect(on_progress)
+    thread.export_completed.connect(on_completed)
+    thread.export_cancelled.connect(on_cancelled)
+    thread.error_occurred.connect(on_error)
+    progress.canceled.connect(thread.cancel)
+    thread.start()
+    return thread
\ No newline at end of file
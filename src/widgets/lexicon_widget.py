@@ -7,67 +7,43 @@ from datetime import datetime
 from typing import Optional
 
 import pandas as pd
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QPushButton, QLineEdit, QSlider, QTableWidget,
-                            QTableWidgetItem, QGroupBox, QTextEdit, QMessageBox,
-                            QFileDialog, QProgressDialog, QFrame, QSplitter)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                            QPushButton, QLineEdit, QSlider, QTableView,
+                            QHeaderView, QGroupBox, QTextEdit, QMessageBox,
+                            QProgressDialog, QFrame, QSplitter, QComboBox)
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 
+from core.lexicon_expander import LexiconExpander
 from models.embedding_manager import EmbeddingManager
+from widgets.export_thread import start_export
+from widgets.results_model import ResultsTableModel
+from utils.job_scheduler import JobContext, JobError, JobScheduler, PRIORITY_INTERACTIVE
 
-class LexiconGenerationThread(QThread):
-    """Thread for generating lexicon to prevent UI blocking"""
-    
-    result_ready = pyqtSignal(pd.DataFrame)
-    error_occurred = pyqtSignal(str)
-    
-    def __init__(self, embedding_manager: EmbeddingManager, term: str, n_words: int, model_type: str):
-        super().__init__()
-        self.embedding_manager = embedding_manager
-        self.term = term
-        self.n_words = n_words
-        self.model_type = model_type
-    
-    def run(self):
-        """Generate lexicon in separate thread"""
-        try:
-            model = self.embedding_manager.get_model(self.model_type)
-            if model is None:
-                self.error_occurred.emit(f"❌ {self.model_type.title()}gram model not found or failed to load")
-                return
-            
-            term_formatted = self.term.lower().replace(' ', '_')
-            
-            if term_formatted not in model.wv.key_to_index:
-                self.error_occurred.emit(f'Word "{self.term}" not found in vocabulary')
-                return
-            
-            # Get similar words
-            similar_words = model.wv.most_similar(term_formatted, topn=self.n_words)
-            
-            # Create DataFrame
-            df = pd.DataFrame(similar_words, columns=['Similar Word', 'Similarity Score'])
-            df['Similarity Score'] = df['Similarity Score'].round(3)
-            df.insert(0, 'Word Number', range(1, len(df) + 1))
-            
-            # Clean up word formatting (replace underscores with spaces)
-            df['Similar Word'] = df['Similar Word'].str.replace('_', ' ')
-            
-            self.result_ready.emit(df)
-            
-        except Exception as e:
-            self.error_occurred.emit(f"Error generating lexicon: {str(e)}")
+def generate_lexicon(context: JobContext, expander: LexiconExpander, term: str,
+                     n_words: int, collection: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Find the words most similar to a term as a scheduler job"""
+    try:
+        return expander.expand(term, n_words, collection, is_cancelled=context.is_cancelled, timer=context.timer)
+    except ValueError as e:
+        raise JobError(str(e))
+    except Exception as e:
+        raise JobError(f"Error generating lexicon: {str(e)}")
 
 class LexiconWidget(QWidget):
     """Widget for creating lexicons"""
     
-    def __init__(self, embedding_manager: EmbeddingManager):
+    status_message = pyqtSignal(str)  # Stage timings of the last run, for the status bar
+    
+    def __init__(self, embedding_manager: EmbeddingManager, job_scheduler: JobScheduler):
         super().__init__()
         self.embedding_manager = embedding_manager
+        self.expander = LexiconExpander(embedding_manager)
+        self.job_scheduler = job_scheduler
         self.current_data = None
         self.current_term = ""
-        self.generation_thread = None
+        self.generation_job = None
+        self.export_thread = None
         
         self.setup_ui()
     
@@ -132,6 +108,14 @@ class LexiconWidget(QWidget):
         self.words_slider.valueChanged.connect(lambda v: self.words_value_label.setText(str(v)))
         input_layout.addWidget(self.words_value_label)
         
+        # Embedding model collection, e.g. a domain or model version
+        model_label = QLabel("Embedding model:")
+        input_layout.addWidget(model_label)
+        
+        self.collection_combo = QComboBox()
+        input_layout.addWidget(self.collection_combo)
+        self.update_collections()
+        
         left_layout.addWidget(input_group)
         
         # Buttons
@@ -168,7 +152,13 @@ class LexiconWidget(QWidget):
         right_layout.addWidget(self.results_label)
         
         # Results table
-        self.results_table = QTableWidget()
+        self.results_model = ResultsTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        # Click a header to sort, e.g. by similarity score; starts in generated order
+        self.results_table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.results_table.setSortingEnabled(True)
         self.results_table.setVisible(False)
         right_layout.addWidget(self.results_table)
         
@@ -222,6 +212,23 @@ class LexiconWidget(QWidget):
         instructions_layout.addWidget(instructions_text)
         layout.addWidget(instructions_group)
     
+    def showEvent(self, event):
+        """Pick up models added to the registry since the tab was last shown"""
+        super().showEvent(event)
+        self.update_collections()
+    
+    def update_collections(self):
+        """List the registered model collections, keeping the selection"""
+        collections = self.embedding_manager.registry.collections()
+        current = self.collection_combo.currentText()
+        if collections == [self.collection_combo.itemText(i) for i in range(self.collection_combo.count())]:
+            return
+        
+        self.collection_combo.clear()
+        self.collection_combo.addItems(collections)
+        if current in collections:
+            self.collection_combo.setCurrentText(current)
+    
     def create_lexicon(self):
         """Create lexicon from input parameters"""
         term = self.term_input.text().strip()
@@ -235,9 +242,9 @@ class LexiconWidget(QWidget):
             QMessageBox.warning(self, "Invalid Input", "Please enter maximum 2 words.")
             return
         
-        # Determine model type
-        model_type = 'uni' if word_count == 1 else 'bi'
+        model_type = LexiconExpander.model_type(term)
         n_words = self.words_slider.value()
+        collection = self.collection_combo.currentText() or None
         
         # Disable controls during generation
         self.create_button.setEnabled(False)
@@ -248,23 +255,52 @@ class LexiconWidget(QWidget):
         self.progress.setModal(True)
         self.progress.show()
         
-        # Start generation thread
-        self.generation_thread = LexiconGenerationThread(
-            self.embedding_manager, term, n_words, model_type
+        # Start generation job; repeated requests for the same term share it
+        term_formatted = term.lower().replace(' ', '_')
+        self.generation_job = self.job_scheduler.submit(
+            lambda context: generate_lexicon(context, self.expander, term, n_words, collection),
+            key=('expand', collection, model_type, term_formatted, n_words),
+            name="Lexicon generation",
+            priority=PRIORITY_INTERACTIVE
         )
-        self.generation_thread.result_ready.connect(self.on_lexicon_ready)
-        self.generation_thread.error_occurred.connect(self.on_lexicon_error)
-        self.generation_thread.start()
+        self.generation_job.signals.finished.connect(self.on_lexicon_ready)
+        self.generation_job.signals.error_occurred.connect(self.on_lexicon_error)
+        self.progress.canceled.connect(self.cancel_generation)
     
-    def on_lexicon_ready(self, df: pd.DataFrame):
-        """Handle lexicon generation completion"""
+    def close_progress(self):
+        """Close the progress dialog without it reporting a cancel"""
+        self.progress.canceled.disconnect(self.cancel_generation)
         self.progress.close()
+    
+    def cancel_generation(self):
+        """Cancel the running generation and restore the controls immediately"""
+        if self.generation_job is not None:
+            self.job_scheduler.cancel(self.generation_job)
+        
+        self.create_button.setEnabled(True)
+        self.create_button.setText("Create Lexicon")
+        self.results_label.setText("Lexicon generation cancelled")
+        self.results_label.setStyleSheet("color: #666; font-style: italic;")
+    
+    def is_stale_job(self) -> bool:
+        """Check if the signal being handled comes from a superseded or cancelled job"""
+        job = self.generation_job
+        return job is None or self.sender() is not job.signals or job.is_cancelled()
+    
+    def on_lexicon_ready(self, df: Optional[pd.DataFrame], cancelled: bool):
+        """Handle lexicon generation completion"""
+        # Results of superseded or cancelled jobs are dropped
+        if self.is_stale_job() or cancelled or df is None:
+            return
+        self.close_progress()
         
         self.current_data = df
         self.current_term = self.term_input.text().strip()
         
         # Update results table
-        self.display_results(df)
+        job = self.generation_job
+        with job.timer.stage('render'):
+            self.display_results(df)
         
         # Re-enable controls
         self.create_button.setEnabled(True)
@@ -273,10 +309,16 @@ class LexiconWidget(QWidget):
         
         self.results_label.setText(f"Generated {len(df)} similar terms for '{self.current_term}'")
         self.results_label.setStyleSheet("color: #2E5CB8; font-weight: bold;")
+        
+        self.status_message.emit(self.job_scheduler.record_timings(
+            job, model_type=LexiconExpander.model_type(self.current_term), words=len(df)
+        ))
     
     def on_lexicon_error(self, error_msg: str):
         """Handle lexicon generation error"""
-        self.progress.close()
+        if self.is_stale_job():
+            return
+        self.close_progress()
         
         # Re-enable controls
         self.create_button.setEnabled(True)
@@ -291,15 +333,7 @@ class LexiconWidget(QWidget):
     def display_results(self, df: pd.DataFrame):
         """Display results in table"""
         self.results_table.setVisible(True)
-        self.results_table.setRowCount(len(df))
-        self.results_table.setColumnCount(len(df.columns))
-        self.results_table.setHorizontalHeaderLabels(df.columns.tolist())
-        
-        # Populate table
-        for row in range(len(df)):
-            for col in range(len(df.columns)):
-                item = QTableWidgetItem(str(df.iloc[row, col]))
-                self.results_table.setItem(row, col, item)
+        self.results_model.set_dataframe(df)
         
         # Adjust column widths
         self.results_table.resizeColumnsToContents()
@@ -315,6 +349,7 @@ class LexiconWidget(QWidget):
         self.term_input.clear()
         self.words_slider.setValue(20)
         
+        self.results_model.set_dataframe(None)
         self.results_table.setVisible(False)
         self.results_label.setText("Lexicon results will appear here")
         self.results_label.setStyleSheet("color: #666; font-style: italic;")
@@ -331,17 +366,13 @@ class LexiconWidget(QWidget):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         default_filename = f"lexicon_{self.current_term.replace(' ', '_')}_{timestamp}.csv"
         
-        # Get save location
-        filename, _ = QFileDialog.getSaveFileName(
+        # Write the rows in displayed order, in chunks on a background thread
+        chunks = self.results_model.iter_view_chunks()
+        self.export_thread = start_export(
             self,
             "Export Lexicon Data",
             default_filename,
-            "CSV files (*.csv);;All files (*)"
-        )
-        
-        if filename:
-            try:
-                self.current_data.to_csv(filename, index=False)
-                QMessageBox.information(self, "Export Successful", f"Lexicon data exported to:\\n{filename}")
-            except Exception as e:
-                QMessageBox.critical(self, "Export Failed", f"Failed to export data:\\n{str(e)}")
\ No newline at end of file
+            lambda: chunks,
+            total_rows=self.results_model.rowCount(),
+            stage_log=self.job_scheduler.stage_log
+        )
\ No newline at end of file
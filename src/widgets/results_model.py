@@ -0,0 +1,317 @@
+"""
+Table model that serves result DataFrames to a QTableView without copying cells
+"""
+
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from models.result_exporter import DEFAULT_CHUNK_ROWS
+
+# Text cells longer than this are truncated in the table, full text is in the tooltip
+TEXT_PREVIEW_CHARS = 100
+
+class ResultsTableModel(QAbstractTableModel):
+    """Read-only table model backed by a result's numpy columns
+
+    Only cells the view asks for are formatted, so showing a result costs
+    the same whether it has a hundred rows or a million. Sorting and
+    filtering never move data: they compute an index array that maps
+    displayed rows to stored rows.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._df = None
+        self._labels: list = []
+        self._columns: List[np.ndarray] = []
+        self._headers: List[str] = []
+        self._text_columns = set()
+        self._row_count = 0
+        
+        # Stored row of each displayed row; None shows all rows in stored order
+        self._view: Optional[np.ndarray] = None
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._sorted_rows: Optional[np.ndarray] = None  # Rows shown, in ascending key order
+        self._sorted_keys: Optional[np.ndarray] = None  # Their sort keys, for merging appends
+        self._filter_entities: List[str] = []
+        self._filter_any = False
+    
+    def set_dataframe(self, df: Optional[pd.DataFrame]):
+        """Replace the displayed result"""
+        self.beginResetModel()
+        self._df = df
+        if df is None:
+            self._labels = []
+            self._columns = []
+            self._headers = []
+            self._text_columns = set()
+            self._row_count = 0
+        else:
+            self._labels = list(df.columns)
+            # Own copies: rows are replaced in place, and pandas may hand out read-only views
+            self._columns = [np.array(df[column].to_numpy(), copy=True) for column in df.columns]
+            self._headers = [str(column) for column in df.columns]
+            self._row_count = len(df)
+        self._update_text_columns()
+        self._rebuild_view()
+        self.endResetModel()
+    
+    def append_dataframe(self, df: pd.DataFrame):
+        """Append a batch of rows with the same columns as the current result"""
+        if not self._columns:
+            self.set_dataframe(df)
+            return
+        if list(df.columns) != self._labels:
+            raise ValueError("Appended batch has different columns")
+        if df.empty:
+            return
+        
+        start = self._row_count
+        end = start + len(df)
+        if self._view is not None:
+            self._append_to_view(df, start, end)
+            return
+        
+        self.beginInsertRows(QModelIndex(), start, end - 1)
+        self._store_rows(df, start, end)
+        self.endInsertRows()
+    
+    def _store_rows(self, df: pd.DataFrame, start: int, end: int):
+        """Write appended rows to column storage"""
+        for i, column in enumerate(df.columns):
+            values = df[column].to_numpy()
+            store = self._columns[i]
+            # Grow storage geometrically so appends stay amortized O(1) per row
+            if end > len(store) or not np.can_cast(values.dtype, store.dtype):
+                dtype = store.dtype if np.can_cast(values.dtype, store.dtype) else object
+                grown = np.empty(max(end, 2 * len(store)), dtype=dtype)
+                grown[:start] = store[:start]
+                store = self._columns[i] = grown
+            store[start:end] = values
+        self._row_count = end
+        self._df = None
+        self._update_text_columns()
+    
+    def _append_to_view(self, df: pd.DataFrame, start: int, end: int):
+        """Append rows while a sort or filter is active"""
+        self._store_rows(df, start, end)
+        rows = np.arange(start, end)
+        mask = self._filter_mask(rows)
+        if mask is not None:
+            rows = rows[mask]
+        if not len(rows):
+            return
+        
+        if self._sort_column < 0:
+            # Filtered only: matching rows go to the end
+            first = len(self._view)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._view = np.concatenate([self._view, rows])
+            self.endInsertRows()
+        else:
+            # Merge the new rows into the sorted order without re-sorting the rest
+            self.beginResetModel()
+            new_rows, new_keys = self._sort_rows(rows)
+            try:
+                positions = np.searchsorted(self._sorted_keys, new_keys, side='right')
+                dtype = np.promote_types(self._sorted_keys.dtype, new_keys.dtype)
+                self._sorted_keys = np.insert(self._sorted_keys.astype(dtype, copy=False), positions, new_keys)
+                self._sorted_rows = np.insert(self._sorted_rows, positions, new_rows)
+                self._view = self._sorted_view()
+            except TypeError:
+                self._rebuild_view()
+            self.endResetModel()
+    
+    def replace_rows(self, row: int, count: int, df: pd.DataFrame):
+        """Replace count rows starting at row with the rows of a batch"""
+        if not self._columns:
+            self.set_dataframe(df)
+            return
+        if list(df.columns) != self._labels:
+            raise ValueError("Replacement rows have different columns")
+        
+        if self._view is not None:
+            # Displayed rows don't map to a contiguous stored range; splice in stored order
+            self.beginResetModel()
+            self._splice(row, row + count, df if len(df) else None)
+            self._rebuild_view()
+            self.endResetModel()
+            return
+        
+        end = row + count
+        new_rows = len(df)
+        
+        # Same number of rows: update in place so selection and scroll position stay put
+        if new_rows == count:
+            if not count:
+                return
+            for i, column in enumerate(df.columns):
+                values = df[column].to_numpy()
+                if not np.can_cast(values.dtype, self._columns[i].dtype):
+                    self._columns[i] = self._columns[i].astype(object)
+                self._columns[i][row:end] = values
+            self._df = None
+            self._update_text_columns()
+            self.dataChanged.emit(self.index(row, 0), self.index(end - 1, len(self._columns) - 1))
+            return
+        
+        if count:
+            self.beginRemoveRows(QModelIndex(), row, end - 1)
+            self._splice(row, end, None)
+            self.endRemoveRows()
+        if new_rows:
+            self.beginInsertRows(QModelIndex(), row, row + new_rows - 1)
+            self._splice(row, row, df)
+            self.endInsertRows()
+    
+    def _splice(self, start: int, end: int, df: Optional[pd.DataFrame]):
+        """Replace stored rows start:end with the rows of df, or remove them"""
+        for i, store in enumerate(self._columns):
+            parts = [store[:start], store[end:self._row_count]]
+            if df is not None:
+                parts.insert(1, df[self._labels[i]].to_numpy())
+            self._columns[i] = np.concatenate(parts)
+        self._row_count = len(self._columns[0]) if self._columns else 0
+        self._df = None
+        self._update_text_columns()
+    
+    def _update_text_columns(self):
+        """Note which columns hold text; a column becomes object when a batch doesn't fit its dtype"""
+        self._text_columns = {i for i, values in enumerate(self._columns) if values.dtype == object}
+    
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        """Sort displayed rows by a column; a negative column restores stored order"""
+        self.beginResetModel()
+        self._sort_column = column if 0 <= column < len(self._columns) else -1
+        self._sort_order = order
+        self._rebuild_view()
+        self.endResetModel()
+    
+    def set_filter(self, entities: List[str], match_any: bool = False):
+        """Only show rows that hit all (or any) of the given entity columns"""
+        self.beginResetModel()
+        self._filter_entities = list(entities)
+        self._filter_any = match_any
+        self._rebuild_view()
+        self.endResetModel()
+    
+    def is_filtered(self) -> bool:
+        """Check if an entity filter is active"""
+        return any(entity in self._labels for entity in self._filter_entities)
+    
+    def _filter_mask(self, rows: np.ndarray) -> Optional[np.ndarray]:
+        """Get which of the given stored rows pass the filter, or None without a filter"""
+        columns = [self._labels.index(entity) for entity in self._filter_entities if entity in self._labels]
+        if not columns:
+            return None
+        hits = [self._columns[column][rows] != 0 for column in columns]
+        return np.logical_or.reduce(hits) if self._filter_any else np.logical_and.reduce(hits)
+    
+    def _sort_rows(self, rows: np.ndarray):
+        """Order stored rows by the sort column ascending, keeping ties in stored order
+
+        Returns the ordered rows and their keys.
+        """
+        keys = self._columns[self._sort_column][rows]
+        try:
+            order = np.argsort(keys, kind='stable')
+        except TypeError:
+            # Mixed types in an object column: compare as text
+            keys = keys.astype(str)
+            order = np.argsort(keys, kind='stable')
+        return rows[order], keys[order]
+    
+    def _sorted_view(self) -> np.ndarray:
+        """Get the displayed rows from the ascending order"""
+        if self._sort_order == Qt.SortOrder.DescendingOrder:
+            return self._sorted_rows[::-1]
+        return self._sorted_rows
+    
+    def _rebuild_view(self):
+        """Recompute the displayed rows from the sort and filter state"""
+        self._sorted_rows = None
+        self._sorted_keys = None
+        if self._sort_column >= len(self._columns):
+            self._sort_column = -1
+        if not self._columns or (self._sort_column < 0 and not self.is_filtered()):
+            self._view = None
+            return
+        
+        rows = np.arange(self._row_count)
+        mask = self._filter_mask(rows)
+        if mask is not None:
+            rows = rows[mask]
+        if self._sort_column >= 0:
+            self._sorted_rows, self._sorted_keys = self._sort_rows(rows)
+            rows = self._sorted_view()
+        self._view = rows
+    
+    def total_row_count(self) -> int:
+        """Get the number of stored rows, including filtered out ones"""
+        return self._row_count
+    
+    def iter_view_chunks(self, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """Get the displayed rows, in displayed order, as DataFrame chunks
+
+        The rows are fixed when this is called, so rows appended afterwards
+        are not included and the chunks can be consumed on another thread.
+        """
+        view = np.arange(self._row_count) if self._view is None else self._view.copy()
+        columns = list(zip(self._labels, self._columns))
+        
+        def chunks():
+            for start in range(0, len(view), chunk_rows):
+                rows = view[start:start + chunk_rows]
+                yield pd.DataFrame({label: values[rows] for label, values in columns})
+        
+        return chunks()
+    
+    def dataframe(self) -> Optional[pd.DataFrame]:
+        """Get the full result in stored order, ignoring sort and filter"""
+        if self._df is None and self._columns:
+            self._df = pd.DataFrame({
+                label: values[:self._row_count] for label, values in zip(self._labels, self._columns)
+            })
+        return self._df
+    
+    def text_column(self) -> int:
+        """Get the index of the sentence text column"""
+        return self._headers.index('Text') if 'Text' in self._headers else 0
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._row_count if self._view is None else len(self._view)
+    
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+    
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        column = index.column()
+        row = index.row() if self._view is None else self._view[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self._columns[column][row]
+            if column in self._text_columns and isinstance(value, str) and len(value) > TEXT_PREVIEW_CHARS:
+                return value[:TEXT_PREVIEW_CHARS - 3] + "..."
+            return str(value)
+        
+        if role == Qt.ItemDataRole.ToolTipRole and column in self._text_columns:
+            value = self._columns[column][row]
+            return value if isinstance(value, str) else None
+        
+        return None
+    
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        # Row numbers refer to the stored order, so they stay with their rows
+        return str((section if self._view is None else int(self._view[section])) + 1)
\ No newline at end of file
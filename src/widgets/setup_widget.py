@@ -2,103 +2,209 @@
 Setup widget for downloading embeddings
 """
 
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                             QPushButton, QProgressBar, QTextEdit, QGroupBox,
-                            QMessageBox)
-from PyQt6.QtCore import pyqtSignal, Qt
+                            QMessageBox, QSpinBox)
+from PyQt6.QtCore import pyqtSignal, Qt, QTimer
 from PyQt6.QtGui import QFont
 
 from models.embedding_manager import EmbeddingManager
+from widgets.download_thread import DownloadThread
+from utils.stage_timer import format_megabytes
+from utils.model_memory_settings import (IDLE_TIMEOUT_ENV, MEMORY_BUDGET_ENV, env_overrides,
+                                         save_memory_limits)
+
+# How often the model memory display refreshes while the tab is shown, in milliseconds
+MEMORY_REFRESH_MS = 2000
 
 class SetupWidget(QWidget):
     """Widget for setting up embeddings"""
-    
+
     setup_completed = pyqtSignal()
-    
+
     def __init__(self, embedding_manager: EmbeddingManager):
         super().__init__()
         self.embedding_manager = embedding_manager
         self.download_thread = None
-        
+
         self.setup_ui()
         self.check_initial_state()
-    
+
+        self.memory_timer = QTimer(self)
+        self.memory_timer.setInterval(MEMORY_REFRESH_MS)
+        self.memory_timer.timeout.connect(self.update_memory_status)
+
     def setup_ui(self):
         """Setup the user interface"""
         layout = QVBoxLayout(self)
-        
+
         # Title
         title = QLabel("Setup MarkLex")
         title.setProperty("class", "title")
         layout.addWidget(title)
-        
+
         # Instructions
         instructions = QLabel("""
         <p>MarkLex requires embedding models for lexicon creation and text analysis. 
         These models will be downloaded from the official GitHub repository.</p>
-        
+
         <p><b>What will be downloaded:</b></p>
         <ul>
         <li>Unigram embedding model (embeddings_8)</li>
         <li>Bigram embedding model (embeddings_bi_grams)</li>
         <li>Default lexicon file</li>
         </ul>
-        
+
         <p><b>Note:</b> This is a one-time setup. The files are approximately 300MB total.</p>
         """)
         instructions.setWordWrap(True)
         layout.addWidget(instructions)
-        
+
         # Status group
         status_group = QGroupBox("Status")
         status_layout = QVBoxLayout(status_group)
-        
+
         self.status_label = QLabel("Checking embedding files...")
         status_layout.addWidget(self.status_label)
-        
+
         # Missing files list
         self.missing_files_edit = QTextEdit()
         self.missing_files_edit.setMaximumHeight(100)
         self.missing_files_edit.setReadOnly(True)
         status_layout.addWidget(self.missing_files_edit)
-        
+
         layout.addWidget(status_group)
-        
+
+        # Loaded models and their memory use
+        memory_group = QGroupBox("Model Memory")
+        memory_layout = QVBoxLayout(memory_group)
+
+        self.memory_label = QLabel("No models loaded")
+        self.memory_label.setWordWrap(True)
+        memory_layout.addWidget(self.memory_label)
+
+        # Memory limits, saved for later runs
+        limits_layout = QHBoxLayout()
+        limits_layout.addWidget(QLabel("Memory budget:"))
+        self.budget_spin = QSpinBox()
+        self.budget_spin.setRange(0, 1024 * 1024)
+        self.budget_spin.setSingleStep(256)
+        self.budget_spin.setSuffix(" MB")
+        self.budget_spin.setSpecialValueText("Unlimited")
+        budget = self.embedding_manager.memory_budget
+        self.budget_spin.setValue(budget // (1024 * 1024) if budget else 0)
+        limits_layout.addWidget(self.budget_spin)
+
+        limits_layout.addWidget(QLabel("Unload idle models after:"))
+        self.idle_spin = QSpinBox()
+        self.idle_spin.setRange(0, 24 * 60)
+        self.idle_spin.setSuffix(" min")
+        self.idle_spin.setSpecialValueText("Never")
+        timeout = self.embedding_manager.idle_timeout
+        self.idle_spin.setValue(round(timeout / 60) if timeout else 0)
+        limits_layout.addWidget(self.idle_spin)
+
+        self.apply_limits_button = QPushButton("Apply")
+        self.apply_limits_button.clicked.connect(self.apply_memory_limits)
+        limits_layout.addWidget(self.apply_limits_button)
+        limits_layout.addStretch()
+        memory_layout.addLayout(limits_layout)
+
+        # Limits set in the environment win for this run
+        overrides = env_overrides()
+        for spin, key, env in ((self.budget_spin, 'memory_budget', MEMORY_BUDGET_ENV),
+                               (self.idle_spin, 'idle_timeout', IDLE_TIMEOUT_ENV)):
+            if overrides[key]:
+                spin.setEnabled(False)
+                spin.setToolTip(f"Set by {env}")
+
+        layout.addWidget(memory_group)
+
         # Download section
         download_group = QGroupBox("Download")
         download_layout = QVBoxLayout(download_group)
-        
+
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         download_layout.addWidget(self.progress_bar)
-        
+
         # Status text
         self.download_status = QLabel("")
         download_layout.addWidget(self.download_status)
-        
+
         # Buttons
         button_layout = QHBoxLayout()
-        
+
         self.download_button = QPushButton("Download Embeddings")
         self.download_button.clicked.connect(self.start_download)
         button_layout.addWidget(self.download_button)
-        
+
         self.force_download_button = QPushButton("Force Re-download")
         self.force_download_button.clicked.connect(lambda: self.start_download(force=True))
         button_layout.addWidget(self.force_download_button)
-        
+
         self.check_button = QPushButton("Check Again")
         self.check_button.clicked.connect(self.check_initial_state)
         button_layout.addWidget(self.check_button)
-        
+
         button_layout.addStretch()
         download_layout.addLayout(button_layout)
-        
+
         layout.addWidget(download_group)
-        
+
         layout.addStretch()
-    
+
+    def showEvent(self, event):
+        """Refresh the memory display while the tab is visible"""
+        super().showEvent(event)
+        self.update_memory_status()
+        self.memory_timer.start()
+
+    def hideEvent(self, event):
+        """Stop refreshing the memory display"""
+        super().hideEvent(event)
+        self.memory_timer.stop()
+
+    def apply_memory_limits(self):
+        """Apply and save the memory budget and idle timeout"""
+        # Limits set in the environment are neither changed nor saved
+        if self.budget_spin.isEnabled():
+            budget_mb = self.budget_spin.value()
+            save_memory_limits(budget_mb=budget_mb)
+            self.embedding_manager.set_memory_budget(budget_mb * 1024 * 1024 if budget_mb else None)
+        if self.idle_spin.isEnabled():
+            timeout_min = self.idle_spin.value()
+            save_memory_limits(timeout_min=timeout_min)
+            self.embedding_manager.set_idle_timeout(timeout_min * 60 if timeout_min else None)
+        self.update_memory_status()
+
+    def update_memory_status(self):
+        """Show which models are loaded and how much memory they use"""
+        status = self.embedding_manager.get_memory_status()
+
+        lines = []
+        for info in status['models'].values():
+            name = info['label']
+            if info['loading']:
+                lines.append(f"⏳ {name}: loading...")
+            elif not info['loaded']:
+                lines.append(f"○ {name}: not loaded")
+            elif info['in_use']:
+                lines.append(f"● {name}: {format_megabytes(info['size'])}, in use")
+            else:
+                idle_minutes = int(info['idle_seconds'] // 60)
+                lines.append(f"● {name}: {format_megabytes(info['size'])}, idle {idle_minutes} min")
+
+        budget = status['memory_budget']
+        timeout = status['idle_timeout']
+        lines.append(
+            f"Total: {format_megabytes(status['total'])}"
+            f" (budget: {'unlimited' if budget is None else format_megabytes(budget)};"
+            f" idle models unload {'never' if timeout is None else f'after {timeout / 60:.0f} min'})"
+        )
+        self.memory_label.setText("\n".join(lines))
+
     def check_initial_state(self):
         """Check initial state of embeddings"""
         if self.embedding_manager.are_embeddings_available():
@@ -110,10 +216,11 @@ class SetupWidget(QWidget):
             for file, info in status.items():
                 if info['exists']:
                     size_mb = info['size'] / (1024 * 1024)
-                    status_text += f"✅ {file} ({size_mb:.1f} MB)\\n"
+                    native_note = ", native format ready" if info.get('native') else ""
+                    status_text += f"✅ {file} ({size_mb:.1f} MB{native_note})\\n"
                 else:
                     status_text += f"❌ {file} (missing)\\n"
-            
+
             self.missing_files_edit.setPlainText(status_text)
             self.download_button.setText("Download Completed")
             self.download_button.setEnabled(False)
@@ -128,14 +235,15 @@ class SetupWidget(QWidget):
             for file, info in status.items():
                 if info['exists']:
                     size_mb = info['size'] / (1024 * 1024)
-                    status_text += f"✅ {file} ({size_mb:.1f} MB)\\n"
+                    native_note = ", native format ready" if info.get('native') else ""
+                    status_text += f"✅ {file} ({size_mb:.1f} MB{native_note})\\n"
                 else:
                     status_text += f"❌ {file} (missing)\\n"
-            
+
             self.missing_files_edit.setPlainText(status_text)
             self.download_button.setText("Download Embeddings")
             self.download_button.setEnabled(True)
-    
+
     def start_download(self, force: bool = False):
         """Start downloading embeddings"""
         if not force and self.embedding_manager.are_embeddings_available():
@@ -148,51 +256,52 @@ class SetupWidget(QWidget):
             )
             if reply == QMessageBox.StandardButton.No:
                 return
-        
+
         # Disable buttons during download
         self.download_button.setEnabled(False)
         self.force_download_button.setEnabled(False)
         self.check_button.setEnabled(False)
-        
+
         # Show progress bar
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
-        
+
         # Create and start download thread
-        self.download_thread = self.embedding_manager.create_download_thread(force)
+        models = self.embedding_manager.registry.collection_models()
+        self.download_thread = DownloadThread(self.embedding_manager.app_dirs, models, force)
         self.download_thread.progress_updated.connect(self.on_progress_updated)
         self.download_thread.status_updated.connect(self.on_status_updated)
         self.download_thread.download_completed.connect(self.on_download_completed)
         self.download_thread.start()
-    
+
     def on_progress_updated(self, progress: int):
         """Handle progress update"""
         self.progress_bar.setValue(progress)
-    
+
     def on_status_updated(self, status: str):
         """Handle status update"""
         self.download_status.setText(status)
-    
+
     def on_download_completed(self, success: bool):
         """Handle download completion"""
         # Re-enable buttons
         self.download_button.setEnabled(True)
         self.force_download_button.setEnabled(True)
         self.check_button.setEnabled(True)
-        
+
         # Hide progress bar
         self.progress_bar.setVisible(False)
-        
+
         if success:
             self.download_status.setText("✅ Download completed successfully!")
             self.download_status.setStyleSheet("color: green; font-weight: bold;")
-            
+
             # Clear model cache to force reload
             self.embedding_manager.clear_cache()
-            
+
             # Check state again
             self.check_initial_state()
-            
+
             QMessageBox.information(
                 self,
                 "Download Complete",
@@ -201,7 +310,7 @@ class SetupWidget(QWidget):
         else:
             self.download_status.setText("❌ Download failed. Please try again.")
             self.download_status.setStyleSheet("color: red; font-weight: bold;")
-            
+
             QMessageBox.warning(
                 self,
                 "Download Failed",
@@ -0,0 +1,10 @@
+"""
+Test setup: import the app from src and run Qt without a display
+"""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Tests for ResultsTableModel row updates
+"""
+
+import pandas as pd
+import pytest
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+from models.live_analysis import LiveAnalysis, split_paragraphs
+from models.text_processor import TextProcessor
+from widgets.results_model import ResultsTableModel
+
+LEXICON = pd.DataFrame({'Entity': ['Risk', 'Mkt'], 'Keyword': ['risk', 'marketing']})
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+def live_update(live: LiveAnalysis, text: str):
+    paragraphs = split_paragraphs(text)
+    results = live.analyze_paragraphs(live.pending_paragraphs(paragraphs), live.compiled)
+    return live.apply(paragraphs, results)
+
+def test_same_size_live_edit_updates_in_place(app):
+    live = LiveAnalysis(TextProcessor())
+    live.set_lexicon(LEXICON, "v1")
+    model = ResultsTableModel()
+    
+    live_update(live, "Risk is rising.\n\nMarketing spend fell.")
+    shown = live.result()
+    model.set_dataframe(shown)
+    before = shown.copy()
+    
+    # Same number of sentences, so the rows are replaced in place
+    edits = live_update(live, "Risk is rising.\n\nThe weather was fine.")
+    assert edits and all(len(rows) == count for _, count, rows in edits)
+    for row, count, rows in edits:
+        model.replace_rows(row, count, rows)
+    
+    text = model.text_column()
+    assert model.data(model.index(1, text), Qt.ItemDataRole.DisplayRole) == live.result()['Text'].iloc[1]
+    assert model.dataframe()['Mkt'].tolist() == [0, 0]
+    pd.testing.assert_frame_equal(shown, before)
+
+def test_replace_with_wider_values_shows_text(app):
+    model = ResultsTableModel()
+    model.set_dataframe(pd.DataFrame({'Text': ['a', 'b'], 'Risk': [0, 1]}))
+    model.replace_rows(0, 1, pd.DataFrame({'Text': ['c'], 'Risk': ['n/a']}))
+    
+    index = model.index(0, 1)
+    assert model.data(index, Qt.ItemDataRole.DisplayRole) == 'n/a'
+    assert model.data(index, Qt.ItemDataRole.ToolTipRole) == 'n/a'
\ No newline at end of file
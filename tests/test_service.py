@@ -0,0 +1,93 @@
+"""
+Tests for the service's Host check, path resolution and request validation
+"""
+
+import asyncio
+import os
+from http import HTTPStatus
+
+import pytest
+
+from service import AnalysisService, HTTPError, host_name
+
+def make_service(root=None, allowed_hosts=()):
+    # Only request handling is tested, so no analyzer, expander or worker pools
+    return AnalysisService(None, None, root=root, allowed_hosts=allowed_hosts)
+
+def request_status(service, host) -> int:
+    """Send one request with a Host header (None for no header) and get the response status"""
+    async def run():
+        server = await asyncio.start_server(service._handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            headers = f"Host: {host}\r\n" if host is not None else ""
+            writer.write(f"GET /missing HTTP/1.1\r\n{headers}Connection: close\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status_line = await reader.readline()
+            writer.close()
+            return int(status_line.split()[1])
+    return asyncio.run(run())
+
+@pytest.mark.parametrize('host, name', [
+    ("localhost", "localhost"),
+    ("LOCALHOST:8765", "localhost"),
+    ("127.0.0.1:8765", "127.0.0.1"),
+    ("[::1]", "::1"),
+    ("[::1]:8765", "::1"),
+    ("::1", "::1"),
+    ("127.0.0.1.evil.com", "127.0.0.1.evil.com"),
+    ("", ""),
+])
+def test_host_name(host, name):
+    assert host_name(host) == name
+
+@pytest.mark.parametrize('host', ["localhost", "localhost:8765", "127.0.0.1:8765", "[::1]:8765"])
+def test_loopback_hosts_are_allowed(host):
+    # Allowed requests reach routing and get a 404 for the missing endpoint
+    assert request_status(make_service(), host) == HTTPStatus.NOT_FOUND
+
+@pytest.mark.parametrize('host', ["127.0.0.1.evil.com", "evil.com:8765", "", None])
+def test_other_hosts_are_rejected(host):
+    assert request_status(make_service(), host) == HTTPStatus.FORBIDDEN
+
+def test_allowed_hosts():
+    service = make_service(allowed_hosts=["marklex.internal:8765"])
+    assert request_status(service, "marklex.internal") == HTTPStatus.NOT_FOUND
+    assert request_status(service, "evil.com") == HTTPStatus.FORBIDDEN
+
+def test_resolve_path_under_root(tmp_path):
+    (tmp_path / "filings").mkdir()
+    service = make_service(root=str(tmp_path))
+    assert service._resolve_path("filings/a.txt") == os.path.realpath(tmp_path / "filings" / "a.txt")
+
+@pytest.mark.parametrize('path', ["/etc/passwd", "../outside.txt", "filings/../../outside.txt"])
+def test_resolve_path_outside_root(tmp_path, path):
+    root = tmp_path / "root"
+    (root / "filings").mkdir(parents=True)
+    with pytest.raises(HTTPError) as error:
+        make_service(root=str(root))._resolve_path(path)
+    assert error.value.status == HTTPStatus.FORBIDDEN
+
+def test_resolve_path_symlink_outside_root(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    (tmp_path / "secret.txt").write_text("secret")
+    (root / "link.txt").symlink_to(tmp_path / "secret.txt")
+    (root / "dir").symlink_to(tmp_path)
+    service = make_service(root=str(root))
+    for path in ("link.txt", "dir/secret.txt"):
+        with pytest.raises(HTTPError) as error:
+            service._resolve_path(path)
+        assert error.value.status == HTTPStatus.FORBIDDEN
+
+def test_resolve_path_without_root():
+    with pytest.raises(HTTPError) as error:
+        make_service()._resolve_path("filings/a.txt")
+    assert error.value.status == HTTPStatus.FORBIDDEN
+
+@pytest.mark.parametrize('encoding', ["no-such-encoding", 8, ["utf-8"]])
+def test_analyze_rejects_bad_encoding(encoding):
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(make_service()._analyze({'text': "Some text.", 'encoding': encoding}))
+    assert error.value.status == HTTPStatus.BAD_REQUEST
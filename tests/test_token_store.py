@@ -0,0 +1,79 @@
+"""
+Tests for storing tokenized documents and analyzing from them
+"""
+
+import tracemalloc
+
+import pandas as pd
+
+from models.analysis_worker import iter_analysis
+from models.result_cache import hash_file
+from models.text_processor import TextProcessor
+from models.token_store import TokenStore
+from utils.stage_timer import StageTimer
+
+LEXICON = pd.DataFrame({'Entity': ['Risk', 'Mkt', 'New'],
+                        'Keyword': ['risk', 'marketing spend', 'new product launch']})
+
+WORDS = ["risk", "marketing", "spend", "new", "product", "launch", "the", "climate", "of", "a"]
+
+def write_corpus(path, sentences: int):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(sentences):
+            words = [WORDS[(i * 7 + j * 3) % len(WORDS)] for j in range(8 + i % 5)]
+            f.write(' '.join(words).capitalize() + f" item {i % 1000}. ")
+
+def analyze(text_processor, path, token_store=None):
+    batches = [batch for batch, _, _, _ in iter_analysis(text_processor, LEXICON, file_path=str(path),
+                                                          token_store=token_store)]
+    return pd.concat(batches, ignore_index=True)
+
+def test_stored_tokens_give_the_same_results(tmp_path):
+    text_processor = TextProcessor()
+    path = tmp_path / "corpus.txt"
+    write_corpus(path, 5000)
+    store = TokenStore(str(tmp_path / "tokens"))
+    
+    expected = analyze(text_processor, path)
+    pd.testing.assert_frame_equal(analyze(text_processor, path, store), expected)
+    assert store.get(TokenStore.key(hash_file(str(path)), text_processor.splitter_fingerprint)) is not None
+    pd.testing.assert_frame_equal(analyze(text_processor, path, store), expected)
+
+def peak_memory(text_processor, path, token_store=None) -> int:
+    tracemalloc.start()
+    try:
+        for _ in iter_analysis(text_processor, LEXICON, file_path=str(path), token_store=token_store):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def test_storing_tokens_keeps_memory_bounded(tmp_path):
+    text_processor = TextProcessor()
+    path = tmp_path / "corpus.txt"
+    write_corpus(path, 100000)
+    store = TokenStore(str(tmp_path / "tokens"))
+    
+    streaming = peak_memory(text_processor, path)
+    storing = peak_memory(text_processor, path, store)
+    
+    # Holding the sentences and words of the whole document would take several times its size
+    assert store.get(TokenStore.key(hash_file(str(path)), text_processor.splitter_fingerprint)) is not None
+    assert storing < streaming + path.stat().st_size / 4
+def test_changed_stopwords_still_use_stored_tokens(tmp_path):
+    text_processor = TextProcessor()
+    path = tmp_path / "corpus.txt"
+    write_corpus(path, 2000)
+    store = TokenStore(str(tmp_path / "tokens"))
+    analyze(text_processor, path, store)
+    
+    # "spend" as a stopword stops "marketing spend" from matching
+    text_processor.stop_words = text_processor.stop_words | {"spend"}
+    expected = analyze(text_processor, path)
+    timer = StageTimer()
+    batches = [batch for batch, _, _, _ in iter_analysis(text_processor, LEXICON, file_path=str(path),
+                                                          timer=timer, token_store=store)]
+    
+    assert 'tokenize' not in timer.state()['seconds']
+    assert expected['Mkt'].sum() == 0
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), expected)
\ No newline at end of file